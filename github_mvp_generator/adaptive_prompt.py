@@ -2,6 +2,7 @@
 
 import json
 import os
+import threading
 from typing import Dict, Any, List
 from datetime import datetime
 
@@ -12,6 +13,8 @@ class AdaptivePromptSystem:
     def __init__(self, adaptive_file: str = "adaptive_prompts.json"):
         self.adaptive_file = adaptive_file
         self.adaptive_data = self._load_adaptive_data()
+        # Prompts are adapted from concurrently running generation stages
+        self._lock = threading.RLock()
     
     def _load_adaptive_data(self) -> Dict[str, Any]:
         """Load existing adaptive data from file."""
@@ -87,15 +90,16 @@ class AdaptivePromptSystem:
     
     def store_successful_pattern(self, pattern_key: str, pattern_data: Dict[str, Any]):
         """Store a successful generation pattern."""
-        if "success_patterns" not in self.adaptive_data:
-            self.adaptive_data["success_patterns"] = {}
+        with self._lock:
+            if "success_patterns" not in self.adaptive_data:
+                self.adaptive_data["success_patterns"] = {}
         
-        self.adaptive_data["success_patterns"][pattern_key] = {
-            "pattern_data": pattern_data,
-            "timestamp": datetime.now().isoformat(),
-            "success_count": self.adaptive_data["success_patterns"].get(pattern_key, {}).get("success_count", 0) + 1
-        }
-        self._save_adaptive_data()
+            self.adaptive_data["success_patterns"][pattern_key] = {
+                "pattern_data": pattern_data,
+                "timestamp": datetime.now().isoformat(),
+                "success_count": self.adaptive_data["success_patterns"].get(pattern_key, {}).get("success_count", 0) + 1
+            }
+            self._save_adaptive_data()
     
     def get_success_patterns(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get the most successful patterns."""
@@ -0,0 +1,185 @@
+"""Content-addressed cache for AI responses in the GitHub MVP Generator."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from config import (LLM_CACHE_ENABLED, LLM_CACHE_DIR, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES,
+                    LLM_CACHE_SWEEP_INTERVAL)
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + on-disk) cache of AI responses with TTL eviction.
+
+    Entries are keyed by a hash of everything that determines the completion:
+    provider, model, the fully rendered prompt and the generation parameters.
+
+    An expired entry is dropped when its key is read again. Keys that are
+    never read again are removed by a sweep of the whole cache, started in the
+    background by a write once sweep_interval seconds have passed since the
+    previous one.
+    """
+
+    def __init__(self, cache_dir: str = LLM_CACHE_DIR, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 ttl: int = LLM_CACHE_TTL, enabled: bool = LLM_CACHE_ENABLED,
+                 sweep_interval: int = LLM_CACHE_SWEEP_INTERVAL):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.sweep_interval = sweep_interval
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._sweeper: Optional[threading.Thread] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+    def make_key(self, provider: str, model: str, prompt: str, params: Dict[str, Any]) -> str:
+        """Build the cache key for a completion request."""
+        payload = json.dumps(
+            {"provider": provider, "model": model, "prompt": prompt, "params": params},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        """Get the on-disk path for a cache key."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        """Insert an entry into the memory tier, evicting the least recently used."""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None if it is missing or expired."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry and entry.get("expires_at", 0) > now:
+                self._remember(key, entry["expires_at"], entry["value"])
+                self.stats["disk_hits"] += 1
+                return entry["value"]
+            self.stats["misses"] += 1
+
+        if entry:
+            # Expired on disk; drop it so the directory doesn't grow forever
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return None
+
+    def set(self, key: str, value: str):
+        """Store a response in both tiers."""
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self.stats["stores"] += 1
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump({"expires_at": expires_at, "value": value}, f)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            print(f"Warning: Could not save AI response cache entry: {e}")
+        self._maybe_sweep()
+
+    def _maybe_sweep(self):
+        """Start a background sweep of expired entries if one is due."""
+        if self.sweep_interval <= 0:
+            return
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            if time.monotonic() - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = time.monotonic()
+            self._sweeper = threading.Thread(target=self._sweep, name="llm-cache-sweep", daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self):
+        try:
+            self.evict_expired()
+        except Exception as e:
+            print(f"Warning: Could not sweep AI response cache: {e}")
+
+    def evict_expired(self) -> int:
+        """Remove expired entries from both tiers and return how many were removed."""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for key in [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]:
+                del self._memory[key]
+                removed += 1
+
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        with open(path, 'r') as f:
+                            expired = json.load(f).get("expires_at", 0) <= now
+                    except (IOError, ValueError):
+                        expired = True
+                    if expired:
+                        try:
+                            os.remove(path)
+                            removed += 1
+                        except OSError:
+                            pass
+
+        with self._lock:
+            self.stats["evictions"] += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics for the cache."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["enabled"] = self.enabled
+        stats["hits"] = hits
+        stats["hit_rate"] = hits / lookups * 100 if lookups > 0 else 0.0
+        return stats
+
+
+# Global AI response cache instance
+response_cache = ResponseCache()
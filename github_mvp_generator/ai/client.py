@@ -1,19 +1,127 @@
 """AI client abstraction for the GitHub MVP Generator."""
 
+import asyncio
+import contextlib
+import contextvars
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 import os
 from config import GITHUB_TOKEN
+from ai.cache import response_cache
+from performance_metrics import performance_metrics
+
+
+# Process-wide cap on in-flight provider calls (None = unlimited)
+_llm_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def set_llm_concurrency(limit: Optional[int]):
+    """Limit how many provider calls may be in flight at once across all clients."""
+    global _llm_slots
+    _llm_slots = threading.BoundedSemaphore(limit) if limit and limit > 0 else None
+
+
+def _llm_slot():
+    """Get a context manager that holds one provider call slot."""
+    slots = _llm_slots
+    return slots if slots is not None else contextlib.nullcontext()
+
+
+# Where the provider call running in this context reports its token usage.
+# Set only while provider code runs, never across a yield to the consumer, so
+# concurrent calls (threads or asyncio tasks) each fill their own dict.
+_call_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("llm_call_usage", default=None)
+
+
+def report_usage(usage: Any):
+    """Record a provider response's token usage for AIClient to attribute.
+    
+    Providers call this with the SDK's usage object (or None) from within a
+    call; it is stored in the usage dict of the AIClient call that made it.
+    """
+    sink = _call_usage.get()
+    if usage is None or sink is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    sink.update({
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": getattr(usage, 'total_tokens', 0) or prompt_tokens + completion_tokens
+    })
+
+
+@contextlib.contextmanager
+def _collect_usage(usage: Dict[str, int]):
+    """Direct report_usage calls made inside the block into usage."""
+    token = _call_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _call_usage.reset(token)
+
+
+def _stream_with_usage(stream: Iterator[str], usage: Dict[str, int]) -> Iterator[str]:
+    """Iterate a provider stream, collecting its usage only while its own code runs."""
+    iterator = iter(stream)
+    while True:
+        with _collect_usage(usage):
+            try:
+                delta = next(iterator)
+            except StopIteration:
+                return
+        yield delta
+
+
+async def _astream_with_usage(stream: AsyncIterator[str], usage: Dict[str, int]) -> AsyncIterator[str]:
+    """Iterate an async provider stream, collecting its usage only while its own code runs."""
+    iterator = stream.__aiter__()
+    while True:
+        with _collect_usage(usage):
+            try:
+                delta = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+        yield delta
 
 
 class AIProvider(ABC):
     """Abstract base class for AI providers."""
     
+    # Generation parameters used when the caller doesn't override them
+    default_params: Dict[str, Any] = {'temperature': 0.7, 'max_tokens': 1000}
+    
     @abstractmethod
     def generate_text(self, prompt: str, **kwargs) -> str:
         """Generate text using the AI model."""
         pass
     
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        """Generate text asynchronously using the AI model.
+        
+        Providers with a native async SDK client should override this; the
+        default runs the blocking call in a worker thread, which inherits the
+        caller's context and so reports usage to the same call.
+        """
+        return await asyncio.to_thread(self.generate_text, prompt, **kwargs)
+    
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Generate text as a stream of deltas.
+        
+        Providers that support streamed completions should override this; the
+        default yields the complete response as a single delta.
+        """
+        yield self.generate_text(prompt, **kwargs)
+    
+    async def astream_text(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Generate text asynchronously as a stream of deltas.
+        
+        Providers with a native async streaming client should override this; the
+        default yields the complete async response as a single delta.
+        """
+        yield await self.agenerate_text(prompt, **kwargs)
+    
     @abstractmethod
     def get_model_name(self) -> str:
         """Get the name of the model being used."""
@@ -21,11 +129,17 @@ class AIProvider(ABC):
 
 
 class AIClient:
-    """AI client that can use different providers."""
+    """AI client that can use different providers.
+    
+    The token usage of every provider call is recorded in performance_metrics
+    against the call's template, the provider/model and usage_repo.
+    """
     
     def __init__(self, provider: str = "openai"):
         self.provider = provider
         self._client = self._initialize_client()
+        # Repository that token usage is attributed to, set by the generator
+        self.usage_repo: Optional[str] = None
     
     def _initialize_client(self) -> AIProvider:
         """Initialize the appropriate AI provider client."""
@@ -38,14 +152,133 @@ class AIClient:
         else:
             raise ValueError(f"Unsupported AI provider: {self.provider}")
     
-    def generate_text(self, prompt: str, **kwargs) -> str:
-        """Generate text using the configured AI provider."""
+    def _cache_key(self, prompt: str, kwargs: Dict[str, Any]) -> str:
+        """Build the response cache key for a prompt and its generation parameters."""
+        params = dict(self._client.default_params)
+        params.update(kwargs)
+        return response_cache.make_key(self.provider, self.get_model_name(), prompt, params)
+    
+    def _record_usage(self, template: Optional[str], usage: Dict[str, int]):
+        """Attribute the token usage a provider call reported, if it reported any."""
+        if usage:
+            performance_metrics.record_token_usage(
+                self.provider, self.get_model_name(), template or "unknown", self.usage_repo or "unknown", usage)
+    
+    def _cached_response(self, cache_key: str) -> Optional[str]:
+        """Look a response up in the cache, recording the lookup and whether it hit as a span."""
+        with performance_metrics.span("llm.cache_lookup") as lookup:
+            cached = response_cache.get(cache_key)
+            lookup.set("hit", cached is not None)
+        return cached
+    
+    def generate_text(self, prompt: str, template: Optional[str] = None, **kwargs) -> str:
+        """Generate text using the configured AI provider.
+        
+        template names the prompt template (e.g. PROJECT_TYPE_PROMPT) that the
+        call's token usage is attributed to.
+        """
+        cache_key = self._cache_key(prompt, kwargs)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        usage: Dict[str, int] = {}
+        try:
+            with performance_metrics.span("llm.provider_call", provider=self.provider), _llm_slot(), \
+                    _collect_usage(usage):
+                response = self._client.generate_text(prompt, **kwargs)
+        except Exception as e:
+            performance_metrics.record_provider_call(self.provider, success=False)
+            print(f"Warning: AI generation failed with {self.provider}: {e}")
+            print("Falling back to rule-based generation")
+            raise e  # Re-raise to be handled by caller
+        
+        performance_metrics.record_provider_call(self.provider, success=True)
+        self._record_usage(template, usage)
+        if response:
+            response_cache.set(cache_key, response)
+        return response
+    
+    def stream_text(self, prompt: str, template: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """Generate text using the configured AI provider, yielding deltas as they arrive.
+        
+        A cached response is yielded as a single delta. The full streamed text is
+        cached once the stream completes, so later calls can be served either way.
+        """
+        cache_key = self._cache_key(prompt, kwargs)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        usage: Dict[str, int] = {}
+        try:
+            # No span here: a span held open across yields would adopt the consumer's work
+            with _llm_slot():
+                for delta in _stream_with_usage(self._client.stream_text(prompt, **kwargs), usage):
+                    chunks.append(delta)
+                    yield delta
+        except Exception as e:
+            performance_metrics.record_provider_call(self.provider, success=False)
+            print(f"Warning: AI generation failed with {self.provider}: {e}")
+            print("Falling back to rule-based generation")
+            raise e  # Re-raise to be handled by caller
+        
+        performance_metrics.record_provider_call(self.provider, success=True)
+        self._record_usage(template, usage)
+        response = "".join(chunks).strip()
+        if response:
+            response_cache.set(cache_key, response)
+    
+    async def agenerate_text(self, prompt: str, template: Optional[str] = None, **kwargs) -> str:
+        """Generate text asynchronously using the configured AI provider."""
+        cache_key = self._cache_key(prompt, kwargs)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        usage: Dict[str, int] = {}
+        try:
+            with performance_metrics.span("llm.provider_call", provider=self.provider), _collect_usage(usage):
+                response = await self._client.agenerate_text(prompt, **kwargs)
+        except Exception as e:
+            performance_metrics.record_provider_call(self.provider, success=False)
+            print(f"Warning: AI generation failed with {self.provider}: {e}")
+            print("Falling back to rule-based generation")
+            raise e  # Re-raise to be handled by caller
+        
+        performance_metrics.record_provider_call(self.provider, success=True)
+        self._record_usage(template, usage)
+        if response:
+            response_cache.set(cache_key, response)
+        return response
+    
+    async def astream_text(self, prompt: str, template: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """Generate text asynchronously using the configured AI provider, yielding deltas as they arrive."""
+        cache_key = self._cache_key(prompt, kwargs)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        usage: Dict[str, int] = {}
         try:
-            return self._client.generate_text(prompt, **kwargs)
+            async for delta in _astream_with_usage(self._client.astream_text(prompt, **kwargs), usage):
+                chunks.append(delta)
+                yield delta
         except Exception as e:
+            performance_metrics.record_provider_call(self.provider, success=False)
             print(f"Warning: AI generation failed with {self.provider}: {e}")
             print("Falling back to rule-based generation")
             raise e  # Re-raise to be handled by caller
+        
+        performance_metrics.record_provider_call(self.provider, success=True)
+        self._record_usage(template, usage)
+        response = "".join(chunks).strip()
+        if response:
+            response_cache.set(cache_key, response)
     
     def get_model_name(self) -> str:
         """Get the name of the model being used."""
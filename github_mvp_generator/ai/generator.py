@@ -1,8 +1,11 @@
 """AI-enhanced prompt generator for the GitHub MVP Generator."""
 
-from typing import Dict, List, Any
-from jinja2 import Template
+import json
+import time
+from typing import Callable, Dict, List, Any, Optional
 from ai.client import AIClient
+from ai.scheduler import StageScheduler
+from ai.templates.registry import template_registry
 from ai.templates.prompts import (
     PROJECT_TYPE_PROMPT,
     TECH_STACK_PROMPT,
@@ -10,24 +13,46 @@ from ai.templates.prompts import (
     ARCHITECTURE_PROMPT,
     COMPLEXITY_PROMPT,
     MVP_GUIDANCE_PROMPT,
-    IMPLEMENTATION_STEPS_PROMPT
+    IMPLEMENTATION_STEPS_PROMPT,
+    FUSED_GENERATION_PROMPT
 )
 from user_preferences import user_preferences
+from performance_metrics import performance_metrics
+from github_parser.repo_id import repo_key
 from adaptive_prompt import adaptive_prompt_system
+from config import AI_STAGE_CONCURRENCY, AI_GENERATION_MODE, AI_FUSED_MAX_TOKENS
+
+# Expected shape of a fused-mode response: JSON key -> (stage name, type, minimum length).
+# The minimum lengths match what _generate_final_format accepts without falling back.
+FUSED_RESPONSE_SCHEMA = {
+    "project_type": ("project_type", str, 1),
+    "tech_stack": ("tech_stack", list, 1),
+    "architecture": ("architecture", str, 1),
+    "features": ("key_features", list, 3),
+    "complexity": ("complexity", str, 1),
+    "guidance": ("mvp_guidance", str, 1),
+    "steps": ("implementation_steps", list, 5),
+}
+
+GENERATION_MODES = ("staged", "fused")
 
 
 class AIEnhancedGenerator:
     """AI-enhanced MVP prompt generator."""
     
-    def __init__(self, provider: str = "openai"):
+    def __init__(self, provider: str = "openai", mode: str = AI_GENERATION_MODE):
+        if mode not in GENERATION_MODES:
+            raise ValueError(f"Unsupported generation mode: {mode}")
+        self.mode = mode
         self.ai_client = AIClient(provider)
+        self.stage_timings: Dict[str, Dict[str, float]] = {}
         # Update user preferences with the provider used
         user_preferences.update_provider_preference(provider)
     
+    @performance_metrics.timed("generator.render_template")
     def _render_template(self, template_str: str, context: Dict[str, Any]) -> str:
         """Render a Jinja2 template with the given context."""
-        template = Template(template_str)
-        return template.render(context)
+        return template_registry.render(template_str, context)
     
     def _parse_numbered_list(self, text: str) -> List[str]:
         """Parse a numbered list from AI response."""
@@ -62,6 +87,91 @@ class AIEnhancedGenerator:
         cleaned = first_line.replace("**", "").replace("*", "").strip()
         return cleaned
     
+    def _is_placeholder(self, text: str) -> bool:
+        """Check whether AI output is an unfilled template placeholder."""
+        return "placeholder" in text.lower() or "___________" in text
+    
+    def _parse_json_object(self, text: str) -> Dict[str, Any]:
+        """Parse a JSON object from AI response, tolerating surrounding prose or fences."""
+        if not text:
+            return {}
+        start = text.find('{')
+        end = text.rfind('}')
+        if start == -1 or end <= start:
+            return {}
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    
+    def _validate_fused_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a fused-mode response against FUSED_RESPONSE_SCHEMA.
+        
+        Returns a dict mapping stage names to values for every field that passed
+        validation; invalid or missing fields are simply left out.
+        """
+        valid = {}
+        for key, (stage, expected_type, min_length) in FUSED_RESPONSE_SCHEMA.items():
+            value = data.get(key)
+            if not isinstance(value, expected_type):
+                continue
+            if expected_type is str:
+                value = value.strip()
+                if len(value) < min_length or self._is_placeholder(value):
+                    continue
+            else:
+                value = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+                if len(value) < min_length or any(self._is_placeholder(item) for item in value):
+                    continue
+            valid[stage] = value
+        
+        # Apply the same clean-up the staged parsers perform
+        if "project_type" in valid:
+            valid["project_type"] = self._clean_response(valid["project_type"])
+        if "architecture" in valid:
+            valid["architecture"] = valid["architecture"].split('.')[0].strip() + '.'
+        if "key_features" in valid:
+            valid["key_features"] = valid["key_features"][:5]
+        if "implementation_steps" in valid:
+            valid["implementation_steps"] = valid["implementation_steps"][:10]
+        return valid
+    
+    @performance_metrics.timed("generator.generate_fused_sections")
+    def generate_fused_sections(self, repo_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate every prompt section with a single JSON completion.
+        
+        Returns only the sections that passed schema validation.
+        """
+        context = {
+            'repo_name': repo_data.get('name', ''),
+            'language': repo_data.get('language', ''),
+            'frameworks': ', '.join(repo_data.get('frameworks', [])),
+            'description': repo_data.get('description', '') or '',
+            'contents': repo_data.get('contents', [])[:20],  # Limit to first 20 items
+            'stars': repo_data.get('stars', 0),
+            'forks': repo_data.get('forks', 0)
+        }
+        
+        # Adapt prompt based on feedback
+        adapted_prompt = adaptive_prompt_system.adapt_prompt_based_on_feedback(
+            "FUSED_GENERATION_PROMPT", FUSED_GENERATION_PROMPT)
+        
+        try:
+            prompt = self._render_template(adapted_prompt, context)
+            response = self.ai_client.generate_text(prompt, template="FUSED_GENERATION_PROMPT", max_tokens=AI_FUSED_MAX_TOKENS)
+            sections = self._validate_fused_response(self._parse_json_object(response))
+        except:
+            return {}
+        
+        # Keep user preferences in step with the staged path
+        if "project_type" in sections:
+            user_preferences.add_preferred_project_type(sections["project_type"])
+        for tech in sections.get("tech_stack", []):
+            user_preferences.add_preferred_tech_stack(tech)
+        return sections
+    
+    @performance_metrics.timed("generator.determine_project_type")
     def determine_project_type(self, repo_data: Dict[str, Any]) -> str:
         """Determine project type using AI analysis."""
         context = {
@@ -78,7 +188,7 @@ class AIEnhancedGenerator:
         
         try:
             prompt = self._render_template(adapted_prompt, context)
-            response = self.ai_client.generate_text(prompt)
+            response = self.ai_client.generate_text(prompt, template="PROJECT_TYPE_PROMPT")
             cleaned_response = self._clean_response(response)
             # Filter out placeholder responses
             if cleaned_response and "placeholder" not in cleaned_response.lower() and "___________" not in cleaned_response:
@@ -89,6 +199,7 @@ class AIEnhancedGenerator:
             pass
         return ""
     
+    @performance_metrics.timed("generator.determine_tech_stack")
     def determine_tech_stack(self, repo_data: Dict[str, Any]) -> List[str]:
         """Determine technology stack using AI analysis."""
         context = {
@@ -105,7 +216,7 @@ class AIEnhancedGenerator:
         
         try:
             prompt = self._render_template(adapted_prompt, context)
-            response = self.ai_client.generate_text(prompt)
+            response = self.ai_client.generate_text(prompt, template="TECH_STACK_PROMPT")
             tech_stack = self._parse_comma_separated(response)
             # Filter out placeholder responses
             if tech_stack and not any("placeholder" in item.lower() or "___________" in item for item in tech_stack):
@@ -117,6 +228,7 @@ class AIEnhancedGenerator:
             pass
         return []
     
+    @performance_metrics.timed("generator.determine_architecture")
     def determine_architecture(self, repo_data: Dict[str, Any]) -> str:
         """Determine architecture using AI analysis."""
         context = {
@@ -133,7 +245,7 @@ class AIEnhancedGenerator:
         
         try:
             prompt = self._render_template(adapted_prompt, context)
-            response = self.ai_client.generate_text(prompt)
+            response = self.ai_client.generate_text(prompt, template="ARCHITECTURE_PROMPT")
             # Take first sentence of the response
             if response and "placeholder" not in response.lower() and "___________" not in response:
                 cleaned_response = response.strip().split('.')[0].strip() + '.' if response.strip() else ""
@@ -142,6 +254,7 @@ class AIEnhancedGenerator:
             pass
         return ""
     
+    @performance_metrics.timed("generator.identify_key_features")
     def identify_key_features(self, repo_data: Dict[str, Any]) -> List[str]:
         """Identify key features using AI analysis."""
         context = {
@@ -160,7 +273,7 @@ class AIEnhancedGenerator:
         
         try:
             prompt = self._render_template(adapted_prompt, context)
-            response = self.ai_client.generate_text(prompt)
+            response = self.ai_client.generate_text(prompt, template="FEATURES_PROMPT")
             features = self._parse_numbered_list(response)
             # Filter out placeholder responses
             if features and not any("placeholder" in feature.lower() or "___________" in feature for feature in features):
@@ -175,6 +288,7 @@ class AIEnhancedGenerator:
             pass
         return []
     
+    @performance_metrics.timed("generator.determine_complexity_level")
     def determine_complexity_level(self, repo_data: Dict[str, Any]) -> str:
         """Determine complexity level using AI analysis."""
         context = {
@@ -192,7 +306,7 @@ class AIEnhancedGenerator:
         
         try:
             prompt = self._render_template(adapted_prompt, context)
-            response = self.ai_client.generate_text(prompt)
+            response = self.ai_client.generate_text(prompt, template="COMPLEXITY_PROMPT")
             cleaned_response = self._clean_response(response)
             # Filter out placeholder responses
             if cleaned_response and "placeholder" not in cleaned_response.lower() and "___________" not in cleaned_response:
@@ -201,6 +315,7 @@ class AIEnhancedGenerator:
             pass
         return ""
     
+    @performance_metrics.timed("generator.generate_implementation_steps")
     def generate_implementation_steps(self, repo_data: Dict[str, Any], project_type: str, 
                                     tech_stack: List[str], architecture: str, 
                                     key_features: List[str]) -> List[str]:
@@ -219,7 +334,7 @@ class AIEnhancedGenerator:
         
         try:
             prompt = self._render_template(adapted_prompt, context)
-            response = self.ai_client.generate_text(prompt)
+            response = self.ai_client.generate_text(prompt, template="IMPLEMENTATION_STEPS_PROMPT")
             steps = self._parse_numbered_list(response)
             # Filter out placeholder responses
             if steps and not any("placeholder" in step.lower() or "___________" in step for step in steps):
@@ -234,10 +349,16 @@ class AIEnhancedGenerator:
             pass
         return []
 
+    @performance_metrics.timed("generator.generate_detailed_mvp_guidance")
     def generate_detailed_mvp_guidance(self, repo_data: Dict[str, Any], project_type: str, 
                                      tech_stack: List[str], architecture: str, 
-                                     key_features: List[str]) -> str:
-        """Generate detailed MVP guidance using AI analysis."""
+                                     key_features: List[str],
+                                     on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate detailed MVP guidance using AI analysis.
+        
+        If on_token is given the completion is streamed and each delta is passed
+        to it as it arrives.
+        """
         context = {
             'repo_name': repo_data.get('name', ''),
             'project_type': project_type,
@@ -253,7 +374,14 @@ class AIEnhancedGenerator:
         
         try:
             prompt = self._render_template(adapted_prompt, context)
-            response = self.ai_client.generate_text(prompt)
+            if on_token is None:
+                response = self.ai_client.generate_text(prompt, template="MVP_GUIDANCE_PROMPT")
+            else:
+                chunks = []
+                for delta in self.ai_client.stream_text(prompt, template="MVP_GUIDANCE_PROMPT"):
+                    chunks.append(delta)
+                    on_token(delta)
+                response = "".join(chunks).strip()
             # Filter out placeholder responses
             if response and "placeholder" not in response.lower() and "___________" not in response:
                 return response
@@ -261,6 +389,7 @@ class AIEnhancedGenerator:
             pass
         return ""
     
+    @performance_metrics.timed("generator.format")
     def _generate_final_format(self, repo_url: str, ai_project_type: str, ai_tech_stack: List[str], 
                              ai_architecture: str, ai_key_features: List[str], ai_complexity: str,
                              ai_implementation_steps: List[str]) -> str:
@@ -455,27 +584,82 @@ class AIEnhancedGenerator:
         
         return output
     
-    def generate_prompt(self, repo_data: Dict[str, Any], repo_url: str) -> str:
-        """Generate enhanced MVP prompt using AI analysis in the exact specified format."""
-        # Get AI-enhanced components
-        project_type = self.determine_project_type(repo_data)
-        tech_stack = self.determine_tech_stack(repo_data)
-        architecture = self.determine_architecture(repo_data)
-        key_features = self.identify_key_features(repo_data)
-        complexity = self.determine_complexity_level(repo_data)
-        
-        # Generate implementation steps
-        implementation_steps = self.generate_implementation_steps(
-            repo_data, project_type, tech_stack, architecture, key_features)
-        
-        # Generate detailed MVP guidance
-        detailed_guidance = self.generate_detailed_mvp_guidance(
-            repo_data, project_type, tech_stack, architecture, key_features)
-        # Store it for use in _generate_final_format
-        self._detailed_mvp_guidance = detailed_guidance
+    def _run_stages(self, repo_data: Dict[str, Any], resolved: Optional[Dict[str, Any]] = None,
+                    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Run the generation stages, skipping any whose result is already resolved."""
+        resolved = resolved or {}
+        if on_event is not None:
+            def on_section(name, result):
+                on_event("section", {"section": name, "value": result})
+            
+            def on_token(delta):
+                on_event("token", {"section": "mvp_guidance", "text": delta})
+        else:
+            on_section, on_token = None, None
+        
+        def stage(name, func):
+            if name in resolved:
+                return lambda **inputs: resolved[name]
+            return func
+        
+        # The five analysis stages are independent of each other; implementation
+        # steps and MVP guidance start as soon as the stages they need complete.
+        dependent_inputs = ["project_type", "tech_stack", "architecture", "key_features"]
+        scheduler = StageScheduler(max_workers=AI_STAGE_CONCURRENCY, on_stage_complete=on_section)
+        scheduler.add_stage("project_type", stage("project_type", lambda: self.determine_project_type(repo_data)))
+        scheduler.add_stage("tech_stack", stage("tech_stack", lambda: self.determine_tech_stack(repo_data)))
+        scheduler.add_stage("architecture", stage("architecture", lambda: self.determine_architecture(repo_data)))
+        scheduler.add_stage("key_features", stage("key_features", lambda: self.identify_key_features(repo_data)))
+        scheduler.add_stage("complexity", stage("complexity", lambda: self.determine_complexity_level(repo_data)))
+        scheduler.add_stage(
+            "implementation_steps",
+            stage("implementation_steps",
+                  lambda **inputs: self.generate_implementation_steps(repo_data, **inputs)),
+            depends_on=dependent_inputs)
+        scheduler.add_stage(
+            "mvp_guidance",
+            stage("mvp_guidance",
+                  lambda **inputs: self.generate_detailed_mvp_guidance(repo_data, on_token=on_token, **inputs)),
+            depends_on=dependent_inputs)
+        
+        results = scheduler.run()
+        self.stage_timings = {
+            name: timing for name, timing in scheduler.timings.items() if name not in resolved
+        }
+        return results
+    
+    def generate_prompt(self, repo_data: Dict[str, Any], repo_url: str,
+                        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> str:
+        """Generate enhanced MVP prompt using AI analysis in the exact specified format.
+        
+        If on_event is given it is called with ("section", {"section", "value"})
+        as each section resolves, and with ("token", {"section", "text"}) for
+        each streamed delta of the MVP guidance in staged mode.
+        """
+        # Attribute this generation's token usage to the repository
+        self.ai_client.usage_repo = repo_key(repo_url)
+        if self.mode == "fused":
+            # One JSON completion for every section; any field that fails
+            # validation falls back to its own staged completion.
+            fused_start = time.perf_counter()
+            resolved = self.generate_fused_sections(repo_data)
+            fused_duration = time.perf_counter() - fused_start
+            results = self._run_stages(repo_data, resolved, on_event)
+            # Fallback stages ran after the fused call, so offset their timings
+            for timing in self.stage_timings.values():
+                timing["start"] += fused_duration
+                timing["end"] += fused_duration
+            self.stage_timings["fused_generation"] = {
+                "start": 0.0, "end": fused_duration, "duration": fused_duration
+            }
+        else:
+            results = self._run_stages(repo_data, on_event=on_event)
+        
+        # Store the guidance for use in _generate_final_format
+        self._detailed_mvp_guidance = results["mvp_guidance"]
         
         # Format the output in the exact specified format
         return self._generate_final_format(
-            repo_url, project_type, tech_stack, architecture, 
-            key_features, complexity, implementation_steps
-        )
\ No newline at end of file
+            repo_url, results["project_type"], results["tech_stack"], results["architecture"],
+            results["key_features"], results["complexity"], results["implementation_steps"]
+        )
@@ -1,8 +1,9 @@
 """Groq provider implementation for the GitHub MVP Generator."""
 
 import os
-from groq import Groq
-from ai.client import AIProvider
+from typing import AsyncIterator, Iterator
+from groq import Groq, AsyncGroq
+from ai.client import AIProvider, report_usage
 
 
 class GroqProvider(AIProvider):
@@ -14,26 +15,63 @@ class GroqProvider(AIProvider):
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable not set")
         
+        self.api_key = api_key
         self.client = Groq(api_key=api_key)
+        # The async client is created on first use so sync-only callers never open it
+        self._async_client = None
         # Use the specified model or default to openai/gpt-oss-120b
         self.model = os.getenv('GROQ_MODEL', 'openai/gpt-oss-120b')
     
-    def generate_text(self, prompt: str, **kwargs) -> str:
-        """Generate text using Groq's API."""
+    def _build_params(self, prompt: str, **kwargs) -> dict:
+        """Build chat completion parameters for a prompt."""
         # Default parameters
         params = {
             'model': self.model,
             'messages': [{'role': 'user', 'content': prompt}],
-            'temperature': 0.7,
-            'max_tokens': 1000,
+            **self.default_params,
         }
         
         # Override with any provided parameters
         params.update(kwargs)
-        
-        response = self.client.chat.completions.create(**params)
+        return params
+    
+    @property
+    def async_client(self) -> AsyncGroq:
+        """Get the async client, creating it on first use."""
+        if self._async_client is None:
+            self._async_client = AsyncGroq(api_key=self.api_key)
+        return self._async_client
+    
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        """Generate text using Groq's API."""
+        response = self.client.chat.completions.create(**self._build_params(prompt, **kwargs))
+        report_usage(getattr(response, 'usage', None))
         return response.choices[0].message.content.strip()
     
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Stream text deltas from Groq's API as they are generated."""
+        stream = self.client.chat.completions.create(stream=True, **self._build_params(prompt, **kwargs))
+        for chunk in stream:
+            # Groq reports usage in the x_groq extension of the final chunk
+            report_usage(getattr(getattr(chunk, 'x_groq', None), 'usage', None))
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        """Generate text asynchronously using Groq's API."""
+        response = await self.async_client.chat.completions.create(**self._build_params(prompt, **kwargs))
+        report_usage(getattr(response, 'usage', None))
+        return response.choices[0].message.content.strip()
+    
+    async def astream_text(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Stream text deltas asynchronously from Groq's API as they are generated."""
+        stream = await self.async_client.chat.completions.create(stream=True, **self._build_params(prompt, **kwargs))
+        async for chunk in stream:
+            # Groq reports usage in the x_groq extension of the final chunk
+            report_usage(getattr(getattr(chunk, 'x_groq', None), 'usage', None))
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
     def get_model_name(self) -> str:
         """Get the name of the model being used."""
         return self.model
\ No newline at end of file
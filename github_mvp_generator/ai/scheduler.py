@@ -0,0 +1,112 @@
+"""Stage scheduler for running AI generation stages as a dependency graph."""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Callable, Optional
+
+
+class Stage:
+    """A named unit of work that may depend on the results of other stages."""
+
+    def __init__(self, name: str, func: Callable[..., Any], depends_on: Optional[List[str]] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on or [])
+
+
+class StageScheduler:
+    """Runs stages concurrently, starting each one as soon as its inputs are ready.
+
+    Each stage function is called with the results of its dependencies as
+    keyword arguments, so independent stages run in parallel and dependent
+    stages start the moment the last of their inputs completes.
+    """
+
+    def __init__(self, max_workers: int = 5,
+                 on_stage_complete: Optional[Callable[[str, Any], None]] = None):
+        self.max_workers = max(1, max_workers)
+        # Called from the thread running run() with (name, result) as each stage finishes
+        self.on_stage_complete = on_stage_complete
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.total_time = 0.0
+
+    def add_stage(self, name: str, func: Callable[..., Any], depends_on: Optional[List[str]] = None):
+        """Register a stage and the names of the stages it depends on."""
+        if name in self.stages:
+            raise ValueError(f"Stage already registered: {name}")
+        self.stages[name] = Stage(name, func, depends_on)
+
+    def _validate(self):
+        """Check that every dependency exists and that the graph has no cycles."""
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependency cycle detected at '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _run_stage(self, stage: Stage, run_start: float, inputs: Dict[str, Any]) -> Any:
+        """Run a single stage and record when it started and how long it took."""
+        start = time.perf_counter()
+        try:
+            return stage.func(**inputs)
+        finally:
+            end = time.perf_counter()
+            self.timings[stage.name] = {
+                "start": start - run_start,
+                "end": end - run_start,
+                "duration": end - start
+            }
+
+    def run(self) -> Dict[str, Any]:
+        """Run all stages and return a dict mapping stage names to results."""
+        self._validate()
+        self.timings = {}
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running = {}
+        run_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Submit every stage whose dependencies have all completed
+                for name, stage in list(pending.items()):
+                    if all(dependency in results for dependency in stage.depends_on):
+                        inputs = {dependency: results[dependency] for dependency in stage.depends_on}
+                        # Each stage runs in a copy of the caller's context so spans nest under it
+                        future = executor.submit(contextvars.copy_context().run,
+                                                 self._run_stage, stage, run_start, inputs)
+                        running[future] = name
+                        del pending[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for other in running:
+                            other.cancel()
+                        self.total_time = time.perf_counter() - run_start
+                        raise error
+                    results[name] = future.result()
+                    if self.on_stage_complete is not None:
+                        self.on_stage_complete(name, results[name])
+
+        self.total_time = time.perf_counter() - run_start
+        return results
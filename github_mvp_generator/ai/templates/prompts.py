@@ -209,3 +209,42 @@ Extra Outputs (Detailed):
 - CI/CD UPGRADES: 6-8 steps to enhance workflow (reference specific workflow paths)
 - PERFORMANCE OPTIMIZATIONS: 4-6 repo-specific optimizations to implement
 """
+
+FUSED_GENERATION_PROMPT = """
+Role: Expert software consultant. Analyze the repository below and produce a complete, repo-specific MVP plan in a single JSON object.
+
+Repository Context:
+Repository Name: {{repo_name}}
+Primary Language: {{language}}
+Frameworks Detected: {{frameworks}}
+Description: {{description}}
+Stars: {{stars}}
+Forks: {{forks}}
+
+File Structure:
+{% for item in contents %}
+- {{ item.name }}
+{% endfor %}
+
+Analysis Steps:
+1. Classify the PROJECT TYPE from the language, frameworks, name, description and files.
+2. Enumerate the TECH STACK (languages, frameworks, libraries, storage, tooling).
+3. Summarize the ARCHITECTURE in one sentence (pattern, components, data flow).
+4. Extract 3–5 KEY FEATURES, each as "Feature - explanation".
+5. Choose a COMPLEXITY LEVEL: "Beginner", "Beginner to Intermediate", "Intermediate", "Intermediate to Advanced" or "Advanced".
+6. Write detailed MVP GUIDANCE: 6-8 repo-specific sections referencing exact files, commands and pitfalls.
+7. List 8-12 concrete IMPLEMENTATION STEPS in build order.
+
+Output Requirements:
+- Respond with ONLY a JSON object, no markdown fences and no commentary.
+- Use exactly these keys and types:
+{
+  "project_type": "string",
+  "tech_stack": ["string", "..."],
+  "architecture": "string",
+  "features": ["string", "..."],
+  "complexity": "string",
+  "guidance": "string",
+  "steps": ["string", "..."]
+}
+"""
@@ -0,0 +1,86 @@
+"""Registry of precompiled Jinja2 prompt templates."""
+
+import os
+import threading
+from typing import Dict, Any, Optional
+from jinja2 import Environment, DictLoader, FileSystemBytecodeCache, Template
+
+from ai.templates import prompts
+from config import TEMPLATE_CACHE_DIR
+
+
+def load_prompt_templates() -> Dict[str, str]:
+    """Collect every *_PROMPT template defined in ai/templates/prompts.py."""
+    return {
+        name: value for name, value in vars(prompts).items()
+        if name.endswith('_PROMPT') and isinstance(value, str)
+    }
+
+
+class TemplateRegistry:
+    """Compiles prompt templates once and serves them by name or source text.
+    
+    Templates from prompts.py are compiled through a shared Environment at
+    startup. Adapted variants (prompts rewritten by the adaptive prompt system)
+    are compiled the first time they are seen and reused afterwards.
+    """
+    
+    def __init__(self, templates: Dict[str, str], bytecode_cache_dir: Optional[str] = TEMPLATE_CACHE_DIR):
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            if bytecode_cache_dir:
+                os.makedirs(bytecode_cache_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+            else:
+                # Empty string means the system temporary directory
+                bytecode_cache = FileSystemBytecodeCache()
+        
+        self.environment = Environment(
+            loader=DictLoader(dict(templates)),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False
+        )
+        self._templates = dict(templates)
+        self._by_source: Dict[str, Template] = {}
+        self._lock = threading.Lock()
+        self.compile_all()
+    
+    def compile_all(self):
+        """Compile every registered template."""
+        for name, source in self._templates.items():
+            self._by_source[source] = self.environment.get_template(name)
+    
+    def register_variant(self, template_str: str) -> Template:
+        """Compile an adapted template variant unless it is already known."""
+        template = self._by_source.get(template_str)
+        if template is None:
+            with self._lock:
+                template = self._by_source.get(template_str)
+                if template is None:
+                    template = self.environment.from_string(template_str)
+                    self._by_source[template_str] = template
+        return template
+    
+    def get_template(self, name: str) -> Template:
+        """Get a compiled template by its name in prompts.py."""
+        return self._by_source[self._templates[name]]
+    
+    def render(self, template_str: str, context: Dict[str, Any]) -> str:
+        """Render a template, compiling it only if it hasn't been seen before."""
+        return self.register_variant(template_str).render(context)
+
+
+def _build_template_registry() -> TemplateRegistry:
+    """Build the global registry and precompile any stored adapted prompts."""
+    registry = TemplateRegistry(load_prompt_templates())
+    
+    from adaptive_prompt import adaptive_prompt_system
+    for pattern in adaptive_prompt_system.get_success_patterns(limit=None):
+        prompt = pattern["data"].get("prompt")
+        if isinstance(prompt, str):
+            registry.register_variant(prompt)
+    return registry
+
+
+# Global template registry instance
+template_registry = _build_template_registry()
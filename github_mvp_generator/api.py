@@ -1,14 +1,23 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from github_parser.analyzer import GitHubRepoAnalyzer
-from ai.generator import AIEnhancedGenerator
-from config import GITHUB_TOKEN, AI_PROVIDER
+from ai.generator import GENERATION_MODES
+from config import GITHUB_TOKEN, AI_PROVIDER, AI_GENERATION_MODE, JOB_MAX_BATCH_SIZE
 from feedback import feedback_system
 from user_preferences import user_preferences
 from knowledge_base import knowledge_base
 from performance_metrics import performance_metrics
+from ai.cache import response_cache
+from github_parser.http_cache import github_http_cache
+from github_parser.freshness import refresh_queue
+from jobs import job_queue
+from metrics_export import CONTENT_TYPE as OPENMETRICS_CONTENT_TYPE, collect_process_stats, render_openmetrics
+from pipeline import generate_for_repo, stream_for_repo
+from singleflight import analysis_flight, generation_flight
+import json
 import os
+import queue
 import sys
+import threading
 import time
 
 # Add the project root to the Python path
@@ -17,14 +26,27 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Each worker saves its cache and queue stats with its metrics so /metrics can report on all of them
+performance_metrics.set_process_stats_collector(collect_process_stats)
+
+@app.after_request
+def count_request(response):
+    """Count every request by endpoint and status for /metrics"""
+    performance_metrics.record_request(request.endpoint or "unmatched", response.status_code)
+    return response
+
 @app.route('/')
 def home():
     return jsonify({
         "message": "GitHub MVP Generator API",
         "endpoints": {
             "generate_mvp": "POST /api/generate",
+            "generate_stream": "GET|POST /api/generate/stream",
+            "generate_batch": "POST /api/generate/batch",
+            "get_job": "GET /api/jobs/<job_id>",
             "submit_feedback": "POST /api/feedback",
             "get_stats": "GET /api/stats",
+            "metrics": "GET /metrics",
             "get_preferences": "GET /api/preferences"
         }
     })
@@ -40,36 +62,124 @@ def generate_mvp():
     repo_url = data['repo_url']
     provider = data.get('provider', AI_PROVIDER)
     github_token = data.get('token', GITHUB_TOKEN)
+    mode = data.get('mode', AI_GENERATION_MODE)
+    if mode not in GENERATION_MODES:
+        return jsonify({"error": f"mode must be one of: {', '.join(GENERATION_MODES)}"}), 400
     
     try:
-        # Start performance tracking
-        operation = performance_metrics.start_operation("mvp_generation", provider)
-        
-        # Initialize analyzer
-        analyzer = GitHubRepoAnalyzer(github_token)
-        
-        # Analyze the repository
-        repo_data = analyzer.analyze_repo(repo_url)
-        
-        # Generate MVP prompt
-        ai_generator = AIEnhancedGenerator(provider)
-        prompt = ai_generator.generate_prompt(repo_data, repo_url)
+        # Concurrent requests for the same repository share one analysis and generation
+        result = generate_for_repo(repo_url, provider, github_token, mode)
         
-        # End performance tracking
-        performance_metrics.end_operation(operation, success=True)
-        
-        return jsonify({
+        response = {
             "repo_url": repo_url,
-            "prompt": prompt,
+            "prompt": result["prompt"],
             "provider": provider
-        })
+        }
+        if data.get('include_timings'):
+            # Span tree of where the time went: GitHub requests, each stage, cache lookups, formatting
+            response["timings"] = result["timings"]
+        return jsonify(response)
         
     except Exception as e:
-        # End performance tracking with error
-        if 'operation' in locals():
-            performance_metrics.end_operation(operation, success=False, error=str(e))
         return jsonify({"error": str(e)}), 500
 
+def _sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/generate/stream', methods=['GET', 'POST'])
+def generate_mvp_stream():
+    """Generate an MVP prompt, streaming each section as a Server-Sent Event as it resolves"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        github_token = data.get('token', GITHUB_TOKEN)
+    else:
+        # Tokens are only accepted in a POST body so they never end up in URLs or access logs
+        data = request.args
+        github_token = GITHUB_TOKEN
+    
+    repo_url = data.get('repo_url')
+    if not repo_url:
+        return jsonify({"error": "repo_url is required"}), 400
+    provider = data.get('provider', AI_PROVIDER)
+    mode = data.get('mode', AI_GENERATION_MODE)
+    if mode not in GENERATION_MODES:
+        return jsonify({"error": f"mode must be one of: {', '.join(GENERATION_MODES)}"}), 400
+    
+    # The pipeline runs on its own thread and hands events to the response as they happen
+    events = queue.Queue()
+    
+    def run():
+        try:
+            result = stream_for_repo(repo_url, provider, github_token, mode,
+                                     on_event=lambda event, payload: events.put((event, payload)))
+            events.put(("complete", {
+                "repo_url": repo_url,
+                "prompt": result["prompt"],
+                "provider": provider,
+                "stage_timings": result["stage_timings"],
+                "duration": result["duration"]
+            }))
+        except Exception as e:
+            events.put(("error", {"error": str(e)}))
+        finally:
+            events.put(None)
+    
+    threading.Thread(target=run, name="generate-stream", daemon=True).start()
+    
+    def stream():
+        yield _sse_event("start", {"repo_url": repo_url, "provider": provider, "mode": mode})
+        while True:
+            item = events.get()
+            if item is None:
+                return
+            yield _sse_event(*item)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # Stop reverse proxies from buffering the stream
+    })
+
+@app.route('/api/generate/batch', methods=['POST'])
+def generate_mvp_batch():
+    """Queue MVP prompt generation for a list of GitHub repositories"""
+    data = request.get_json()
+    
+    if not data or 'repo_urls' not in data:
+        return jsonify({"error": "repo_urls is required"}), 400
+    
+    repo_urls = data['repo_urls']
+    if not isinstance(repo_urls, list) or not repo_urls or not all(isinstance(url, str) and url for url in repo_urls):
+        return jsonify({"error": "repo_urls must be a non-empty list of URLs"}), 400
+    if len(repo_urls) > JOB_MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {JOB_MAX_BATCH_SIZE} repositories can be submitted per job"}), 400
+    
+    provider = data.get('provider', AI_PROVIDER)
+    github_token = data.get('token', GITHUB_TOKEN)
+    mode = data.get('mode', AI_GENERATION_MODE)
+    if mode not in GENERATION_MODES:
+        return jsonify({"error": f"mode must be one of: {', '.join(GENERATION_MODES)}"}), 400
+    
+    try:
+        job = job_queue.submit(repo_urls, provider, github_token, mode)
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status,
+            "total": len(job.tasks),
+            "status_url": f"/api/jobs/{job.id}"
+        }), 202
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status and results of a bulk generation job"""
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
 @app.route('/api/feedback', methods=['POST'])
 def submit_feedback():
     """Submit feedback for a generated prompt"""
@@ -109,6 +219,14 @@ def get_stats():
             "performance": perf_summary,
             "knowledge_base": kb_stats,
             "feedback": feedback_summary,
+            "llm_cache": response_cache.get_stats(),
+            "github_http_cache": github_http_cache.get_stats(),
+            "repo_refresh": refresh_queue.get_stats(),
+            "jobs": job_queue.get_stats(),
+            "coalescing": {
+                "analysis": analysis_flight.get_stats(),
+                "generation": generation_flight.get_stats()
+            },
             "preferences": {
                 "default_provider": prefs.get('default_provider'),
                 "usage_count": prefs.get('usage_count', 0),
@@ -120,6 +238,11 @@ def get_stats():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose metrics aggregated across workers in OpenMetrics text format"""
+    return Response(render_openmetrics(performance_metrics.get_snapshot()), mimetype=OPENMETRICS_CONTENT_TYPE)
+
 @app.route('/api/preferences', methods=['GET'])
 def get_preferences():
     """Get user preferences"""
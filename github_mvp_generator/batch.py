@@ -0,0 +1,180 @@
+"""Batch generation of MVP prompts for many repositories in one process."""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Set
+
+from config import GITHUB_TOKEN, AI_GENERATION_MODE, BATCH_GITHUB_CONCURRENCY, BATCH_LLM_CONCURRENCY
+from ai.client import set_llm_concurrency
+from github_parser.repo_id import repo_key
+from pipeline import analyze_repository, generate_for_repo
+
+
+def load_repo_urls(batch_file: str) -> List[str]:
+    """Read repository URLs from a file with one URL per line or one JSON object per line.
+
+    JSON lines may be bare strings or objects with a "repo_url" field. Blank
+    lines and lines starting with '#' are ignored.
+    """
+    urls = []
+    with open(batch_file, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line[0] in '{"':
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{batch_file}:{line_number}: invalid JSON line: {e}")
+                url = entry.get('repo_url') if isinstance(entry, dict) else entry
+                if not isinstance(url, str) or not url:
+                    raise ValueError(f"{batch_file}:{line_number}: missing repo_url")
+                urls.append(url)
+            else:
+                urls.append(line)
+    return urls
+
+
+def load_completed(output_file: str) -> Set[str]:
+    """Get the repository keys that already have a successful result in an output file."""
+    completed = set()
+    if not os.path.exists(output_file):
+        return completed
+    with open(output_file, 'r') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+            if isinstance(result, dict) and result.get('status') == 'ok':
+                completed.add(result.get('repo_id') or repo_key(result.get('repo_url', '')))
+    return completed
+
+
+def drop_torn_tail(output_file: str):
+    """Truncate an output file to its last complete line.
+
+    A run killed mid-write leaves a partial last record; appending onto it
+    would glue the next record to the fragment and lose both. The torn
+    record's repository isn't in load_completed, so it is simply retried.
+    """
+    try:
+        with open(output_file, 'r+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                step = min(4096, position)
+                f.seek(position - step)
+                newline = f.read(step).rfind(b"\n")
+                if newline >= 0:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            if position < end:
+                f.truncate(position)
+    except FileNotFoundError:
+        pass
+
+
+class BatchRunner:
+    """Generates prompts for a list of repositories with bounded concurrency.
+
+    GitHub analysis and LLM calls are throttled independently: at most
+    github_concurrency repositories are being analyzed at once, and at most
+    llm_concurrency provider calls are in flight across all generations.
+    Each result is appended to the output file as one JSON line as soon as it
+    completes, so the file doubles as the checkpoint for --resume.
+    """
+
+    def __init__(self, provider: str, github_token: Optional[str] = None, mode: str = AI_GENERATION_MODE,
+                 github_concurrency: int = BATCH_GITHUB_CONCURRENCY,
+                 llm_concurrency: int = BATCH_LLM_CONCURRENCY):
+        self.provider = provider
+        self.github_token = github_token or GITHUB_TOKEN
+        self.mode = mode
+        self.github_concurrency = max(1, github_concurrency)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self._github_slots = threading.BoundedSemaphore(self.github_concurrency)
+        self._output_lock = threading.Lock()
+        self.stats = {"total": 0, "succeeded": 0, "failed": 0, "skipped": 0}
+        self._durations: List[float] = []
+
+    def _process(self, repo_url: str) -> Dict[str, Any]:
+        """Analyze and generate a single repository, capturing any failure in the result."""
+        start = time.perf_counter()
+        try:
+            with self._github_slots:
+                repo_data = analyze_repository(repo_url, self.github_token)
+            result = generate_for_repo(repo_url, self.provider, self.github_token, self.mode, repo_data=repo_data)
+            result["status"] = "ok"
+            result["duration"] = time.perf_counter() - start
+        except Exception as e:
+            result = {
+                "repo_url": repo_url,
+                "repo_id": repo_key(repo_url),
+                "provider": self.provider,
+                "status": "error",
+                "error": str(e),
+                "duration": time.perf_counter() - start
+            }
+        return result
+
+    def _record(self, output, result: Dict[str, Any]):
+        """Append a result to the output stream and update the counters."""
+        with self._output_lock:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            self._durations.append(result["duration"])
+            if result["status"] == "ok":
+                self.stats["succeeded"] += 1
+            else:
+                self.stats["failed"] += 1
+            done = self.stats["succeeded"] + self.stats["failed"]
+            pending = self.stats["total"] - self.stats["skipped"]
+        print(f"[{done}/{pending}] {result['status']}: {result['repo_url']} ({result['duration']:.2f}s)")
+
+    def run(self, repo_urls: List[str], output_file: str, resume: bool = False) -> Dict[str, Any]:
+        """Process every repository and return a throughput summary."""
+        completed = set()
+        if resume:
+            drop_torn_tail(output_file)
+            completed = load_completed(output_file)
+
+        # Drop duplicates and repositories finished by a previous run
+        queue, seen = [], set()
+        for url in repo_urls:
+            key = repo_key(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            if key in completed:
+                self.stats["skipped"] += 1
+            else:
+                queue.append(url)
+        self.stats["total"] = len(seen)
+
+        set_llm_concurrency(self.llm_concurrency)
+        start = time.perf_counter()
+        try:
+            with open(output_file, 'a' if resume else 'w') as output:
+                # Enough workers to keep both the GitHub and the LLM side saturated
+                with ThreadPoolExecutor(max_workers=self.github_concurrency + self.llm_concurrency) as executor:
+                    futures = [executor.submit(self._process, url) for url in queue]
+                    for future in as_completed(futures):
+                        self._record(output, future.result())
+        finally:
+            set_llm_concurrency(None)
+        elapsed = time.perf_counter() - start
+
+        processed = self.stats["succeeded"] + self.stats["failed"]
+        summary = dict(self.stats)
+        summary["elapsed"] = elapsed
+        summary["throughput_per_minute"] = processed / elapsed * 60 if elapsed > 0 else 0.0
+        summary["average_latency"] = sum(self._durations) / len(self._durations) if self._durations else 0.0
+        summary["output_file"] = output_file
+        return summary
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: feedback stats and per-repo lookups by scanning every entry
+(the old feedback.json behaviour) versus the log's running counters and
+per-repo offset index.
+
+Usage:
+    python benchmarks/bench_feedback.py [ENTRIES] [REPOS]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedback import FeedbackSystem
+from github_parser.repo_id import repo_key
+
+
+def write_log(path, entries, repos):
+    """Write a synthetic feedback log and return the entries as a list."""
+    rng = random.Random(42)
+    data = []
+    with open(path, 'w') as f:
+        for i in range(entries):
+            entry = {
+                "timestamp": "2025-09-08T11:46:37.712826",
+                "repo_url": f"https://github.com/owner{i % repos}/repo",
+                "rating": rng.randint(1, 5),
+                "comments": "Good structure",
+                "improvements": ""
+            }
+            data.append(entry)
+            f.write(json.dumps(entry) + "\n")
+    return data
+
+
+def scan_summary(entries):
+    """The previous get_feedback_summary: several passes over every entry."""
+    ratings = [entry["rating"] for entry in entries]
+    return {
+        "total_feedback": len(entries),
+        "average_rating": sum(entry["rating"] for entry in entries) / len(entries),
+        "rating_distribution": {i: ratings.count(i) for i in range(1, 6)},
+        "recent_feedback": entries[-5:]
+    }
+
+
+def scan_repo(entries, repo_url):
+    """The previous get_feedback_for_repo: canonicalize and compare every entry."""
+    key = repo_key(repo_url)
+    return [entry for entry in entries if repo_key(entry["repo_url"]) == key]
+
+
+def bench(label, func, calls):
+    start = time.perf_counter()
+    with mock.patch('builtins.print'):
+        for _ in range(calls):
+            func()
+    elapsed = (time.perf_counter() - start) / calls
+    print(f"{label:<32} {elapsed * 1000:12.3f} ms/call")
+    return elapsed
+
+
+if __name__ == '__main__':
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repos = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    target = "https://github.com/owner7/repo"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, 'feedback.jsonl')
+        print(f"Writing {entries:,} entries across {repos:,} repositories...")
+        data = write_log(log_file, entries, repos)
+
+        start = time.perf_counter()
+        with mock.patch('builtins.print'):
+            feedback = FeedbackSystem(os.path.join(tmp, 'feedback.json'), log_file=log_file)
+        print(f"Startup (rebuild aggregates from log): {time.perf_counter() - start:.2f} s")
+
+        assert feedback.get_feedback_summary()["rating_distribution"] == scan_summary(data)["rating_distribution"]
+        assert feedback.get_feedback_for_repo(target) == scan_repo(data, target)
+
+        print("\nStats (/api/stats calls this on every request)")
+        scanned = bench("Scan all entries", lambda: scan_summary(data), 3)
+        counted = bench("Running counters", feedback.get_feedback_summary, 1000)
+        print(f"Speedup: {scanned / counted:,.0f}x")
+
+        print(f"\nPer-repo lookup ({entries // repos} entries for the repository)")
+        scanned = bench("Scan all entries", lambda: scan_repo(data, target), 1)
+        indexed = bench("Offset index", lambda: feedback.get_feedback_for_repo(target), 1000)
+        print(f"Speedup: {scanned / indexed:,.0f}x")
+
+        print()
+        bench("Submit (append one line)", lambda: feedback.submit_feedback(target, 4), 200)
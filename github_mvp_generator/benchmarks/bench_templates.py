@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark: per-request prompt rendering with Template() per call
+versus the precompiled template registry.
+
+Usage:
+    python benchmarks/bench_templates.py [REQUESTS]
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jinja2 import Template
+from ai.templates.registry import TemplateRegistry, load_prompt_templates
+
+# The seven templates rendered for every staged generation
+STAGE_TEMPLATES = [
+    "PROJECT_TYPE_PROMPT",
+    "TECH_STACK_PROMPT",
+    "ARCHITECTURE_PROMPT",
+    "FEATURES_PROMPT",
+    "COMPLEXITY_PROMPT",
+    "IMPLEMENTATION_STEPS_PROMPT",
+    "MVP_GUIDANCE_PROMPT",
+]
+
+CONTEXT = {
+    'repo_name': 'react',
+    'language': 'JavaScript',
+    'frameworks': 'React',
+    'description': 'A declarative, efficient, and flexible JavaScript library for building user interfaces.',
+    'contents': [{'name': name} for name in ['package.json', 'README.md', 'src', 'scripts', 'fixtures']],
+    'stars': 200000,
+    'forks': 40000,
+    'project_type': 'UI Library',
+    'tech_stack': 'JavaScript, React',
+    'architecture': 'Component-based library.',
+    'features': ['Components', 'Hooks', 'JSX'],
+}
+
+
+def bench(label, render, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        for source in sources:
+            render(source)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed / requests * 1000:8.3f} ms/request")
+    return elapsed
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    templates = load_prompt_templates()
+    sources = [templates[name] for name in STAGE_TEMPLATES]
+
+    startup = time.perf_counter()
+    registry = TemplateRegistry(templates, bytecode_cache_dir=None)
+    print(f"Registry startup (compile {len(templates)} templates): {(time.perf_counter() - startup) * 1000:.3f} ms")
+
+    uncached = bench("Template() per call", lambda source: Template(source).render(CONTEXT), requests)
+    cached = bench("Template registry", lambda source: registry.render(source, CONTEXT), requests)
+    print(f"Speedup: {uncached / cached:.1f}x")
@@ -20,6 +20,6 @@ pip install --upgrade pip
 
 # Install Python dependencies directly
 echo "Installing Python dependencies..."
-pip install requests==2.31.0 pygithub==2.1.1 python-dotenv==1.0.0 jinja2==3.1.2 openai==1.106.1 groq==0.13.1 flask==2.3.2 flask-cors==4.0.0
+pip install requests==2.31.0 pygithub==2.1.1 python-dotenv==1.0.0 jinja2==3.1.2 openai==1.106.1 groq==0.13.1 flask==2.3.2 flask-cors==4.0.0 gunicorn==21.2.0
 
 echo "Backend build completed successfully."
\ No newline at end of file
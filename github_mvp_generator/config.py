@@ -7,6 +7,9 @@ load_dotenv()
 # GitHub API configuration
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 GITHUB_API_URL = 'https://api.github.com'
+GITHUB_GRAPHQL_URL = os.getenv('GITHUB_GRAPHQL_URL', 'https://api.github.com/graphql')
+# Fetch repo metadata with a single GraphQL query when a token is available
+GITHUB_USE_GRAPHQL = os.getenv('GITHUB_USE_GRAPHQL', 'true').lower() in ('1', 'true', 'yes')
 
 # AI Configuration
 AI_PROVIDER = os.getenv('AI_PROVIDER', 'groq')  # 'openai' or 'groq'
@@ -18,4 +21,75 @@ OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
 
 # Groq Configuration
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
-GROQ_MODEL = os.getenv('GROQ_MODEL', 'openai/gpt-oss-120b')
\ No newline at end of file
+GROQ_MODEL = os.getenv('GROQ_MODEL', 'openai/gpt-oss-120b')
+
+# Generation pipeline configuration
+# Maximum number of AI stages that may run concurrently for a single generation
+AI_STAGE_CONCURRENCY = int(os.getenv('AI_STAGE_CONCURRENCY', '5'))
+
+# Generation mode: 'staged' runs one completion per prompt section,
+# 'fused' asks for every section in a single JSON completion
+AI_GENERATION_MODE = os.getenv('AI_GENERATION_MODE', 'staged')
+AI_FUSED_MAX_TOKENS = int(os.getenv('AI_FUSED_MAX_TOKENS', '4000'))
+
+# Token pricing for cost accounting, as JSON mapping a model (or "provider/model")
+# to USD per million tokens, e.g. {"gpt-4o-mini": {"prompt": 0.15, "completion": 0.6}}
+LLM_PRICING = os.getenv('LLM_PRICING', '{}')
+
+# AI response cache configuration
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', '.llm_cache')
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1000'))  # memory tier size
+LLM_CACHE_SWEEP_INTERVAL = int(os.getenv('LLM_CACHE_SWEEP_INTERVAL', '3600'))  # seconds between sweeps of expired entries (0 = off)
+
+# Directory for compiled Jinja2 template bytecode (empty = system temp directory)
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', '')
+
+# GitHub HTTP client configuration
+GITHUB_POOL_SIZE = int(os.getenv('GITHUB_POOL_SIZE', '20'))  # connections kept alive per host
+GITHUB_CONNECT_TIMEOUT = float(os.getenv('GITHUB_CONNECT_TIMEOUT', '5'))  # seconds
+GITHUB_READ_TIMEOUT = float(os.getenv('GITHUB_READ_TIMEOUT', '30'))  # seconds
+GITHUB_MAX_RETRIES = int(os.getenv('GITHUB_MAX_RETRIES', '3'))  # retries on 5xx and connection errors
+GITHUB_RETRY_BACKOFF = float(os.getenv('GITHUB_RETRY_BACKOFF', '0.5'))  # exponential backoff factor
+
+# Conditional-request cache for GitHub API responses (ETag / Last-Modified)
+GITHUB_HTTP_CACHE_ENABLED = os.getenv('GITHUB_HTTP_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+GITHUB_HTTP_CACHE_DIR = os.getenv('GITHUB_HTTP_CACHE_DIR', '.github_http_cache')
+GITHUB_HTTP_CACHE_MAX_ENTRIES = int(os.getenv('GITHUB_HTTP_CACHE_MAX_ENTRIES', '500'))  # memory tier size
+
+# Knowledge base storage: 'sqlite' (indexed, multi-process safe) or 'json' (single file)
+KNOWLEDGE_BACKEND = os.getenv('KNOWLEDGE_BACKEND', 'sqlite')
+KNOWLEDGE_DB_FILE = os.getenv('KNOWLEDGE_DB_FILE', '')  # defaults to knowledge_base.db
+
+# Freshness policy for cached repository analyses (seconds)
+REPO_PATTERN_MAX_AGE = int(os.getenv('REPO_PATTERN_MAX_AGE', str(24 * 3600)))  # served as-is
+REPO_PATTERN_STALE_WINDOW = int(os.getenv('REPO_PATTERN_STALE_WINDOW', str(7 * 24 * 3600)))  # served, refreshed in background
+REPO_PATTERN_SWEEP_INTERVAL = int(os.getenv('REPO_PATTERN_SWEEP_INTERVAL', '3600'))  # bulk eviction of expired entries
+REPO_REFRESH_QUEUE_SIZE = int(os.getenv('REPO_REFRESH_QUEUE_SIZE', '100'))
+
+# Batch generation defaults (main.py --batch)
+BATCH_GITHUB_CONCURRENCY = int(os.getenv('BATCH_GITHUB_CONCURRENCY', '4'))  # repositories analyzed at once
+BATCH_LLM_CONCURRENCY = int(os.getenv('BATCH_LLM_CONCURRENCY', '8'))  # provider calls in flight at once
+
+# Bulk generation job queue (POST /api/generate/batch)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))  # repositories generated at once per process
+JOB_MAX_RETAINED = int(os.getenv('JOB_MAX_RETAINED', '200'))  # finished jobs kept for polling
+JOB_MAX_BATCH_SIZE = int(os.getenv('JOB_MAX_BATCH_SIZE', '100'))  # repositories per job
+JOB_STATE_DIR = os.getenv('JOB_STATE_DIR', '.jobs')  # shared job snapshots for multi-worker polling ('' = memory only)
+
+# Production serving (gunicorn -c gunicorn.conf.py wsgi:application)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))  # worker processes
+WEB_THREADS = int(os.getenv('WEB_THREADS', '8'))  # request threads per worker (SSE streams hold one each)
+WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', '120'))  # seconds before a silent worker is restarted
+
+# Feedback event log (append-only JSONL; feedback.json is imported once if present)
+FEEDBACK_LOG_FILE = os.getenv('FEEDBACK_LOG_FILE', '')  # defaults to feedback.jsonl
+FEEDBACK_MAX_ENTRIES = int(os.getenv('FEEDBACK_MAX_ENTRIES', '0'))  # entries kept by compaction (0 = all)
+FEEDBACK_COMPACT_INTERVAL = int(os.getenv('FEEDBACK_COMPACT_INTERVAL', '3600'))  # minimum seconds between compactions
+
+# Performance metrics recording (performance_metrics.json)
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))  # seconds between background saves
+METRICS_RECENT_OPERATIONS = int(os.getenv('METRICS_RECENT_OPERATIONS', '1000'))  # finished operations kept per session
+METRICS_PROCESS_TTL = float(os.getenv('METRICS_PROCESS_TTL', '60'))  # seconds without a save before a worker's stats expire
+METRICS_TOKEN_REPOS = int(os.getenv('METRICS_TOKEN_REPOS', '100'))  # repositories kept in token usage; the rest are summed together
@@ -2,36 +2,172 @@
 
 import json
 import os
-from typing import Dict, Any
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 
+from config import FEEDBACK_LOG_FILE, FEEDBACK_MAX_ENTRIES, FEEDBACK_COMPACT_INTERVAL
+from file_store import file_lock, read_json
+from github_parser.repo_id import repo_key
+
 
 class FeedbackSystem:
-    """Collects and manages user feedback on generated prompts."""
+    """Collects and manages user feedback on generated prompts.
+    
+    Feedback is stored as an append-only JSONL log. A submission appends one
+    line under a file lock, so its cost doesn't grow with the history and
+    concurrent workers never overwrite each other. Aggregates are rebuilt from
+    the log on startup and kept current by reading only the lines appended
+    since the last read, including those written by other processes.
     
-    def __init__(self, feedback_file: str = "feedback.json"):
+    Entries themselves stay on disk: memory holds running counters (total,
+    rating sum, per-rating histogram), the last few entries and, per
+    repository, the byte offsets of its lines in the log. Stats are constant
+    time and a repository lookup reads only that repository's lines.
+    """
+    
+    def __init__(self, feedback_file: str = "feedback.json", log_file: Optional[str] = None,
+                 max_entries: int = FEEDBACK_MAX_ENTRIES, compact_interval: int = FEEDBACK_COMPACT_INTERVAL):
+        # The legacy whole-file store, imported into the log once
         self.feedback_file = feedback_file
-        self.feedback_data = self._load_feedback()
+        self.log_file = log_file or FEEDBACK_LOG_FILE or f"{os.path.splitext(feedback_file)[0]}.jsonl"
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self._lock = threading.RLock()
+        # Canonical repo key per distinct URL spelling; parsing dominates log replay otherwise
+        self._repo_keys: Dict[str, str] = {}
+        self._last_compaction = time.monotonic()
+        self._migrate_legacy_feedback()
+        self._reset()
+        self._catch_up()
+    
+    def _reset(self):
+        """Clear the aggregates before (re)reading the log from the start."""
+        self._offset = 0
+        self._inode = None
+        self._total = 0
+        self._rating_sum = 0
+        self._histogram = {i: 0 for i in range(1, 6)}
+        self._recent = deque(maxlen=5)
+        # repo key -> log offsets of its entries (or the entry itself if it couldn't be written)
+        self._repo_index: Dict[str, List[Union[int, Dict[str, Any]]]] = {}
+        self._invalid_lines = 0
+    
+    def _migrate_legacy_feedback(self):
+        """Copy entries from the legacy feedback.json into a new log."""
+        if os.path.exists(self.log_file) or not os.path.exists(self.feedback_file):
+            return
+        with file_lock(self.log_file):
+            if os.path.exists(self.log_file):
+                return
+            entries = read_json(self.feedback_file, lambda: {}).get("feedback_entries", [])
+            self._write_log(entries)
+        if entries:
+            print(f"Migrated {len(entries)} feedback entries from {self.feedback_file} to {self.log_file}")
+    
+    def _write_log(self, entries):
+        """Atomically replace the log with the given entries."""
+        tmp_path = f"{self.log_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.log_file)
+    
+    def _apply_entry(self, entry: Dict[str, Any], offset: Optional[int] = None):
+        """Fold one log entry, found at offset in the log, into the in-memory aggregates."""
+        rating = entry.get("rating")
+        if not isinstance(rating, int) or not 1 <= rating <= 5:
+            self._invalid_lines += 1
+            return
+        repo_url = entry.get("repo_url", "")
+        key = self._repo_keys.get(repo_url)
+        if key is None:
+            key = self._repo_keys[repo_url] = repo_key(repo_url)
+        self._repo_index.setdefault(key, []).append(entry if offset is None else offset)
+        self._recent.append(entry)
+        self._total += 1
+        self._rating_sum += rating
+        self._histogram[rating] += 1
     
-    def _load_feedback(self) -> Dict[str, Any]:
-        """Load existing feedback data from file."""
-        if os.path.exists(self.feedback_file):
+    def _catch_up(self):
+        """Apply any lines appended to the log since it was last read."""
+        with self._lock:
             try:
-                with open(self.feedback_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {"feedback_entries": []}
-        return {"feedback_entries": []}
-    
-    def _save_feedback(self):
-        """Save feedback data to file."""
-        try:
-            with open(self.feedback_file, 'w') as f:
-                json.dump(self.feedback_data, f, indent=2)
-        except IOError as e:
-            print(f"Warning: Could not save feedback data: {e}")
+                stat = os.stat(self.log_file)
+            except OSError:
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # The log was compacted or replaced; rebuild from the start
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+            
+            # Read line by line so a cold start over a large log stays in bounded memory
+            with open(self.log_file, 'rb') as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Leave a partially written last line for the next read
+                        break
+                    if line.strip():
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            entry = None
+                        if isinstance(entry, dict):
+                            self._apply_entry(entry, self._offset)
+                        else:
+                            self._invalid_lines += 1
+                    self._offset += len(line)
+    
+    def _iter_log(self):
+        """Yield every valid entry in the log, oldest first."""
+        with open(self.log_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                rating = entry.get("rating") if isinstance(entry, dict) else None
+                if isinstance(rating, int) and 1 <= rating <= 5:
+                    yield entry
+    
+    def _append_entry(self, feedback_entry: Dict[str, Any]):
+        """Append one entry to the log and fold it (and anything new) into the aggregates."""
+        line = (json.dumps(feedback_entry) + "\n").encode('utf-8')
+        with file_lock(self.log_file):
+            with open(self.log_file, 'a+b') as f:
+                size = f.seek(0, os.SEEK_END)
+                if size:
+                    f.seek(size - 1)
+                    if f.read(1) != b"\n":
+                        # Don't glue this entry onto a line torn by a crashed writer
+                        line = b"\n" + line
+                f.write(line)
+        self._catch_up()
+    
+    def _should_compact(self) -> bool:
+        """Check whether the log has garbage or excess entries and compaction is due."""
+        if time.monotonic() - self._last_compaction < self.compact_interval:
+            return False
+        return self._invalid_lines > 0 or (self.max_entries > 0 and self._total > self.max_entries)
     
-    def submit_feedback(self, repo_url: str, rating: int, comments: str = "", 
+    def compact(self):
+        """Rewrite the log without invalid lines, keeping at most max_entries recent entries."""
+        with file_lock(self.log_file):
+            with self._lock:
+                entries = self._iter_log()
+                if self.max_entries > 0:
+                    entries = deque(entries, maxlen=self.max_entries)
+                self._write_log(entries)
+                self._last_compaction = time.monotonic()
+                self._reset()
+                self._catch_up()
+    
+    def submit_feedback(self, repo_url: str, rating: int, comments: str = "",
                        improvements: str = ""):
         """Submit feedback for a generated prompt.
         
@@ -52,44 +188,69 @@ class FeedbackSystem:
             "improvements": improvements
         }
         
-        self.feedback_data["feedback_entries"].append(feedback_entry)
-        self._save_feedback()
+        try:
+            self._append_entry(feedback_entry)
+        except IOError as e:
+            print(f"Warning: Could not save feedback data: {e}")
+            with self._lock:
+                self._apply_entry(feedback_entry)
+        
+        if self._should_compact():
+            try:
+                self.compact()
+            except IOError as e:
+                print(f"Warning: Could not compact feedback log: {e}")
         
         # Print confirmation
         print(f"Feedback submitted for {repo_url} (Rating: {rating}/5)")
     
     def get_average_rating(self) -> float:
         """Calculate the average rating of all feedback."""
-        entries = self.feedback_data["feedback_entries"]
-        if not entries:
-            return 0.0
-        
-        total_rating = sum(entry["rating"] for entry in entries)
-        return total_rating / len(entries)
+        self._catch_up()
+        with self._lock:
+            if not self._total:
+                return 0.0
+            return self._rating_sum / self._total
     
     def get_feedback_summary(self) -> Dict[str, Any]:
         """Get a summary of all feedback."""
-        entries = self.feedback_data["feedback_entries"]
-        if not entries:
-            return {"total_feedback": 0, "average_rating": 0.0}
-        
-        ratings = [entry["rating"] for entry in entries]
-        rating_counts = {i: ratings.count(i) for i in range(1, 6)}
-        
-        return {
-            "total_feedback": len(entries),
-            "average_rating": self.get_average_rating(),
-            "rating_distribution": rating_counts,
-            "recent_feedback": entries[-5:]  # Last 5 entries
-        }
+        self._catch_up()
+        with self._lock:
+            if not self._total:
+                return {"total_feedback": 0, "average_rating": 0.0}
+            
+            return {
+                "total_feedback": self._total,
+                "average_rating": self._rating_sum / self._total,
+                "rating_distribution": dict(self._histogram),
+                "recent_feedback": list(self._recent)  # Last 5 entries
+            }
     
     def get_feedback_for_repo(self, repo_url: str) -> list:
-        """Get all feedback entries for a specific repository."""
-        return [
-            entry for entry in self.feedback_data["feedback_entries"]
-            if entry["repo_url"] == repo_url
-        ]
+        """Get all feedback entries for a specific repository.
+        
+        Entries match on the canonical repository, so any spelling of the URL
+        finds the same feedback.
+        """
+        key = repo_key(repo_url)
+        self._catch_up()
+        with self._lock:
+            locations = list(self._repo_index.get(key, []))
+            if not any(isinstance(location, int) for location in locations):
+                return locations
+            with open(self.log_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_ino != self._inode:
+                    # Compacted since the last read; the offsets are stale
+                    self._catch_up()
+                    return self.get_feedback_for_repo(repo_url)
+                entries = []
+                for location in locations:
+                    if isinstance(location, int):
+                        f.seek(location)
+                        location = json.loads(f.readline())
+                    entries.append(location)
+                return entries
 
 
 # Global feedback system instance
-feedback_system = FeedbackSystem()
\ No newline at end of file
+feedback_system = FeedbackSystem()
@@ -0,0 +1,81 @@
+"""Process-safe helpers for JSON state files shared by several workers."""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# flock() excludes other processes; this excludes other threads of the same one
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.RLock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(os.path.abspath(path), threading.RLock())
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock for path across threads and processes.
+
+    The lock is taken on a sidecar "<path>.lock" file so the data file itself
+    can be replaced atomically while the lock is held.
+    """
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+        lock_dir = os.path.dirname(os.path.abspath(path))
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(f"{path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_json(path: str, default: Callable[[], Any]) -> Any:
+    """Load a JSON file, returning default() if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return default()
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return default()
+
+
+def atomic_write_json(path: str, data: Any):
+    """Write JSON to path so readers see either the old or the new file, never a partial one."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def update_json(path: str, mutate: Callable[[Any], None], default: Callable[[], Any]) -> Any:
+    """Apply mutate to the current on-disk JSON under the file lock and save the result.
+
+    Reading inside the lock means concurrent writers in other processes are
+    merged rather than overwritten. Returns the data as written.
+    """
+    with file_lock(path):
+        data = read_json(path, default)
+        mutate(data)
+        atomic_write_json(path, data)
+    return data
@@ -1,92 +1,191 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from knowledge_base import knowledge_base
+from performance_metrics import performance_metrics
+from config import (
+    GITHUB_API_URL,
+    GITHUB_GRAPHQL_URL,
+    GITHUB_USE_GRAPHQL,
+    GITHUB_CONNECT_TIMEOUT,
+    GITHUB_READ_TIMEOUT
+)
+from github_parser.session import get_github_session, record_rate_limit
+from github_parser.http_cache import github_http_cache
+from github_parser.freshness import freshness_policy, refresh_queue, FRESH, STALE
+from github_parser.repo_id import parse_repo_id, repo_key
+
+# Everything analyze_repo needs from GitHub in one GraphQL round-trip
+REPO_GRAPHQL_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    name
+    description
+    stargazerCount
+    forkCount
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+      edges { size node { name } }
+    }
+    object(expression: "HEAD:") {
+      ... on Tree { entries { name path type } }
+    }
+  }
+}
+"""
+
+# GraphQL tree entry types mapped to the REST contents API equivalents
+TREE_ENTRY_TYPES = {'blob': 'file', 'tree': 'dir', 'commit': 'submodule'}
 
 
 class GitHubRepoAnalyzer:
     """Analyzes GitHub repositories to extract key information for MVP generation."""
     
-    def __init__(self, github_token=None):
+    def __init__(self, github_token=None, session=None, timeout=None, use_graphql=GITHUB_USE_GRAPHQL,
+                 http_cache=None):
         self.github_token = github_token
-        self.headers = {
+        self.http_cache = http_cache or github_http_cache
+        # GitHub's GraphQL API only accepts authenticated requests
+        self.use_graphql = use_graphql and bool(github_token)
+        # All analyzers share one pooled keep-alive session unless given their own
+        self.session = session or get_github_session()
+        self.timeout = timeout or (GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT)
+        self.anonymous_headers = {
             'Accept': 'application/vnd.github.v3+json',
             'User-Agent': 'GitHub-MVP-Generator'
         }
+        self.headers = dict(self.anonymous_headers)
         if self.github_token:
             self.headers['Authorization'] = f'token {self.github_token}'
     
     def parse_repo_url(self, url):
-        """Extract owner and repo name from GitHub URL."""
-        # Handle different GitHub URL formats
-        if 'github.com' not in url:
-            raise ValueError('Invalid GitHub URL')
-            
-        # Remove trailing slash if present
-        url = url.rstrip('/')
-        
-        # Extract owner and repo from URL
-        parts = url.split('/')
-        if len(parts) < 2:
-            raise ValueError('Invalid GitHub URL format')
-            
-        owner = parts[-2]
-        repo = parts[-1]
-        
-        return owner, repo
+        """Extract the canonical owner and repo name from a GitHub URL."""
+        return parse_repo_id(url)
     
-    def get_repo_info(self, owner, repo):
-        """Get basic repository information."""
-        import requests
-        from config import GITHUB_API_URL
+    def _get_json(self, url):
+        """GET a GitHub API URL and return the decoded JSON body.
         
-        url = f'{GITHUB_API_URL}/repos/{owner}/{repo}'
-        response = requests.get(url, headers=self.headers)
+        Requests are made conditional when a previous response for the URL is
+        stored, and a 304 is answered from the store.
+        """
+        with performance_metrics.span("github.request", url=url) as request_span:
+            cached = self.http_cache.get(url)
+            conditional = self.http_cache.conditional_headers(cached)
+            response = self.session.get(url, headers={**self.headers, **conditional}, timeout=self.timeout)
+            
+            # If we get a 401, try without authentication
+            if response.status_code == 401:
+                response = self.session.get(url, headers={**self.anonymous_headers, **conditional}, timeout=self.timeout)
+            request_span.set("status", response.status_code)
+        record_rate_limit(response)
         
-        # If we get a 401, try without authentication
-        if response.status_code == 401:
-            response = requests.get(url)
+        if response.status_code == 304 and cached:
+            return self.http_cache.not_modified(cached)
         
         if response.status_code != 200:
             raise Exception(f'GitHub API error: {response.status_code} - {response.text}')
-            
-        return response.json()
+        
+        body = response.json()
+        self.http_cache.store(url, response, body)
+        return body
+    
+    def get_repo_info(self, owner, repo):
+        """Get basic repository information."""
+        return self._get_json(f'{GITHUB_API_URL}/repos/{owner}/{repo}')
     
     def get_repo_contents(self, owner, repo, path=''):
         """Get repository contents."""
-        import requests
-        from config import GITHUB_API_URL
-        
-        url = f'{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}'
-        response = requests.get(url, headers=self.headers)
-        
-        # If we get a 401, try without authentication
-        if response.status_code == 401:
-            response = requests.get(url)
-        
-        if response.status_code != 200:
-            raise Exception(f'GitHub API error: {response.status_code} - {response.text}')
-            
-        return response.json()
+        return self._get_json(f'{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}')
+    
+    def get_repo_languages(self, owner, repo):
+        """Get the language byte breakdown of the repository."""
+        return self._get_json(f'{GITHUB_API_URL}/repos/{owner}/{repo}/languages')
+    
+    def _primary_language(self, languages):
+        """Pick the language with the most bytes from a language breakdown."""
+        if not languages:
+            return None
+        return max(languages, key=languages.get)
     
     def get_primary_language(self, owner, repo):
         """Get the primary language of the repository."""
-        import requests
-        from config import GITHUB_API_URL
+        return self._primary_language(self.get_repo_languages(owner, repo))
+    
+    def get_repo_data_graphql(self, owner, repo):
+        """Get repo info, root contents and languages with a single GraphQL query.
         
-        url = f'{GITHUB_API_URL}/repos/{owner}/{repo}/languages'
-        response = requests.get(url, headers=self.headers)
+        The result mirrors get_repo_data_rest so both paths feed analyze_repo
+        the same shapes.
+        """
+        payload = {'query': REPO_GRAPHQL_QUERY, 'variables': {'owner': owner, 'name': repo}}
+        with performance_metrics.span("github.graphql", url=GITHUB_GRAPHQL_URL) as request_span:
+            response = self.session.post(GITHUB_GRAPHQL_URL, json=payload, headers=self.headers, timeout=self.timeout)
+            request_span.set("status", response.status_code)
+        record_rate_limit(response)
+        if response.status_code != 200:
+            raise Exception(f'GitHub GraphQL error: {response.status_code} - {response.text}')
         
-        # If we get a 401, try without authentication
-        if response.status_code == 401:
-            response = requests.get(url)
+        body = response.json()
+        if body.get('errors'):
+            messages = '; '.join(error.get('message', '') for error in body['errors'])
+            raise Exception(f'GitHub GraphQL error: {messages}')
         
-        if response.status_code != 200:
-            raise Exception(f'GitHub API error: {response.status_code} - {response.text}')
-            
-        languages = response.json()
-        if not languages:
-            return None
-            
-        # Return the language with the most bytes
-        return max(languages, key=languages.get)
+        repository = (body.get('data') or {}).get('repository')
+        if not repository:
+            raise Exception(f'GitHub GraphQL error: repository {owner}/{repo} not found')
+        
+        languages = {
+            edge['node']['name']: edge['size']
+            for edge in (repository.get('languages') or {}).get('edges', [])
+        }
+        entries = (repository.get('object') or {}).get('entries', [])
+        contents = [
+            {
+                'name': entry['name'],
+                'path': entry.get('path', entry['name']),
+                'type': TREE_ENTRY_TYPES.get(entry.get('type'), entry.get('type'))
+            }
+            for entry in entries
+        ]
+        
+        return {
+            'repo_info': {
+                'name': repository.get('name'),
+                'description': repository.get('description'),
+                'stargazers_count': repository.get('stargazerCount', 0),
+                'forks_count': repository.get('forkCount', 0)
+            },
+            'contents': contents,
+            'languages': languages
+        }
+    
+    def get_repo_data_rest(self, owner, repo):
+        """Get repo info, root contents and languages with concurrent REST calls.
+        
+        Repository info is required, so its failure fails the analysis. A failed
+        contents or languages call only degrades that part of the result.
+        """
+        # Each call runs in a copy of the caller's context so its span nests under the analysis
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            repo_info = executor.submit(contextvars.copy_context().run, self.get_repo_info, owner, repo)
+            contents = executor.submit(contextvars.copy_context().run, self.get_repo_contents, owner, repo)
+            languages = executor.submit(contextvars.copy_context().run, self.get_repo_languages, owner, repo)
+        
+        repo_data = {'repo_info': repo_info.result()}
+        for key, future, fallback in [('contents', contents, []), ('languages', languages, {})]:
+            try:
+                repo_data[key] = future.result()
+            except Exception as e:
+                print(f"Warning: Could not fetch repository {key} for {owner}/{repo}: {e}")
+                repo_data[key] = fallback
+        return repo_data
+    
+    def get_repo_data(self, owner, repo):
+        """Get repo data via GraphQL when possible, falling back to REST."""
+        if self.use_graphql:
+            try:
+                return self.get_repo_data_graphql(owner, repo)
+            except Exception as e:
+                print(f"Warning: GraphQL analysis failed, falling back to REST: {e}")
+        return self.get_repo_data_rest(owner, repo)
     
     def detect_framework(self, contents):
         """Detect framework based on repository files."""
@@ -120,22 +219,42 @@ class GitHubRepoAnalyzer:
     
     def analyze_repo(self, repo_url):
         """Main method to analyze a GitHub repository."""
+        with performance_metrics.span("github.analyze_repo") as analysis_span:
+            return self._analyze(repo_url, analysis_span)
+    
+    def _analyze(self, repo_url, analysis_span):
+        """Serve the analysis from the knowledge base if fresh enough, else from GitHub."""
         owner, repo = self.parse_repo_url(repo_url)
         
         # Check if we have a pattern stored for this repository
         repo_pattern = knowledge_base.get_repo_pattern(repo_url)
+        freshness = freshness_policy.classify(repo_pattern.get("timestamp")) if repo_pattern else None
+        analysis_span.set("cache", freshness or "miss")
         if repo_pattern:
-            print("Using cached analysis for this repository")
-            return repo_pattern.get("pattern_data", {})
+            if freshness == FRESH:
+                print("Using cached analysis for this repository")
+                return repo_pattern.get("pattern_data", {})
+            if freshness == STALE:
+                print("Using cached analysis for this repository (refreshing in background)")
+                refresh_queue.enqueue(repo_key(repo_url), lambda: self._analyze_uncached(owner, repo, repo_url))
+                return repo_pattern.get("pattern_data", {})
         
-        # Get repository information
-        repo_info = self.get_repo_info(owner, repo)
+        # Expired entries are rare individually, so sweep them all at once
+        if repo_pattern and freshness_policy.should_sweep():
+            evicted = knowledge_base.evict_repo_patterns_older_than(freshness_policy.expired_before())
+            print(f"Evicted {evicted} expired repository analyses")
         
-        # Get repository contents (top level)
-        contents = self.get_repo_contents(owner, repo)
+        return self._analyze_uncached(owner, repo, repo_url)
+    
+    def _analyze_uncached(self, owner, repo, repo_url):
+        """Analyze a repository from GitHub and store the result."""
+        # Get repository information, top-level contents and languages
+        repo_data = self.get_repo_data(owner, repo)
+        repo_info = repo_data['repo_info']
+        contents = repo_data['contents']
         
         # Get primary language
-        primary_language = self.get_primary_language(owner, repo)
+        primary_language = self._primary_language(repo_data['languages'])
         
         # Detect frameworks
         frameworks = self.detect_framework(contents)
@@ -0,0 +1,138 @@
+"""Freshness policy and background refresh for cached repository analyses."""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Optional
+
+from config import (
+    REPO_PATTERN_MAX_AGE,
+    REPO_PATTERN_STALE_WINDOW,
+    REPO_PATTERN_SWEEP_INTERVAL,
+    REPO_REFRESH_QUEUE_SIZE
+)
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+class FreshnessPolicy:
+    """Classifies cached entries by age.
+    
+    Entries younger than max_age are fresh. Entries up to stale_window past
+    that are stale: still served, but refreshed in the background. Anything
+    older is expired and must be re-analyzed.
+    """
+    
+    def __init__(self, max_age: int = REPO_PATTERN_MAX_AGE, stale_window: int = REPO_PATTERN_STALE_WINDOW,
+                 sweep_interval: int = REPO_PATTERN_SWEEP_INTERVAL):
+        self.max_age = max_age
+        self.stale_window = stale_window
+        self.sweep_interval = sweep_interval
+        self._last_sweep = None
+        self._lock = threading.Lock()
+    
+    def classify(self, timestamp: Optional[str], now: Optional[datetime] = None) -> str:
+        """Classify an entry from its ISO timestamp."""
+        try:
+            stored_at = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return EXPIRED
+        age = ((now or datetime.now()) - stored_at).total_seconds()
+        if age < self.max_age:
+            return FRESH
+        if age < self.max_age + self.stale_window:
+            return STALE
+        return EXPIRED
+    
+    def expired_before(self, now: Optional[datetime] = None) -> datetime:
+        """Get the cutoff before which entries are expired."""
+        return (now or datetime.now()) - timedelta(seconds=self.max_age + self.stale_window)
+    
+    def should_sweep(self) -> bool:
+        """Return True at most once per sweep interval."""
+        with self._lock:
+            now = time.monotonic()
+            if self._last_sweep is not None and now - self._last_sweep < self.sweep_interval:
+                return False
+            self._last_sweep = now
+            return True
+
+
+class RefreshQueue:
+    """Re-analyzes stale repositories on a background thread.
+    
+    Each key is queued at most once at a time, and the queue is bounded so a
+    burst of stale hits can't pile up unbounded work.
+    """
+    
+    def __init__(self, max_size: int = REPO_REFRESH_QUEUE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self._queue = queue.Queue(maxsize=self.max_size)
+        self._pending = set()
+        self._worker = None
+        self._pid = os.getpid()
+        self.stats = {"queued": 0, "refreshed": 0, "failed": 0, "dropped": 0}
+    
+    def _ensure_worker(self):
+        """Start the worker thread, restarting it after a fork."""
+        if self._pid != os.getpid():
+            # Threads don't survive fork; start over with an empty queue
+            self._reset()
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="repo-refresh", daemon=True)
+            self._worker.start()
+    
+    def enqueue(self, key: str, refresh: Callable[[], Any]) -> bool:
+        """Queue a refresh unless one for the same key is already pending."""
+        with self._lock:
+            self._ensure_worker()
+            if key in self._pending:
+                return False
+            try:
+                self._queue.put_nowait((key, refresh))
+            except queue.Full:
+                self.stats["dropped"] += 1
+                return False
+            self._pending.add(key)
+            self.stats["queued"] += 1
+            return True
+    
+    def _run(self):
+        while True:
+            key, refresh = self._queue.get()
+            try:
+                refresh()
+                with self._lock:
+                    self.stats["refreshed"] += 1
+            except Exception as e:
+                print(f"Warning: Background refresh failed for {key}: {e}")
+                with self._lock:
+                    self.stats["failed"] += 1
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
+    
+    def join(self):
+        """Block until every queued refresh has finished."""
+        self._queue.join()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get refresh queue statistics."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._pending)
+        return stats
+
+
+# Global freshness policy and refresh queue instances
+freshness_policy = FreshnessPolicy()
+refresh_queue = RefreshQueue()
@@ -0,0 +1,119 @@
+"""Conditional-request response store for GitHub API calls."""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from config import GITHUB_HTTP_CACHE_ENABLED, GITHUB_HTTP_CACHE_DIR, GITHUB_HTTP_CACHE_MAX_ENTRIES
+
+
+class HTTPResponseCache:
+    """Stores response bodies with their ETag/Last-Modified validators per URL.
+    
+    On refetch the validators are sent as If-None-Match/If-Modified-Since.
+    GitHub answers 304 when nothing changed, which doesn't count against the
+    rate limit, and the stored body is served instead.
+    """
+    
+    def __init__(self, cache_dir: str = GITHUB_HTTP_CACHE_DIR, max_entries: int = GITHUB_HTTP_CACHE_MAX_ENTRIES,
+                 enabled: bool = GITHUB_HTTP_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,          # a stored entry existed, so the request was conditional
+            "not_modified": 0,  # GitHub answered 304 and the stored body was served
+            "misses": 0         # no stored entry; full request
+        }
+    
+    def _disk_path(self, url: str) -> str:
+        """Get the on-disk path for a URL."""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+    
+    def _remember(self, url: str, entry: Dict[str, Any]):
+        """Insert an entry into the memory tier, evicting the least recently used."""
+        self._memory[url] = entry
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the stored entry for a URL and count the lookup as a hit or miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry:
+                self._memory.move_to_end(url)
+        
+        if entry is None:
+            try:
+                with open(self._disk_path(url), 'r') as f:
+                    entry = json.load(f)
+            except (IOError, ValueError):
+                entry = None
+        
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+            else:
+                self._remember(url, entry)
+                self.stats["hits"] += 1
+        return entry
+    
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build the conditional request headers for a stored entry."""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers['If-None-Match'] = entry["etag"]
+            if entry.get("last_modified"):
+                headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+    
+    def not_modified(self, entry: Dict[str, Any]) -> Any:
+        """Record a 304 response and return the stored body."""
+        with self._lock:
+            self.stats["not_modified"] += 1
+        return entry["body"]
+    
+    def store(self, url: str, response, body: Any):
+        """Store a 200 response body if it carries a validator."""
+        if not self.enabled:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        
+        entry = {"etag": etag, "last_modified": last_modified, "body": body}
+        with self._lock:
+            self._remember(url, entry)
+        
+        path = self._disk_path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            print(f"Warning: Could not save GitHub response cache entry: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/304/miss statistics for the cache."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        stats["enabled"] = self.enabled
+        return stats
+
+
+# Global GitHub HTTP response cache instance
+github_http_cache = HTTPResponseCache()
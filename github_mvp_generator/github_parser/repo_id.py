@@ -0,0 +1,61 @@
+"""Canonical repository identity for GitHub URLs."""
+
+from typing import Tuple
+from urllib.parse import urlparse
+
+GITHUB_HOSTS = ('github.com', 'www.github.com', 'api.github.com')
+
+
+def parse_repo_id(url: str) -> Tuple[str, str]:
+    """Extract the canonical (owner, repo) pair from any form of GitHub URL.
+    
+    Handles missing schemes, http vs https, letter case, trailing slashes,
+    `.git` suffixes, SSH remotes, API URLs and deep links such as
+    /tree/main or /blob/main/README.md. GitHub treats owner and repo names
+    case-insensitively, so both are lowercased.
+    """
+    url = (url or '').strip()
+    if url.startswith('git@'):
+        # SSH remote: git@github.com:owner/repo.git
+        host, _, path = url[len('git@'):].partition(':')
+    else:
+        if '://' not in url:
+            url = f'https://{url}'
+        parsed = urlparse(url)
+        host, path = parsed.hostname or '', parsed.path
+    
+    host = host.lower()
+    if host not in GITHUB_HOSTS:
+        raise ValueError('Invalid GitHub URL')
+    
+    parts = [part for part in path.split('/') if part]
+    if host == 'api.github.com' and parts[:1] == ['repos']:
+        parts = parts[1:]
+    if len(parts) < 2:
+        raise ValueError('Invalid GitHub URL format')
+    
+    owner, repo = parts[0].lower(), parts[1].lower()
+    if repo.endswith('.git'):
+        repo = repo[:-len('.git')]
+    if not owner or not repo:
+        raise ValueError('Invalid GitHub URL format')
+    return owner, repo
+
+
+def canonical_repo_id(url: str) -> str:
+    """Get the canonical 'owner/repo' identity for a GitHub URL."""
+    owner, repo = parse_repo_id(url)
+    return f'{owner}/{repo}'
+
+
+def repo_key(url: str) -> str:
+    """Get the key stores should use for a repository URL.
+    
+    GitHub URLs map to their canonical 'owner/repo'; anything else (such as
+    the CLI's 'last_repo' placeholder) is only trimmed and lowercased, so this
+    never raises.
+    """
+    try:
+        return canonical_repo_id(url)
+    except ValueError:
+        return (url or '').strip().rstrip('/').lower()
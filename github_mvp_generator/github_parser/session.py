@@ -0,0 +1,82 @@
+"""Shared, pooled HTTP session for GitHub API requests."""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import GITHUB_POOL_SIZE, GITHUB_MAX_RETRIES, GITHUB_RETRY_BACKOFF
+
+_session = None
+_session_lock = threading.Lock()
+
+# Most recent X-RateLimit-* headers seen on a GitHub response
+_rate_limit: Optional[Dict[str, Any]] = None
+
+
+def create_github_session(pool_size: int = GITHUB_POOL_SIZE, max_retries: int = GITHUB_MAX_RETRIES,
+                          backoff_factor: float = GITHUB_RETRY_BACKOFF) -> requests.Session:
+    """Create a keep-alive session with a sized connection pool and 5xx retries.
+    
+    Authentication is deliberately not set on the session; analyzers pass their
+    own headers per request so one session can serve every token.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_github_session() -> requests.Session:
+    """Get the process-wide GitHub session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_github_session()
+    return _session
+
+
+def reset_github_session():
+    """Forget the process-wide session so the next request opens new connections.
+    
+    Call this in a freshly forked worker: pooled sockets inherited from the
+    parent process must not be shared between processes.
+    """
+    global _session, _session_lock
+    _session_lock = threading.Lock()
+    _session = None
+
+
+def record_rate_limit(response: requests.Response):
+    """Remember the rate-limit headers of a GitHub response, if it has them."""
+    global _rate_limit
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    if remaining is None:
+        return
+    try:
+        _rate_limit = {
+            "remaining": int(remaining),
+            "limit": int(response.headers.get('X-RateLimit-Limit', 0)),
+            "reset": int(response.headers.get('X-RateLimit-Reset', 0)),
+            "observed_at": time.time()
+        }
+    except (TypeError, ValueError):
+        pass
+
+
+def get_rate_limit() -> Optional[Dict[str, Any]]:
+    """Get the last observed GitHub rate limit, or None if no response has reported one."""
+    return _rate_limit
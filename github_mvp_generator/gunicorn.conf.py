@@ -0,0 +1,46 @@
+"""Gunicorn configuration for the GitHub MVP Generator API.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Tune with WEB_CONCURRENCY (worker processes), WEB_THREADS (request threads per
+worker) and WEB_TIMEOUT; PORT sets the listening port.
+"""
+
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import WEB_CONCURRENCY, WEB_THREADS, WEB_TIMEOUT
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Requests spend most of their time waiting on GitHub and the AI provider, so
+# each worker process serves several requests on threads
+workers = WEB_CONCURRENCY
+worker_class = "gthread"
+threads = WEB_THREADS
+timeout = WEB_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app once in the master so workers fork with templates compiled
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Reset per-process state in each new worker."""
+    from wsgi import init_worker
+    init_worker()
+    server.log.info(f"Worker {worker.pid} initialized")
+
+
+def worker_exit(server, worker):
+    """Save the worker's buffered metrics before it exits."""
+    from performance_metrics import performance_metrics
+    performance_metrics.flush()
@@ -0,0 +1,240 @@
+"""Background job queue for bulk MVP prompt generation."""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import GITHUB_TOKEN, AI_GENERATION_MODE, JOB_WORKERS, JOB_MAX_RETAINED, JOB_STATE_DIR
+from file_store import atomic_write_json, read_json
+from github_parser.repo_id import repo_key
+from pipeline import credentials_key, generate_for_repo
+
+# Task and job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class GenerationTask:
+    """One repository generation, shared by every job that asked for it while it was in flight."""
+
+    def __init__(self, key: Tuple[str, str, str, str], repo_url: str, provider: str, mode: str,
+                 github_token: Optional[str]):
+        self.key = key
+        self.repo_url = repo_url
+        self.provider = provider
+        self.mode = mode
+        self.github_token = github_token
+        self.status = QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.jobs: List["Job"] = []
+
+    def to_dict(self, repo_url: str) -> Dict[str, Any]:
+        """Describe the task as seen by a job that requested repo_url."""
+        entry = {"repo_url": repo_url, "status": self.status}
+        if self.status == COMPLETED:
+            entry["prompt"] = self.result["prompt"]
+            entry["duration"] = self.result["duration"]
+        elif self.status == FAILED:
+            entry["error"] = self.error
+        return entry
+
+
+class Job:
+    """A batch of repositories submitted together."""
+
+    def __init__(self, job_id: str, provider: str, mode: str):
+        self.id = job_id
+        self.provider = provider
+        self.mode = mode
+        self.created_at = time.time()
+        self.tasks: List[Tuple[str, GenerationTask]] = []
+
+    @property
+    def status(self) -> str:
+        """Overall job status derived from its tasks."""
+        statuses = {task.status for _, task in self.tasks}
+        if statuses <= {COMPLETED, FAILED}:
+            return COMPLETED
+        if statuses == {QUEUED}:
+            return QUEUED
+        return RUNNING
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the job status with per-repository results."""
+        repos = [task.to_dict(repo_url) for repo_url, task in self.tasks]
+        counts = {state: 0 for state in (QUEUED, RUNNING, COMPLETED, FAILED)}
+        for repo in repos:
+            counts[repo["status"]] += 1
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "provider": self.provider,
+            "mode": self.mode,
+            "created_at": self.created_at,
+            "total": len(repos),
+            "counts": counts,
+            "repos": repos
+        }
+
+
+class JobQueue:
+    """Runs submitted generation jobs on an in-process worker pool.
+
+    Repositories are coalesced by canonical repo, provider, mode and GitHub
+    token: a URL that is already queued or running, whether in the same job
+    or another one, attaches to the existing task instead of being generated
+    twice.
+    
+    When state_dir is set, a snapshot of each job is written there whenever it
+    changes, so any worker process can answer a status poll for a job that
+    another worker is running.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_jobs: int = JOB_MAX_RETAINED,
+                 state_dir: str = JOB_STATE_DIR):
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self.state_dir = state_dir
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._queue = queue.Queue()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str, str, str], GenerationTask] = {}
+        self._threads: List[threading.Thread] = []
+        self._pid = os.getpid()
+        self.stats = {"jobs": 0, "tasks": 0, "coalesced": 0, "completed": 0, "failed": 0}
+
+    def _ensure_workers(self):
+        """Start the worker threads, restarting them after a fork."""
+        if self._pid != os.getpid():
+            # Threads don't survive fork; start over with an empty queue
+            self._reset()
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"generation-job-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, repo_urls: List[str], provider: str, github_token: Optional[str] = None,
+               mode: str = AI_GENERATION_MODE) -> Job:
+        """Queue a job for a list of repository URLs and return it."""
+        if not repo_urls:
+            raise ValueError("At least one repository URL is required")
+        github_token = github_token or GITHUB_TOKEN
+        job = Job(uuid.uuid4().hex, provider, mode)
+
+        with self._lock:
+            self._ensure_workers()
+            for repo_url in repo_urls:
+                key = (repo_key(repo_url), provider, mode, credentials_key(github_token))
+                task = self._inflight.get(key)
+                if task is None:
+                    task = GenerationTask(key, repo_url, provider, mode, github_token)
+                    self._inflight[key] = task
+                    self._queue.put(task)
+                    self.stats["tasks"] += 1
+                else:
+                    self.stats["coalesced"] += 1
+                job.tasks.append((repo_url, task))
+                task.jobs.append(job)
+
+            self._jobs[job.id] = job
+            self.stats["jobs"] += 1
+            self._persist(job)
+            self._evict_jobs()
+        return job
+
+    def _state_path(self, job_id: str) -> str:
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _persist(self, job: Job):
+        """Write a job snapshot for other worker processes to read."""
+        if not self.state_dir:
+            return
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            atomic_write_json(self._state_path(job.id), job.to_dict())
+        except IOError as e:
+            print(f"Warning: Could not save job state: {e}")
+
+    def _evict_jobs(self):
+        """Forget the oldest finished jobs beyond the retention limit."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status == COMPLETED:
+                del self._jobs[job_id]
+                if self.state_dir:
+                    try:
+                        os.remove(self._state_path(job_id))
+                    except OSError:
+                        pass
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's status and results, or None if it is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return job.to_dict()
+        # Jobs submitted to another worker process are only visible on disk
+        if self.state_dir and all(c in "0123456789abcdef" for c in job_id):
+            return read_json(self._state_path(job_id), lambda: None)
+        return None
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            with self._lock:
+                task.status = RUNNING
+                task.started_at = time.time()
+                for job in task.jobs:
+                    self._persist(job)
+            try:
+                result = generate_for_repo(task.repo_url, task.provider, task.github_token, task.mode)
+                with self._lock:
+                    task.result = result
+                    task.status = COMPLETED
+                    self.stats["completed"] += 1
+            except Exception as e:
+                with self._lock:
+                    task.error = str(e)
+                    task.status = FAILED
+                    self.stats["failed"] += 1
+            finally:
+                with self._lock:
+                    task.finished_at = time.time()
+                    task.github_token = None
+                    if self._inflight.get(task.key) is task:
+                        del self._inflight[task.key]
+                    for job in task.jobs:
+                        self._persist(job)
+                self._queue.task_done()
+
+    def join(self):
+        """Block until every queued task has finished."""
+        self._queue.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get job queue statistics."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["queue_depth"] = self._queue.qsize()
+            stats["in_flight"] = len(self._inflight)
+            stats["retained_jobs"] = len(self._jobs)
+            stats["workers"] = self.workers
+        return stats
+
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -1,133 +1,122 @@
 """Knowledge base system for the GitHub MVP Generator."""
 
-import json
-import os
 import hashlib
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from config import KNOWLEDGE_BACKEND, KNOWLEDGE_DB_FILE
+from knowledge_store import KnowledgeStore, create_knowledge_store
+from github_parser.repo_id import repo_key
+
+# Bumped whenever the repo key derivation changes, so stored entries are re-keyed
+REPO_KEY_VERSION = "2"
+
+# Sections whose records are keyed by repository
+REPO_SECTIONS = ("successful_prompts", "repo_patterns")
+
 
 class KnowledgeBase:
     """Stores and manages learned patterns and successful generations."""
     
-    def __init__(self, knowledge_file: str = "knowledge_base.json"):
+    def __init__(self, knowledge_file: str = "knowledge_base.json", backend: str = KNOWLEDGE_BACKEND,
+                 db_file: Optional[str] = KNOWLEDGE_DB_FILE, store: Optional[KnowledgeStore] = None):
         self.knowledge_file = knowledge_file
-        self.knowledge_data = self._load_knowledge()
-    
-    def _load_knowledge(self) -> Dict[str, Any]:
-        """Load existing knowledge from file."""
-        if os.path.exists(self.knowledge_file):
-            try:
-                with open(self.knowledge_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return self._get_default_knowledge()
-        return self._get_default_knowledge()
-    
-    def _get_default_knowledge(self) -> Dict[str, Any]:
-        """Get default knowledge structure."""
-        return {
-            "framework_signatures": {},
-            "successful_prompts": {},
-            "repo_patterns": {},
-            "tech_stack_combinations": {},
-            "last_updated": datetime.now().isoformat()
-        }
-    
-    def _save_knowledge(self):
-        """Save knowledge to file."""
-        self.knowledge_data["last_updated"] = datetime.now().isoformat()
-        try:
-            with open(self.knowledge_file, 'w') as f:
-                json.dump(self.knowledge_data, f, indent=2)
-        except IOError as e:
-            print(f"Warning: Could not save knowledge base: {e}")
+        self.store = store or create_knowledge_store(backend, knowledge_file, db_file)
+        if self.store.get_meta("repo_key_version") != REPO_KEY_VERSION:
+            self._rekey_repo_entries()
     
     def _get_repo_hash(self, repo_url: str) -> str:
-        """Generate a hash for a repository URL."""
-        return hashlib.md5(repo_url.encode()).hexdigest()
+        """Generate a hash for a repository URL.
+        
+        The hash is taken over the canonical 'owner/repo' identity, so every
+        spelling of the same repository's URL maps to the same entry.
+        """
+        return hashlib.md5(repo_key(repo_url).encode()).hexdigest()
+    
+    def _rekey_repo_entries(self):
+        """Move entries stored under raw-URL hashes to their canonical keys.
+        
+        When several URLs collapse onto one repository, the newest entry wins.
+        """
+        for section in REPO_SECTIONS:
+            canonical = {}
+            stale_keys = []
+            for key, record in self.store.items(section):
+                new_key = self._get_repo_hash(record.get("repo_url", ""))
+                if new_key != key:
+                    stale_keys.append(key)
+                current = canonical.get(new_key)
+                if current is None or (record.get("timestamp") or "") > (current.get("timestamp") or ""):
+                    canonical[new_key] = record
+            
+            for key, record in canonical.items():
+                if key in stale_keys or self.store.get(section, key) != record:
+                    self.store.put(section, key, record)
+            self.store.delete(section, [key for key in stale_keys if key not in canonical])
+        
+        self.store.set_meta("repo_key_version", REPO_KEY_VERSION)
     
     def store_framework_signature(self, language: str, frameworks: List[str], signature: Dict[str, Any]):
         """Store a framework signature for a language/framework combination."""
         key = f"{language}:{','.join(frameworks)}"
-        if "framework_signatures" not in self.knowledge_data:
-            self.knowledge_data["framework_signatures"] = {}
-        
-        self.knowledge_data["framework_signatures"][key] = {
+        self.store.put("framework_signatures", key, {
             "signature": signature,
             "timestamp": datetime.now().isoformat(),
             "language": language,
             "frameworks": frameworks
-        }
-        self._save_knowledge()
+        })
     
     def get_framework_signature(self, language: str, frameworks: List[str]) -> Dict[str, Any]:
         """Retrieve a framework signature."""
         key = f"{language}:{','.join(frameworks)}"
-        return self.knowledge_data.get("framework_signatures", {}).get(key, {}).get("signature", {})
+        return (self.store.get("framework_signatures", key) or {}).get("signature", {})
     
     def store_successful_prompt(self, repo_url: str, prompt_data: Dict[str, Any], rating: int = 5):
         """Store a successful prompt generation."""
         repo_hash = self._get_repo_hash(repo_url)
-        if "successful_prompts" not in self.knowledge_data:
-            self.knowledge_data["successful_prompts"] = {}
-        
-        self.knowledge_data["successful_prompts"][repo_hash] = {
+        self.store.put("successful_prompts", repo_hash, {
             "repo_url": repo_url,
             "prompt_data": prompt_data,
             "rating": rating,
             "timestamp": datetime.now().isoformat()
-        }
-        self._save_knowledge()
+        })
     
     def get_successful_prompt(self, repo_url: str) -> Dict[str, Any]:
         """Retrieve a successful prompt generation."""
         repo_hash = self._get_repo_hash(repo_url)
-        return self.knowledge_data.get("successful_prompts", {}).get(repo_hash, {})
+        return self.store.get("successful_prompts", repo_hash) or {}
     
     def store_repo_pattern(self, repo_url: str, pattern_data: Dict[str, Any]):
         """Store a repository pattern."""
         repo_hash = self._get_repo_hash(repo_url)
-        if "repo_patterns" not in self.knowledge_data:
-            self.knowledge_data["repo_patterns"] = {}
-        
-        self.knowledge_data["repo_patterns"][repo_hash] = {
+        self.store.put("repo_patterns", repo_hash, {
             "repo_url": repo_url,
             "pattern_data": pattern_data,
             "timestamp": datetime.now().isoformat()
-        }
-        self._save_knowledge()
+        })
     
     def get_repo_pattern(self, repo_url: str) -> Dict[str, Any]:
         """Retrieve a repository pattern."""
         repo_hash = self._get_repo_hash(repo_url)
-        return self.knowledge_data.get("repo_patterns", {}).get(repo_hash, {})
+        return self.store.get("repo_patterns", repo_hash) or {}
+    
+    def evict_repo_patterns_older_than(self, cutoff: datetime) -> int:
+        """Delete every repository pattern stored before the cutoff."""
+        return self.store.delete_older_than("repo_patterns", cutoff.isoformat())
     
     def store_tech_stack_combination(self, tech_stack: str, project_type: str, success_count: int = 1):
         """Store a successful tech stack combination."""
-        if "tech_stack_combinations" not in self.knowledge_data:
-            self.knowledge_data["tech_stack_combinations"] = {}
-        
         key = f"{tech_stack}:{project_type}"
-        if key in self.knowledge_data["tech_stack_combinations"]:
-            # Increment success count
-            current_count = self.knowledge_data["tech_stack_combinations"][key].get("success_count", 0)
-            self.knowledge_data["tech_stack_combinations"][key]["success_count"] = current_count + success_count
-        else:
-            self.knowledge_data["tech_stack_combinations"][key] = {
-                "tech_stack": tech_stack,
-                "project_type": project_type,
-                "success_count": success_count,
-                "timestamp": datetime.now().isoformat()
-            }
-        self._save_knowledge()
+        self.store.increment("tech_stack_combinations", key, "success_count", success_count, {
+            "tech_stack": tech_stack,
+            "project_type": project_type,
+            "success_count": success_count,
+            "timestamp": datetime.now().isoformat()
+        })
     
     def get_best_tech_stacks_for_project_type(self, project_type: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get the best tech stacks for a project type based on success count."""
-        combinations = []
-        for key, data in self.knowledge_data.get("tech_stack_combinations", {}).items():
-            if data.get("project_type") == project_type:
-                combinations.append(data)
+        combinations = self.store.find("tech_stack_combinations", project_type)
         
         # Sort by success count
         combinations.sort(key=lambda x: x.get("success_count", 0), reverse=True)
@@ -136,13 +125,13 @@ class KnowledgeBase:
     def get_knowledge_stats(self) -> Dict[str, Any]:
         """Get statistics about the knowledge base."""
         return {
-            "framework_signatures_count": len(self.knowledge_data.get("framework_signatures", {})),
-            "successful_prompts_count": len(self.knowledge_data.get("successful_prompts", {})),
-            "repo_patterns_count": len(self.knowledge_data.get("repo_patterns", {})),
-            "tech_stack_combinations_count": len(self.knowledge_data.get("tech_stack_combinations", {})),
-            "last_updated": self.knowledge_data.get("last_updated")
+            "framework_signatures_count": self.store.count("framework_signatures"),
+            "successful_prompts_count": self.store.count("successful_prompts"),
+            "repo_patterns_count": self.store.count("repo_patterns"),
+            "tech_stack_combinations_count": self.store.count("tech_stack_combinations"),
+            "last_updated": self.store.get_last_updated()
         }
 
 
 # Global knowledge base instance
-knowledge_base = KnowledgeBase()
\ No newline at end of file
+knowledge_base = KnowledgeBase()
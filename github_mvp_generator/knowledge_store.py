@@ -0,0 +1,385 @@
+"""Storage backends for the knowledge base of the GitHub MVP Generator."""
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+
+
+# Record collections kept by the knowledge base
+SECTIONS = (
+    "framework_signatures",
+    "successful_prompts",
+    "repo_patterns",
+    "tech_stack_combinations"
+)
+
+
+class KnowledgeStore(ABC):
+    """Abstract base class for knowledge base storage backends.
+
+    Records are dicts stored per section under a string key.
+    """
+
+    @abstractmethod
+    def get(self, section: str, key: str) -> Optional[Dict[str, Any]]:
+        """Get a record, or None if it doesn't exist."""
+        pass
+
+    @abstractmethod
+    def put(self, section: str, key: str, record: Dict[str, Any]):
+        """Insert or replace a record."""
+        pass
+
+    @abstractmethod
+    def increment(self, section: str, key: str, field: str, amount: int, default: Dict[str, Any]):
+        """Atomically add to a numeric field, inserting `default` if the record is missing."""
+        pass
+
+    @abstractmethod
+    def find(self, section: str, project_type: str) -> List[Dict[str, Any]]:
+        """Get all records in a section with the given project_type."""
+        pass
+
+    @abstractmethod
+    def items(self, section: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get all (key, record) pairs in a section."""
+        pass
+
+    @abstractmethod
+    def delete(self, section: str, keys: List[str]):
+        """Delete records by key."""
+        pass
+
+    @abstractmethod
+    def delete_older_than(self, section: str, cutoff: str) -> int:
+        """Delete records whose timestamp is before an ISO cutoff and return how many."""
+        pass
+
+    @abstractmethod
+    def count(self, section: str) -> int:
+        """Count the records in a section."""
+        pass
+
+    @abstractmethod
+    def get_last_updated(self) -> Optional[str]:
+        """Get the ISO timestamp of the last write."""
+        pass
+
+    @abstractmethod
+    def get_meta(self, key: str) -> Optional[str]:
+        """Get a store-level metadata value such as a migration marker."""
+        pass
+
+    @abstractmethod
+    def set_meta(self, key: str, value: str):
+        """Set a store-level metadata value."""
+        pass
+
+
+class JSONKnowledgeStore(KnowledgeStore):
+    """Keeps every record in memory and rewrites a single JSON file on each write."""
+
+    def __init__(self, knowledge_file: str):
+        self.knowledge_file = knowledge_file
+        self._lock = threading.RLock()
+        self.knowledge_data = self._load_knowledge()
+
+    def _load_knowledge(self) -> Dict[str, Any]:
+        """Load existing knowledge from file."""
+        if os.path.exists(self.knowledge_file):
+            try:
+                with open(self.knowledge_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return self._get_default_knowledge()
+        return self._get_default_knowledge()
+
+    def _get_default_knowledge(self) -> Dict[str, Any]:
+        """Get default knowledge structure."""
+        data = {section: {} for section in SECTIONS}
+        data["last_updated"] = datetime.now().isoformat()
+        return data
+
+    def _save_knowledge(self):
+        """Save knowledge to file."""
+        self.knowledge_data["last_updated"] = datetime.now().isoformat()
+        try:
+            with open(self.knowledge_file, 'w') as f:
+                json.dump(self.knowledge_data, f, indent=2)
+        except IOError as e:
+            print(f"Warning: Could not save knowledge base: {e}")
+
+    def _section(self, section: str) -> Dict[str, Any]:
+        return self.knowledge_data.setdefault(section, {})
+
+    def get(self, section: str, key: str) -> Optional[Dict[str, Any]]:
+        return self.knowledge_data.get(section, {}).get(key)
+
+    def put(self, section: str, key: str, record: Dict[str, Any]):
+        with self._lock:
+            self._section(section)[key] = record
+            self._save_knowledge()
+
+    def increment(self, section: str, key: str, field: str, amount: int, default: Dict[str, Any]):
+        with self._lock:
+            records = self._section(section)
+            if key in records:
+                records[key][field] = records[key].get(field, 0) + amount
+            else:
+                records[key] = default
+            self._save_knowledge()
+
+    def find(self, section: str, project_type: str) -> List[Dict[str, Any]]:
+        return [
+            record for record in self.knowledge_data.get(section, {}).values()
+            if record.get("project_type") == project_type
+        ]
+
+    def items(self, section: str) -> List[Tuple[str, Dict[str, Any]]]:
+        return list(self.knowledge_data.get(section, {}).items())
+
+    def delete(self, section: str, keys: List[str]):
+        if not keys:
+            return
+        with self._lock:
+            records = self._section(section)
+            for key in keys:
+                records.pop(key, None)
+            self._save_knowledge()
+
+    def delete_older_than(self, section: str, cutoff: str) -> int:
+        with self._lock:
+            records = self._section(section)
+            expired = [key for key, record in records.items() if (record.get("timestamp") or "") < cutoff]
+            if expired:
+                for key in expired:
+                    del records[key]
+                self._save_knowledge()
+            return len(expired)
+
+    def count(self, section: str) -> int:
+        return len(self.knowledge_data.get(section, {}))
+
+    def get_last_updated(self) -> Optional[str]:
+        return self.knowledge_data.get("last_updated")
+
+    def get_meta(self, key: str) -> Optional[str]:
+        return self.knowledge_data.get("meta", {}).get(key)
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self.knowledge_data.setdefault("meta", {})[key] = value
+            self._save_knowledge()
+
+
+class SQLiteKnowledgeStore(KnowledgeStore):
+    """Stores each record as its own row in an SQLite database in WAL mode.
+
+    Writes are single-row upserts, so their cost doesn't grow with history, and
+    SQLite's locking makes the file safe to share between worker processes.
+    """
+
+    def __init__(self, db_file: str, migrate_from: Optional[str] = None):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._create_schema()
+        if migrate_from:
+            self._migrate_from_json(migrate_from)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, reconnecting after a fork."""
+        if self._pid != os.getpid():
+            # Connections must not be shared with a parent process
+            self._local = threading.local()
+            self._pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self):
+        """Create the per-section tables, their indexes and the meta table."""
+        connection = self._connection()
+        for section in SECTIONS:
+            # The key is the repo hash for repo-keyed sections, so the primary
+            # key index covers repo lookups
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {section} ("
+                "key TEXT PRIMARY KEY, project_type TEXT, timestamp TEXT, data TEXT NOT NULL)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{section}_project_type ON {section}(project_type)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{section}_timestamp ON {section}(timestamp)"
+            )
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _check_section(self, section: str):
+        # Section names are interpolated into SQL, so only allow known ones
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown knowledge base section: {section}")
+
+    def _upsert(self, connection: sqlite3.Connection, section: str, key: str, record: Dict[str, Any]):
+        connection.execute(
+            f"INSERT INTO {section} (key, project_type, timestamp, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET project_type = excluded.project_type, "
+            "timestamp = excluded.timestamp, data = excluded.data",
+            (key, record.get("project_type"), record.get("timestamp"), json.dumps(record))
+        )
+
+    def _touch(self, connection: sqlite3.Connection):
+        connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('last_updated', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (datetime.now().isoformat(),)
+        )
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, connection: sqlite3.Connection, key: str, value: str):
+        connection.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def _migrate_from_json(self, knowledge_file: str):
+        """Import an existing knowledge_base.json once."""
+        if self._get_meta("migrated_from_json") or not os.path.exists(knowledge_file):
+            return
+        try:
+            with open(knowledge_file, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Could not migrate knowledge base from {knowledge_file}: {e}")
+            return
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have finished the migration while we waited
+            if not self._get_meta("migrated_from_json"):
+                for section in SECTIONS:
+                    for key, record in (data.get(section) or {}).items():
+                        self._upsert(connection, section, key, record)
+                self._set_meta(connection, "migrated_from_json", knowledge_file)
+                self._set_meta(connection, "last_updated", data.get("last_updated") or datetime.now().isoformat())
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def get(self, section: str, key: str) -> Optional[Dict[str, Any]]:
+        self._check_section(section)
+        row = self._connection().execute(f"SELECT data FROM {section} WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, section: str, key: str, record: Dict[str, Any]):
+        self._check_section(section)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._upsert(connection, section, key, record)
+            self._touch(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def increment(self, section: str, key: str, field: str, amount: int, default: Dict[str, Any]):
+        self._check_section(section)
+        connection = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent
+        # increments from other processes can't interleave
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(f"SELECT data FROM {section} WHERE key = ?", (key,)).fetchone()
+            if row:
+                record = json.loads(row[0])
+                record[field] = record.get(field, 0) + amount
+            else:
+                record = default
+            self._upsert(connection, section, key, record)
+            self._touch(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def find(self, section: str, project_type: str) -> List[Dict[str, Any]]:
+        self._check_section(section)
+        rows = self._connection().execute(
+            f"SELECT data FROM {section} WHERE project_type = ?", (project_type,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def items(self, section: str) -> List[Tuple[str, Dict[str, Any]]]:
+        self._check_section(section)
+        rows = self._connection().execute(f"SELECT key, data FROM {section}").fetchall()
+        return [(key, json.loads(data)) for key, data in rows]
+
+    def delete(self, section: str, keys: List[str]):
+        self._check_section(section)
+        if not keys:
+            return
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(f"DELETE FROM {section} WHERE key = ?", [(key,) for key in keys])
+            self._touch(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def delete_older_than(self, section: str, cutoff: str) -> int:
+        self._check_section(section)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = connection.execute(
+                f"DELETE FROM {section} WHERE timestamp IS NULL OR timestamp < ?", (cutoff,)).rowcount
+            if deleted:
+                self._touch(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return deleted
+
+    def count(self, section: str) -> int:
+        self._check_section(section)
+        return self._connection().execute(f"SELECT COUNT(*) FROM {section}").fetchone()[0]
+
+    def get_last_updated(self) -> Optional[str]:
+        return self._get_meta("last_updated")
+
+    def get_meta(self, key: str) -> Optional[str]:
+        return self._get_meta(key)
+
+    def set_meta(self, key: str, value: str):
+        self._set_meta(self._connection(), key, value)
+
+
+def create_knowledge_store(backend: str, knowledge_file: str, db_file: Optional[str] = None) -> KnowledgeStore:
+    """Create the configured storage backend.
+
+    The SQLite backend imports `knowledge_file` on first use, so switching
+    backends keeps previously learned patterns.
+    """
+    if backend == "json":
+        return JSONKnowledgeStore(knowledge_file)
+    elif backend == "sqlite":
+        db_file = db_file or f"{os.path.splitext(knowledge_file)[0]}.db"
+        return SQLiteKnowledgeStore(db_file, migrate_from=knowledge_file)
+    else:
+        raise ValueError(f"Unsupported knowledge base backend: {backend}")
@@ -8,12 +8,16 @@ It analyzes GitHub repositories and generates structured MVP prompts
 for bootstrapping new projects based on proven open-source implementations.
 
 Usage:
-    python main.py <github_repo_url> [--token GITHUB_TOKEN] [--provider PROVIDER]
+    python main.py <github_repo_url> [--token GITHUB_TOKEN] [--provider PROVIDER] [--mode MODE]
+    python main.py --batch FILE [--output FILE] [--resume] [--github-concurrency N] [--llm-concurrency N]
 
 Examples:
     python main.py https://github.com/facebook/react
     python main.py https://github.com/tensorflow/tensorflow --token YOUR_TOKEN
     python main.py https://github.com/facebook/react --provider groq
+    python main.py https://github.com/facebook/react --mode fused
+    python main.py --batch repos.txt --output results.jsonl --llm-concurrency 4
+    python main.py --batch repos.txt --output results.jsonl --resume
 """
 
 import argparse
@@ -24,7 +28,8 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from github_parser.analyzer import GitHubRepoAnalyzer
-from config import GITHUB_TOKEN, AI_PROVIDER
+from config import (GITHUB_TOKEN, AI_PROVIDER, AI_GENERATION_MODE,
+                    BATCH_GITHUB_CONCURRENCY, BATCH_LLM_CONCURRENCY)
 from feedback import feedback_system
 from performance_metrics import performance_metrics
 from knowledge_base import knowledge_base
@@ -36,17 +41,32 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__
     )
-    parser.add_argument('repo_url', help='GitHub repository URL')
+    parser.add_argument('repo_url', nargs='?', help='GitHub repository URL')
     parser.add_argument('--token', help='GitHub personal access token (optional but recommended)')
     parser.add_argument('--provider', choices=['openai', 'groq'], 
                        help='AI provider to use (openai or groq)')
+    parser.add_argument('--mode', choices=['staged', 'fused'],
+                       help='Generation mode: one completion per section (staged) or a single JSON completion (fused)')
     parser.add_argument('--feedback', nargs=2, metavar=('RATING', 'COMMENTS'),
                        help='Provide feedback on the previous generation (rating 1-5 and comments)')
     parser.add_argument('--stats', action='store_true',
                        help='Show system statistics and performance metrics')
+    parser.add_argument('--batch', metavar='FILE',
+                       help='Generate prompts for every repository in FILE (one URL per line, or JSONL)')
+    parser.add_argument('--output', metavar='FILE', default='batch_results.jsonl',
+                       help='JSONL file that batch results are streamed to (default: batch_results.jsonl)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Skip repositories that already succeeded in the batch output file')
+    parser.add_argument('--github-concurrency', type=int, default=BATCH_GITHUB_CONCURRENCY,
+                       help='Repositories analyzed at once in batch mode')
+    parser.add_argument('--llm-concurrency', type=int, default=BATCH_LLM_CONCURRENCY,
+                       help='AI provider calls in flight at once in batch mode')
     
     args = parser.parse_args()
     
+    if not (args.repo_url or args.batch or args.stats or args.feedback):
+        parser.error('a repo_url or --batch FILE is required')
+    
     # Handle stats request
     if args.stats:
         print("\n" + "="*50)
@@ -59,6 +79,20 @@ def main():
         print(f"  Total Operations: {perf_summary['total_operations']}")
         print(f"  Success Rate: {perf_summary['success_rate']:.2f}%")
         print(f"  Average Response Time: {perf_summary['average_response_time']:.2f}s")
+        for title, section in (("Operation", "operation_performance"), ("Provider", "provider_performance"),
+                               ("Stage", "stage_performance")):
+            if perf_summary[section]:
+                print(f"  {title} Latency (p50 / p90 / p99 / max):")
+            for name, stats in sorted(perf_summary[section].items()):
+                print(f"    {name}: {stats['p50']:.2f}s / {stats['p90']:.2f}s / {stats['p99']:.2f}s / {stats['max']:.2f}s")
+        
+        token_usage = perf_summary['token_usage']
+        if token_usage['total']['calls']:
+            print(f"  LLM Tokens: {token_usage['total']['total_tokens']} in {token_usage['total']['calls']} calls "
+                  f"(${token_usage['total']['cost']:.4f})")
+            print("  Tokens by Template (prompt / completion / cost):")
+            for template, usage in token_usage['templates'].items():
+                print(f"    {template}: {usage['prompt_tokens']} / {usage['completion_tokens']} / ${usage['cost']:.4f}")
         
         # Knowledge base stats
         kb_stats = knowledge_base.get_knowledge_stats()
@@ -98,6 +132,11 @@ def main():
             print("Error: Invalid feedback format. Use: --feedback RATING COMMENTS")
             sys.exit(1)
     
+    # Handle batch generation
+    if args.batch:
+        run_batch(args)
+        return
+    
     # Start performance tracking
     operation = performance_metrics.start_operation("mvp_generation", args.provider or AI_PROVIDER)
     
@@ -120,10 +159,17 @@ def main():
             provider = 'openai'
             
         from ai.generator import AIEnhancedGenerator
-        ai_generator = AIEnhancedGenerator(provider)
+        ai_generator = AIEnhancedGenerator(provider, mode=args.mode or AI_GENERATION_MODE)
         prompt = ai_generator.generate_prompt(repo_data, args.repo_url)
         print(f"Using AI provider: {provider}")
         
+        # Show how long each generation stage took
+        if ai_generator.stage_timings:
+            print("Stage timings:")
+            for stage, timing in sorted(ai_generator.stage_timings.items(), key=lambda item: item[1]["start"]):
+                print(f"  {stage}: {timing['duration']:.2f}s (started at +{timing['start']:.2f}s)")
+        performance_metrics.record_stage_timings(ai_generator.stage_timings)
+        
         # End performance tracking
         performance_metrics.end_operation(operation, success=True)
         
@@ -150,5 +196,45 @@ def main():
         traceback.print_exc()
         sys.exit(1)
 
+def run_batch(args):
+    """Generate prompts for every repository listed in a batch file."""
+    from batch import BatchRunner, load_repo_urls
+    
+    provider = args.provider or AI_PROVIDER
+    if provider == 'none':
+        provider = 'openai'
+    
+    try:
+        repo_urls = load_repo_urls(args.batch)
+    except (IOError, ValueError) as e:
+        print(f"Error: Could not read batch file: {e}")
+        sys.exit(1)
+    
+    runner = BatchRunner(
+        provider,
+        github_token=args.token or GITHUB_TOKEN,
+        mode=args.mode or AI_GENERATION_MODE,
+        github_concurrency=args.github_concurrency,
+        llm_concurrency=args.llm_concurrency
+    )
+    print(f"Processing {len(repo_urls)} repositories with {provider} "
+          f"(GitHub concurrency {runner.github_concurrency}, LLM concurrency {runner.llm_concurrency})")
+    summary = runner.run(repo_urls, args.output, resume=args.resume)
+    
+    print("\n" + "="*50)
+    print("BATCH SUMMARY")
+    print("="*50)
+    print(f"  Repositories: {summary['total']}")
+    print(f"  Succeeded: {summary['succeeded']}")
+    print(f"  Failed: {summary['failed']}")
+    print(f"  Skipped (already done): {summary['skipped']}")
+    print(f"  Elapsed: {summary['elapsed']:.2f}s")
+    print(f"  Throughput: {summary['throughput_per_minute']:.2f} repos/min")
+    print(f"  Average Latency: {summary['average_latency']:.2f}s")
+    print(f"  Results: {summary['output_file']}")
+    
+    if summary['failed']:
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
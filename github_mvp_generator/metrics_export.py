@@ -0,0 +1,219 @@
+"""OpenMetrics exposition of the GitHub MVP Generator's metrics."""
+
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from ai.cache import response_cache
+from config import METRICS_PROCESS_TTL
+from github_parser.http_cache import github_http_cache
+from github_parser.freshness import refresh_queue
+from github_parser.session import get_rate_limit
+from jobs import job_queue
+from performance_metrics import LatencyHistogram
+from singleflight import analysis_flight, generation_flight
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Histogram buckets exposed to Prometheus: every fourth log bucket, i.e. powers
+# of two from 1 ms to about 2 minutes. They line up with LatencyHistogram's
+# bucket bounds, so cumulative counts are exact.
+_EXPORT_BUCKET_STEP = 4
+_EXPORT_BUCKET_COUNT = 18
+
+_HISTOGRAM_SECTIONS = (
+    ("operations", "mvp_operation_duration_seconds", "operation", "Duration of whole operations."),
+    ("providers", "mvp_provider_operation_duration_seconds", "provider", "Duration of operations by AI provider."),
+    ("stages", "mvp_stage_duration_seconds", "stage", "Duration of generation stages."),
+    ("spans", "mvp_span_duration_seconds", "span", "Duration of traced spans.")
+)
+
+
+def collect_process_stats() -> Dict[str, Any]:
+    """Get this process's own counters and gauges, saved alongside the shared totals."""
+    llm = response_cache.get_stats()
+    http = github_http_cache.get_stats()
+    jobs = job_queue.get_stats()
+    refresh = refresh_queue.get_stats()
+    return {
+        "counters": {
+            "llm_cache_hits": llm["hits"],
+            "llm_cache_misses": llm["misses"],
+            "github_http_cache_hits": http["hits"],
+            "github_http_cache_not_modified": http["not_modified"],
+            "github_http_cache_misses": http["misses"],
+            "jobs_completed": jobs["completed"],
+            "jobs_failed": jobs["failed"],
+            "analysis_coalesced": analysis_flight.get_stats()["coalesced"],
+            "generation_coalesced": generation_flight.get_stats()["coalesced"]
+        },
+        "gauges": {
+            "job_queue_depth": jobs["queue_depth"],
+            "jobs_in_flight": jobs["in_flight"],
+            "repo_refresh_pending": refresh["pending"]
+        },
+        "github_rate_limit": get_rate_limit()
+    }
+
+
+def aggregate_processes(processes: Dict[str, Dict[str, Any]], retired: Optional[Dict[str, float]] = None,
+                        ttl: float = METRICS_PROCESS_TTL, now: Optional[float] = None) -> Dict[str, Any]:
+    """Combine the per-process stats saved by every worker.
+
+    Counters are summed over every process that ever reported, including
+    those already folded into the retired totals, so they keep growing when a
+    worker is replaced. Gauges are summed over processes whose last save
+    (heartbeat) is less than ttl seconds old. The GitHub rate limit is the
+    most recently observed one.
+    """
+    now = time.time() if now is None else now
+    counters: Dict[str, float] = dict(retired or {})
+    gauges: Dict[str, float] = {}
+    rate_limit: Optional[Dict[str, Any]] = None
+    live = 0
+    for stats in processes.values():
+        for name, value in stats.get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + value
+        if now - stats.get("heartbeat", 0) <= ttl:
+            live += 1
+            for name, value in stats.get("gauges", {}).items():
+                gauges[name] = gauges.get(name, 0) + value
+        observed = stats.get("github_rate_limit")
+        if observed and (rate_limit is None or observed["observed_at"] > rate_limit["observed_at"]):
+            rate_limit = observed
+    gauges["workers"] = live
+    return {"counters": counters, "gauges": gauges, "github_rate_limit": rate_limit}
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(pairs: List[Tuple[str, Any]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Exposition:
+    """Accumulates metric families in OpenMetrics text format."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, value: float, labels: Optional[List[Tuple[str, Any]]] = None):
+        self.lines.append(f"{name}{_labels(labels or [])} {_number(value)}")
+
+    def histogram(self, name: str, histogram: LatencyHistogram, labels: List[Tuple[str, Any]]):
+        """Write cumulative le buckets, count and sum for one histogram."""
+        cumulative = 0
+        counts = sorted(histogram.buckets.items())
+        position = 0
+        for step in range(_EXPORT_BUCKET_COUNT):
+            index = step * _EXPORT_BUCKET_STEP
+            while position < len(counts) and counts[position][0] <= index:
+                cumulative += counts[position][1]
+                position += 1
+            bound = LatencyHistogram.bucket_upper_bound(index)
+            self.sample(f"{name}_bucket", cumulative, labels + [("le", f"{bound:.6g}")])
+        self.sample(f"{name}_bucket", histogram.count, labels + [("le", "+Inf")])
+        self.sample(f"{name}_count", histogram.count, labels)
+        self.sample(f"{name}_sum", histogram.total, labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines + ["# EOF"]) + "\n"
+
+
+def render_openmetrics(snapshot: Dict[str, Any]) -> str:
+    """Render a performance_metrics snapshot (totals plus per-process stats) as OpenMetrics text."""
+    processes = aggregate_processes(snapshot.get("processes", {}), snapshot.get("retired_process_counters"))
+    counters = processes["counters"]
+    gauges = processes["gauges"]
+    out = _Exposition()
+
+    out.family("mvp_http_requests", "counter", "API requests by endpoint and response status.")
+    for endpoint, statuses in sorted(snapshot.get("requests", {}).items()):
+        for status, count in sorted(statuses.items()):
+            out.sample("mvp_http_requests_total", count, [("endpoint", endpoint), ("status", status)])
+
+    out.family("mvp_operations", "counter", "Finished operations by type and result.")
+    for operation, stats in sorted(snapshot.get("operation_types", {}).items()):
+        out.sample("mvp_operations_total", stats.get("success_count", 0), [("operation", operation), ("result", "success")])
+        out.sample("mvp_operations_total", stats.get("failed_count", 0), [("operation", operation), ("result", "failure")])
+
+    out.family("mvp_provider_calls", "counter", "AI provider calls by provider and result.")
+    for provider, results in sorted(snapshot.get("provider_calls", {}).items()):
+        for result in ("success", "error"):
+            out.sample("mvp_provider_calls_total", results.get(result, 0), [("provider", provider), ("result", result)])
+
+    out.family("mvp_provider_error_ratio", "gauge", "Share of AI provider calls that failed.")
+    for provider, results in sorted(snapshot.get("provider_calls", {}).items()):
+        calls = results.get("success", 0) + results.get("error", 0)
+        out.sample("mvp_provider_error_ratio", results.get("error", 0) / calls if calls else 0.0, [("provider", provider)])
+
+    token_usage = snapshot.get("token_usage", {})
+    for section, label in (("templates", "template"), ("models", "model")):
+        out.family(f"mvp_llm_{label}_tokens", "counter", f"LLM tokens by {label} and kind.")
+        for key, usage in sorted(token_usage.get(section, {}).items()):
+            out.sample(f"mvp_llm_{label}_tokens_total", usage["prompt_tokens"], [(label, key), ("kind", "prompt")])
+            out.sample(f"mvp_llm_{label}_tokens_total", usage["completion_tokens"], [(label, key), ("kind", "completion")])
+        out.family(f"mvp_llm_{label}_cost_usd", "counter", f"LLM cost in USD by {label}, from LLM_PRICING.")
+        for key, usage in sorted(token_usage.get(section, {}).items()):
+            out.sample(f"mvp_llm_{label}_cost_usd_total", usage["cost"], [(label, key)])
+
+    latency = snapshot.get("latency", {})
+    for section, name, label, help_text in _HISTOGRAM_SECTIONS:
+        out.family(name, "histogram", help_text)
+        for key, data in sorted(latency.get(section, {}).items()):
+            out.histogram(name, LatencyHistogram.from_dict(data), [(label, key)])
+
+    caches = (
+        ("llm", {"hit": counters.get("llm_cache_hits", 0), "miss": counters.get("llm_cache_misses", 0)}),
+        ("github_http", {
+            "hit": counters.get("github_http_cache_hits", 0),
+            "not_modified": counters.get("github_http_cache_not_modified", 0),
+            "miss": counters.get("github_http_cache_misses", 0)
+        })
+    )
+    out.family("mvp_cache_lookups", "counter", "Cache lookups by cache and result.")
+    for cache, results in caches:
+        for result, count in results.items():
+            out.sample("mvp_cache_lookups_total", count, [("cache", cache), ("result", result)])
+    out.family("mvp_cache_hit_ratio", "gauge", "Share of cache lookups answered without a full fetch.")
+    for cache, results in caches:
+        lookups = sum(results.values())
+        out.sample("mvp_cache_hit_ratio", (lookups - results["miss"]) / lookups if lookups else 0.0, [("cache", cache)])
+
+    out.family("mvp_jobs", "counter", "Finished bulk generation tasks by result.")
+    out.sample("mvp_jobs_total", counters.get("jobs_completed", 0), [("result", "completed")])
+    out.sample("mvp_jobs_total", counters.get("jobs_failed", 0), [("result", "failed")])
+    out.family("mvp_coalesced", "counter", "Requests that shared an in-flight execution.")
+    out.sample("mvp_coalesced_total", counters.get("analysis_coalesced", 0), [("group", "analysis")])
+    out.sample("mvp_coalesced_total", counters.get("generation_coalesced", 0), [("group", "generation")])
+
+    for name, help_text in (
+        ("job_queue_depth", "Bulk generation tasks waiting for a worker."),
+        ("jobs_in_flight", "Bulk generation tasks queued or running."),
+        ("repo_refresh_pending", "Stale repository analyses waiting to be refreshed."),
+        ("workers", "Worker processes reporting metrics.")
+    ):
+        out.family(f"mvp_{name}", "gauge", help_text)
+        out.sample(f"mvp_{name}", gauges.get(name, 0))
+
+    rate_limit = processes["github_rate_limit"]
+    if rate_limit:
+        out.family("mvp_github_rate_limit_remaining", "gauge", "GitHub API requests left in the current window.")
+        out.sample("mvp_github_rate_limit_remaining", rate_limit["remaining"])
+        out.family("mvp_github_rate_limit", "gauge", "GitHub API requests allowed per window.")
+        out.sample("mvp_github_rate_limit", rate_limit["limit"])
+        out.family("mvp_github_rate_limit_reset_timestamp_seconds", "gauge", "When the GitHub rate-limit window resets.")
+        out.sample("mvp_github_rate_limit_reset_timestamp_seconds", rate_limit["reset"])
+
+    return out.render()
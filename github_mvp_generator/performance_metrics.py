@@ -1,32 +1,339 @@
 """Performance metrics system for the GitHub MVP Generator."""
 
+import atexit
+import contextvars
+import copy
+import functools
 import json
+import math
 import os
+import threading
 import time
-from typing import Dict, Any, List
+import uuid
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, List, Optional
 from datetime import datetime
 
+from config import (LLM_PRICING, METRICS_FLUSH_INTERVAL, METRICS_RECENT_OPERATIONS, METRICS_PROCESS_TTL,
+                    METRICS_TOKEN_REPOS)
+from file_store import read_json, update_json
+
+# Counter fields kept per operation type and per provider
+_COUNTER_FIELDS = ("count", "total_time", "success_count", "failed_count")
+
+# Nested {name: {outcome: count}} counters: API requests by endpoint and status,
+# provider calls by provider and result
+_COUNT_SECTIONS = ("requests", "provider_calls")
+
+# Token usage is kept per prompt template, provider/model and repository
+_TOKEN_SECTIONS = ("templates", "models", "repos")
+_TOKEN_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "total_tokens", "cost")
+# Repositories beyond the most expensive token_repos are summed under this name
+OTHER_REPOS = "(other)"
+
+# Latency histograms are kept per operation type, provider, pipeline stage and span name
+_LATENCY_SECTIONS = ("operations", "providers", "stages", "spans")
+
+# Instances with metrics to save at exit; weak so short-lived instances can be collected
+_instances: "weakref.WeakSet[PerformanceMetrics]" = weakref.WeakSet()
+
+# The innermost open span of the current thread or task
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def parse_pricing(text: str) -> Dict[str, Dict[str, float]]:
+    """Parse LLM_PRICING: model -> {"prompt": USD, "completion": USD} per million tokens."""
+    try:
+        pricing = json.loads(text or "{}")
+        return {
+            model: {"prompt": float(rates.get("prompt", 0)), "completion": float(rates.get("completion", 0))}
+            for model, rates in pricing.items()
+        }
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Warning: Ignoring invalid LLM_PRICING: {e}")
+        return {}
+
+
+class LatencyHistogram:
+    """Fixed-memory, mergeable histogram of durations in seconds.
+    
+    Values fall into logarithmic buckets whose upper bounds grow by a factor of
+    2 ** (1/4), so any percentile is reported within about 19% of the true
+    value. Bucket 0 holds everything up to 1 ms; a one-hour duration lands in
+    bucket 88, so a histogram never holds more than about a hundred counters.
+    Two histograms merge by adding their bucket counts.
+    """
+    
+    MIN_VALUE = 0.001
+    GROWTH = 2 ** 0.25
+    
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    @classmethod
+    def bucket_index(cls, value: float) -> int:
+        """Get the bucket a value falls into."""
+        if value <= cls.MIN_VALUE:
+            return 0
+        return math.ceil(math.log(value / cls.MIN_VALUE, cls.GROWTH) - 1e-9)
+    
+    @classmethod
+    def bucket_upper_bound(cls, index: int) -> float:
+        """Get the largest value that falls into a bucket."""
+        return cls.MIN_VALUE * cls.GROWTH ** index
+    
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "LatencyHistogram":
+        """Load a histogram from its persisted form."""
+        histogram = cls()
+        if data:
+            histogram.buckets = {int(index): count for index, count in data.get("buckets", {}).items()}
+            histogram.count = data.get("count", 0)
+            histogram.total = data.get("sum", 0.0)
+            histogram.max = data.get("max", 0.0)
+        return histogram
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the compact persisted form: only non-empty buckets are stored."""
+        return {
+            "buckets": {str(index): self.buckets[index] for index in sorted(self.buckets)},
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max
+        }
+    
+    def record(self, value: float):
+        """Add one duration."""
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+    
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Add another histogram's counts into this one."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+    
+    def percentile(self, q: float) -> float:
+        """Get the value below which a fraction q of the durations fall."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+    
+    def summary(self) -> Dict[str, Any]:
+        """Get the count, mean, p50/p90/p99 and max."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+            "max": self.max
+        }
+
+
+def _histogram(data: Any) -> LatencyHistogram:
+    """Get a live histogram from either a live one or its persisted form."""
+    return data if isinstance(data, LatencyHistogram) else LatencyHistogram.from_dict(data)
+
+
+def _serialize_latency(metrics: Dict[str, Any]):
+    """Replace live histograms with their persisted form, in place."""
+    for histograms in metrics.get("latency", {}).values():
+        for name, histogram in histograms.items():
+            if isinstance(histogram, LatencyHistogram):
+                histograms[name] = histogram.to_dict()
+
+
+class Span:
+    """A timed section of work, nested inside whichever span was open when it started."""
+    
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+    
+    def set(self, key: str, value: Any):
+        """Attach an attribute, e.g. whether a lookup hit the cache."""
+        self.attributes[key] = value
+    
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """Get the span tree with start offsets relative to this span (or origin)."""
+        origin = self.start if origin is None else origin
+        entry = {
+            "name": self.name,
+            "start": self.start - origin,
+            "duration": self.duration
+        }
+        if self.attributes:
+            entry["attributes"] = self.attributes
+        if self.children:
+            entry["children"] = [child.to_dict(origin) for child in sorted(self.children, key=lambda c: c.start)]
+        return entry
+
 
 class PerformanceMetrics:
-    """Tracks and manages performance metrics for the system."""
+    """Tracks and manages performance metrics for the system.
+    
+    Each process accumulates the counters it changed since its last save as a
+    pending delta, and saving adds that delta to the on-disk totals under a file
+    lock. Several API workers can therefore share one metrics file without
+    overwriting each other's counts.
+    
+    Recording an operation only updates memory. A background thread saves the
+    pending delta every flush_interval seconds and once more at exit, so no
+    request waits on the metrics file. The session keeps running totals plus
+    the last recent_operations finished operations, so its memory is bounded
+    however long the process runs. Latency histograms are kept as live
+    LatencyHistogram objects and only serialized when saved or snapshotted.
+    
+    Besides the shared totals, each process saves a snapshot of its own
+    counters and gauges (caches, queues, GitHub rate limit) under "processes",
+    so a scrape served by any worker can report on all of them. Entries are
+    keyed by pid plus a random suffix, so a restarted worker that reuses a pid
+    starts a new entry, and carry the time of their last save as a heartbeat.
+    Any save moves the counters of entries without a heartbeat for
+    process_ttl seconds into "retired_process_counters" and drops them.
+    
+    Token usage per repository keeps only the token_repos most expensive
+    repositories; the rest are summed under OTHER_REPOS, so the totals stay
+    exact while the file and every snapshot stay small.
+    """
     
-    def __init__(self, metrics_file: str = "performance_metrics.json"):
+    def __init__(self, metrics_file: str = "performance_metrics.json",
+                 flush_interval: float = METRICS_FLUSH_INTERVAL,
+                 recent_operations: int = METRICS_RECENT_OPERATIONS,
+                 pricing: Optional[Dict[str, Dict[str, float]]] = None,
+                 process_ttl: float = METRICS_PROCESS_TTL,
+                 token_repos: int = METRICS_TOKEN_REPOS):
         self.metrics_file = metrics_file
+        self.pricing = parse_pricing(LLM_PRICING) if pricing is None else pricing
+        self.flush_interval = flush_interval
+        self.recent_operations = recent_operations
+        self.process_ttl = process_ttl
+        self.token_repos = max(1, token_repos)
         self.metrics_data = self._load_metrics()
-        self.current_session = {
+        self._lock = threading.RLock()
+        # Serializes saves so the flusher and an explicit flush() don't interleave
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._pending = self._empty_delta()
+        self._dirty = False
+        self.current_session = self._new_session()
+        # Returns this process's cache/queue stats for the "processes" section
+        self._process_stats_collector: Optional[Callable[[], Dict[str, Any]]] = None
+        self._saved_process_stats: Optional[Dict[str, Any]] = None
+        # (pid, key) of this process's "processes" entry; a new key after fork
+        self._process_key: Optional[tuple] = None
+        # Counter values already moved into the retired totals by another worker
+        self._counter_offset: Dict[str, float] = {}
+        self._last_heartbeat = 0.0
+        # (mtime, size) of the metrics file and its parsed contents, for scrapes
+        self._snapshot_cache = (None, None)
+        _instances.add(self)
+    
+    def _new_session(self) -> Dict[str, Any]:
+        """Get empty session totals and a bounded buffer of recent operations."""
+        return {
             "start_time": time.time(),
-            "operations": []
+            "completed": 0,
+            "successful": 0,
+            "total_time": 0.0,
+            "operations": deque(maxlen=max(1, self.recent_operations))
         }
     
     def _load_metrics(self) -> Dict[str, Any]:
-        """Load existing metrics from file."""
-        if os.path.exists(self.metrics_file):
-            try:
-                with open(self.metrics_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return self._get_default_metrics()
-        return self._get_default_metrics()
+        """Load existing metrics from file, with live latency histograms."""
+        return self._live_latency(read_json(self.metrics_file, self._get_default_metrics))
+    
+    def _live_latency(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace persisted histograms with live ones, in place."""
+        for histograms in metrics.setdefault("latency", {}).values():
+            for name, histogram in histograms.items():
+                histograms[name] = _histogram(histogram)
+        return metrics
+    
+    def _empty_delta(self) -> Dict[str, Any]:
+        """Get an empty set of pending counter changes."""
+        return {
+            "total_operations": 0,
+            "successful_operations": 0,
+            "failed_operations": 0,
+            "operation_types": {},
+            "provider_performance": {},
+            "latency": {section: {} for section in _LATENCY_SECTIONS},
+            **{section: {} for section in _COUNT_SECTIONS},
+            "token_usage": {section: {} for section in _TOKEN_SECTIONS}
+        }
+    
+    def _merge_delta(self, metrics: Dict[str, Any], delta: Dict[str, Any]):
+        """Add pending counter changes into a metrics structure."""
+        for field in ("total_operations", "successful_operations", "failed_operations"):
+            metrics[field] = metrics.get(field, 0) + delta[field]
+        for section in ("operation_types", "provider_performance"):
+            totals = metrics.setdefault(section, {})
+            for name, counters in delta[section].items():
+                entry = totals.setdefault(name, {field: 0 for field in _COUNTER_FIELDS})
+                for field in _COUNTER_FIELDS:
+                    entry[field] = entry.get(field, 0) + counters[field]
+        latency = metrics.setdefault("latency", {})
+        for section in _LATENCY_SECTIONS:
+            histograms = latency.setdefault(section, {})
+            for name, histogram in delta["latency"][section].items():
+                histograms[name] = _histogram(histograms.get(name)).merge(histogram)
+        for section in _COUNT_SECTIONS:
+            totals = metrics.setdefault(section, {})
+            for name, counts in delta[section].items():
+                entry = totals.setdefault(name, {})
+                for outcome, count in counts.items():
+                    entry[outcome] = entry.get(outcome, 0) + count
+        token_usage = metrics.setdefault("token_usage", {})
+        for section in _TOKEN_SECTIONS:
+            totals = token_usage.setdefault(section, {})
+            for name, usage in delta["token_usage"][section].items():
+                entry = totals.setdefault(name, {field: 0 for field in _TOKEN_FIELDS})
+                for field in _TOKEN_FIELDS:
+                    entry[field] = entry.get(field, 0) + usage[field]
+        self._cap_repos(token_usage)
+    
+    def _cap_repos(self, token_usage: Dict[str, Any]):
+        """Fold all but the token_repos most expensive repositories into OTHER_REPOS, in place."""
+        repos = token_usage.get("repos", {})
+        if len(repos) - (OTHER_REPOS in repos) <= self.token_repos:
+            return
+        other = repos.pop(OTHER_REPOS, None) or {field: 0 for field in _TOKEN_FIELDS}
+        ranked = sorted(repos.items(), key=lambda item: (item[1]["cost"], item[1]["total_tokens"]), reverse=True)
+        for _, usage in ranked[self.token_repos:]:
+            for field in _TOKEN_FIELDS:
+                other[field] += usage[field]
+        token_usage["repos"] = dict(ranked[:self.token_repos])
+        token_usage["repos"][OTHER_REPOS] = other
+    
+    def _compute_average_response_time(self, metrics: Dict[str, Any]) -> float:
+        """Get the mean duration across every operation type."""
+        operation_types = metrics.get("operation_types", {}).values()
+        total_time = sum(stats.get("total_time", 0.0) for stats in operation_types)
+        total_count = sum(stats.get("count", 0) for stats in operation_types)
+        return total_time / total_count if total_count > 0 else 0.0
     
     def _get_default_metrics(self) -> Dict[str, Any]:
         """Get default metrics structure."""
@@ -37,17 +344,321 @@ class PerformanceMetrics:
             "average_response_time": 0.0,
             "provider_performance": {},
             "operation_types": {},
+            "latency": {section: {} for section in _LATENCY_SECTIONS},
+            **{section: {} for section in _COUNT_SECTIONS},
+            "token_usage": {section: {} for section in _TOKEN_SECTIONS},
+            "processes": {},
+            "retired_process_counters": {},
             "last_updated": datetime.now().isoformat()
         }
     
     def _save_metrics(self):
-        """Save metrics to file."""
-        self.metrics_data["last_updated"] = datetime.now().isoformat()
+        """Add this process's pending counter changes to the metrics file.
+        
+        Recording continues into a fresh delta while the file is written, so
+        the lock that recording needs is never held across disk I/O.
+        """
+        with self._flush_lock:
+            process_stats = self._collect_process_stats()
+            now = time.time()
+            with self._lock:
+                process_key = self._current_process_key()
+                heartbeat_due = process_stats is not None and now - self._last_heartbeat >= self.process_ttl / 4
+                if not self._dirty and process_stats == self._saved_process_stats and not heartbeat_due:
+                    return
+                delta = self._pending
+                self._pending = self._empty_delta()
+                self._dirty = False
+                saved_stats = self._saved_process_stats
+                offset = self._counter_offset
+            
+            def merge(metrics):
+                nonlocal offset
+                self._merge_delta(metrics, delta)
+                _serialize_latency(metrics)
+                metrics["average_response_time"] = self._compute_average_response_time(metrics)
+                metrics["last_updated"] = datetime.now().isoformat()
+                self._retire_processes(metrics, now)
+                if process_stats is not None:
+                    processes = metrics.setdefault("processes", {})
+                    offset = self._offset_after_retirement(processes, process_key, saved_stats, offset)
+                    processes[process_key] = self._process_entry(process_stats, offset, now)
+            
+            try:
+                saved = update_json(self.metrics_file, merge, self._get_default_metrics)
+            except IOError as e:
+                # Put the delta back so the next save retries it
+                print(f"Warning: Could not save performance metrics: {e}")
+                with self._lock:
+                    self._merge_delta(delta, self._pending)
+                    self._pending = delta
+                    self._dirty = True
+                return
+            
+            with self._lock:
+                # Adopt the merged totals, which include other workers' counts,
+                # plus whatever was recorded here while the file was written
+                self._live_latency(saved)
+                self._merge_delta(saved, self._pending)
+                saved["average_response_time"] = self._compute_average_response_time(saved)
+                self.metrics_data = saved
+                self._saved_process_stats = process_stats
+                self._counter_offset = offset
+                if process_stats is not None:
+                    self._last_heartbeat = now
+    
+    def flush(self):
+        """Save pending metrics now."""
+        self._save_metrics()
+    
+    def _ensure_flusher(self):
+        """Start the background flusher, restarting it after a fork."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads don't survive fork
+                self._pid = os.getpid()
+                self._flusher = None
+                self._current_process_key()
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run_flusher, name="metrics-flusher", daemon=True)
+                self._flusher.start()
+    
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self._save_metrics()
+            except Exception as e:
+                print(f"Warning: Could not save performance metrics: {e}")
+    
+    def _record(self, op_type: str, provider: str, duration: float, success: bool):
+        """Count a finished operation in both the in-memory totals and the pending delta."""
+        self._dirty = True
+        for metrics in (self.metrics_data, self._pending):
+            metrics["total_operations"] += 1
+            if success:
+                metrics["successful_operations"] += 1
+            else:
+                metrics["failed_operations"] += 1
+            
+            sections = [("operation_types", op_type)]
+            if provider:
+                sections.append(("provider_performance", provider))
+            for section, name in sections:
+                stats = metrics[section].setdefault(name, {field: 0 for field in _COUNTER_FIELDS})
+                stats["count"] += 1
+                stats["total_time"] += duration
+                if success:
+                    stats["success_count"] += 1
+                else:
+                    stats["failed_count"] += 1
+        
+        self._record_latency("operations", op_type, duration)
+        if provider:
+            self._record_latency("providers", provider, duration)
+    
+    def _record_latency(self, section: str, name: str, duration: float):
+        """Add a duration to a histogram in both the in-memory totals and the pending delta."""
+        self._dirty = True
+        for metrics in (self.metrics_data, self._pending):
+            histograms = metrics.setdefault("latency", {}).setdefault(section, {})
+            histogram = histograms.get(name)
+            if histogram is None:
+                histogram = histograms[name] = LatencyHistogram()
+            histogram.record(duration)
+    
+    def _increment(self, section: str, name: str, outcome: str):
+        """Add one to a nested counter in both the in-memory totals and the pending delta."""
+        self._dirty = True
+        for metrics in (self.metrics_data, self._pending):
+            counts = metrics.setdefault(section, {}).setdefault(name, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+    
+    def record_request(self, endpoint: str, status: int):
+        """Count an API request by endpoint and response status."""
+        with self._lock:
+            self._increment("requests", endpoint, str(status))
+        self._ensure_flusher()
+    
+    def record_provider_call(self, provider: str, success: bool):
+        """Count an AI provider call by provider and result."""
+        with self._lock:
+            self._increment("provider_calls", provider, "success" if success else "error")
+    
+    def _cost(self, provider: str, model: str, usage: Dict[str, int]) -> float:
+        """Get the USD cost of a call's tokens, or 0 if the model has no configured price."""
+        rates = self.pricing.get(f"{provider}/{model}") or self.pricing.get(model)
+        if not rates:
+            return 0.0
+        return (usage["prompt_tokens"] * rates["prompt"] + usage["completion_tokens"] * rates["completion"]) / 1_000_000
+    
+    def record_token_usage(self, provider: str, model: str, template: str, repo: str, usage: Dict[str, int]):
+        """Add one provider call's token usage and cost to its template, provider/model and repository."""
+        call = dict(usage, calls=1, cost=self._cost(provider, model, usage))
+        with self._lock:
+            self._dirty = True
+            for metrics in (self.metrics_data, self._pending):
+                token_usage = metrics.setdefault("token_usage", {})
+                for section, name in (("templates", template), ("models", f"{provider}/{model}"), ("repos", repo)):
+                    entry = token_usage.setdefault(section, {}).setdefault(name, {field: 0 for field in _TOKEN_FIELDS})
+                    for field in _TOKEN_FIELDS:
+                        entry[field] += call[field]
+                self._cap_repos(token_usage)
+    
+    def get_token_usage_summary(self, top_repos: int = 10) -> Dict[str, Any]:
+        """Get token totals and cost per template and model, most expensive first, and the top repositories."""
+        with self._lock:
+            token_usage = copy.deepcopy(self.metrics_data.get("token_usage", {}))
+        
+        def ranked(section, limit=None):
+            entries = sorted(((name, usage) for name, usage in token_usage.get(section, {}).items()
+                              if name != OTHER_REPOS),
+                             key=lambda item: (item[1]["cost"], item[1]["total_tokens"]), reverse=True)
+            return dict(entries[:limit] if limit else entries)
+        
+        totals = {field: 0 for field in _TOKEN_FIELDS}
+        for usage in token_usage.get("models", {}).values():
+            for field in _TOKEN_FIELDS:
+                totals[field] += usage[field]
+        return {
+            "total": totals,
+            "templates": ranked("templates"),
+            "models": ranked("models"),
+            "top_repos": ranked("repos", top_repos)
+        }
+    
+    def set_process_stats_collector(self, collector: Callable[[], Dict[str, Any]]):
+        """Set the function that reports this process's own counters and gauges.
+        
+        Its result is saved with each flush under "processes" and must be JSON
+        serializable; it is only written when it changes.
+        """
+        self._process_stats_collector = collector
+    
+    def _current_process_key(self) -> str:
+        """Get this process's key under "processes", starting a fresh entry after fork."""
+        pid = os.getpid()
+        if self._process_key is None or self._process_key[0] != pid:
+            self._process_key = (pid, f"{pid}-{uuid.uuid4().hex[:8]}")
+            self._saved_process_stats = None
+            self._counter_offset = {}
+            self._last_heartbeat = 0.0
+        return self._process_key[1]
+    
+    def _process_entry(self, stats: Dict[str, Any], offset: Dict[str, float], now: float) -> Dict[str, Any]:
+        """Get this process's entry: its stats less the counts already retired, plus a heartbeat."""
+        entry = dict(stats)
+        entry["counters"] = {name: value - offset.get(name, 0) for name, value in stats.get("counters", {}).items()}
+        entry["heartbeat"] = now
+        return entry
+    
+    def _offset_after_retirement(self, processes: Dict[str, Any], key: str,
+                                 saved_stats: Optional[Dict[str, Any]], offset: Dict[str, float]) -> Dict[str, float]:
+        """Get the counter offset to use, given whether this process's saved entry was retired."""
+        if saved_stats is not None and key not in processes:
+            # Our last saved counts now live in the retired totals; only count beyond them
+            return dict(saved_stats.get("counters", {}))
+        return offset
+    
+    def _retire_processes(self, metrics: Dict[str, Any], now: float):
+        """Move the counters of processes whose heartbeat has expired into the retired totals."""
+        processes = metrics.setdefault("processes", {})
+        retired = metrics.setdefault("retired_process_counters", {})
+        for key, entry in list(processes.items()):
+            if now - entry.get("heartbeat", 0) > self.process_ttl:
+                for name, value in entry.get("counters", {}).items():
+                    retired[name] = retired.get(name, 0) + value
+                del processes[key]
+    
+    def _collect_process_stats(self) -> Optional[Dict[str, Any]]:
+        if self._process_stats_collector is None:
+            return None
+        try:
+            return self._process_stats_collector()
+        except Exception as e:
+            print(f"Warning: Could not collect process metrics: {e}")
+            return None
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Get the totals saved by every worker plus this process's unsaved changes.
+        
+        The metrics file is only re-read when it has changed since the last
+        call, so frequent scrapes cost a stat() and a copy.
+        """
+        try:
+            stat = os.stat(self.metrics_file)
+            file_key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            file_key = None
+        cached_key, saved = self._snapshot_cache
+        if saved is None or cached_key != file_key:
+            saved = read_json(self.metrics_file, self._get_default_metrics)
+            self._snapshot_cache = (file_key, saved)
+        
+        snapshot = copy.deepcopy(saved)
+        with self._lock:
+            self._merge_delta(snapshot, self._pending)
+        _serialize_latency(snapshot)
+        process_stats = self._collect_process_stats()
+        if process_stats is not None:
+            processes = snapshot.setdefault("processes", {})
+            with self._lock:
+                key = self._current_process_key()
+                offset = self._offset_after_retirement(processes, key, self._saved_process_stats, self._counter_offset)
+                processes[key] = self._process_entry(process_stats, offset, time.time())
+        return snapshot
+    
+    def record_stage_timings(self, stage_timings: Dict[str, Dict[str, float]]):
+        """Add per-stage durations from a generation; they are persisted with the next save."""
+        with self._lock:
+            for stage, timing in stage_timings.items():
+                self._record_latency("stages", stage, timing["duration"])
+    
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Time a block as a span nested under the currently open one.
+        
+        Spans follow contextvars, so work handed to another thread keeps its
+        place in the tree when it runs under contextvars.copy_context(). Every
+        span's duration also goes into a per-name histogram that is persisted
+        with the next save.
+        """
+        current = Span(name, attributes)
+        parent = _current_span.get()
+        if parent is not None:
+            parent.children.append(current)
+        token = _current_span.set(current)
         try:
-            with open(self.metrics_file, 'w') as f:
-                json.dump(self.metrics_data, f, indent=2)
-        except IOError as e:
-            print(f"Warning: Could not save performance metrics: {e}")
+            yield current
+        except BaseException as e:
+            current.set("error", type(e).__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            current.duration = time.perf_counter() - current.start
+            with self._lock:
+                self._record_latency("spans", name, current.duration)
+    
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorate a function so each call runs in a span."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def reset_session(self):
+        """Start a new session, e.g. in a freshly forked worker process."""
+        with self._lock:
+            self.metrics_data = self._load_metrics()
+            self._pending = self._empty_delta()
+            self._dirty = False
+            self._current_process_key()
+            # Rewrite this process's entry with the next save
+            self._last_heartbeat = 0.0
+            self.current_session = self._new_session()
     
     def start_operation(self, operation_type: str, provider: str = None) -> Dict[str, Any]:
         """Start tracking an operation."""
@@ -57,7 +668,6 @@ class PerformanceMetrics:
             "start_time": time.time(),
             "status": "in_progress"
         }
-        self.current_session["operations"].append(operation)
         return operation
     
     def end_operation(self, operation: Dict[str, Any], success: bool = True, error: str = None):
@@ -68,124 +678,112 @@ class PerformanceMetrics:
         if error:
             operation["error"] = error
         
-        # Update metrics data
-        self.metrics_data["total_operations"] += 1
-        if success:
-            self.metrics_data["successful_operations"] += 1
-        else:
-            self.metrics_data["failed_operations"] += 1
-        
-        # Update operation type stats
-        op_type = operation["operation_type"]
-        if op_type not in self.metrics_data["operation_types"]:
-            self.metrics_data["operation_types"][op_type] = {
-                "count": 0,
-                "total_time": 0.0,
-                "success_count": 0,
-                "failed_count": 0
-            }
-        
-        self.metrics_data["operation_types"][op_type]["count"] += 1
-        self.metrics_data["operation_types"][op_type]["total_time"] += operation["duration"]
-        if success:
-            self.metrics_data["operation_types"][op_type]["success_count"] += 1
-        else:
-            self.metrics_data["operation_types"][op_type]["failed_count"] += 1
-        
-        # Update provider stats if provider is specified
-        if operation["provider"]:
-            provider = operation["provider"]
-            if provider not in self.metrics_data["provider_performance"]:
-                self.metrics_data["provider_performance"][provider] = {
-                    "count": 0,
-                    "total_time": 0.0,
-                    "success_count": 0,
-                    "failed_count": 0
-                }
+        with self._lock:
+            self._record(operation["operation_type"], operation["provider"], operation["duration"], success)
+            self.metrics_data["average_response_time"] = self._compute_average_response_time(self.metrics_data)
             
-            self.metrics_data["provider_performance"][provider]["count"] += 1
-            self.metrics_data["provider_performance"][provider]["total_time"] += operation["duration"]
+            session = self.current_session
+            session["completed"] += 1
+            session["total_time"] += operation["duration"]
             if success:
-                self.metrics_data["provider_performance"][provider]["success_count"] += 1
-            else:
-                self.metrics_data["provider_performance"][provider]["failed_count"] += 1
-        
-        # Update average response time
-        total_time = sum(
-            op.get("duration", 0) for ops in self.metrics_data["operation_types"].values()
-            for op in [ops] if isinstance(op, dict)
-        )
-        total_count = sum(
-            op.get("count", 0) for ops in self.metrics_data["operation_types"].values()
-            for op in [ops] if isinstance(op, dict)
-        )
-        self.metrics_data["average_response_time"] = total_time / total_count if total_count > 0 else 0.0
+                session["successful"] += 1
+            session["operations"].append(operation)
         
-        self._save_metrics()
+        # Saved by the background flusher rather than on the caller's time
+        self._ensure_flusher()
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get a summary of performance metrics."""
-        # Calculate success rates
-        total_ops = self.metrics_data["total_operations"]
-        success_rate = (
-            self.metrics_data["successful_operations"] / total_ops * 100
-            if total_ops > 0 else 0
-        )
-        
-        # Calculate average times for operation types
-        operation_averages = {}
-        for op_type, stats in self.metrics_data["operation_types"].items():
-            count = stats["count"]
-            total_time = stats["total_time"]
-            avg_time = total_time / count if count > 0 else 0
-            success_rate_op = (stats["success_count"] / count * 100) if count > 0 else 0
-            operation_averages[op_type] = {
-                "average_time": avg_time,
-                "success_rate": success_rate_op,
-                "total_count": count
+        # Request threads and the flusher add keys concurrently
+        with self._lock:
+            metrics_data = self.metrics_data
+            
+            # Calculate success rates
+            total_ops = metrics_data["total_operations"]
+            success_rate = (
+                metrics_data["successful_operations"] / total_ops * 100
+                if total_ops > 0 else 0
+            )
+            
+            # Calculate average times for operation types
+            operation_averages = {}
+            for op_type, stats in metrics_data["operation_types"].items():
+                count = stats["count"]
+                total_time = stats["total_time"]
+                avg_time = total_time / count if count > 0 else 0
+                success_rate_op = (stats["success_count"] / count * 100) if count > 0 else 0
+                operation_averages[op_type] = {
+                    "average_time": avg_time,
+                    "success_rate": success_rate_op,
+                    "total_count": count,
+                    **self._latency_percentiles("operations", op_type)
+                }
+            
+            # Calculate provider performance
+            provider_performance = {}
+            for provider, stats in metrics_data["provider_performance"].items():
+                count = stats["count"]
+                total_time = stats["total_time"]
+                avg_time = total_time / count if count > 0 else 0
+                success_rate_prov = (stats["success_count"] / count * 100) if count > 0 else 0
+                provider_performance[provider] = {
+                    "average_time": avg_time,
+                    "success_rate": success_rate_prov,
+                    "total_count": count,
+                    **self._latency_percentiles("providers", provider)
+                }
+            
+            # Latency distribution of each pipeline stage and each kind of span
+            latency = metrics_data.get("latency", {})
+            stage_performance = {
+                stage: _histogram(histogram).summary()
+                for stage, histogram in latency.get("stages", {}).items()
             }
-        
-        # Calculate provider performance
-        provider_performance = {}
-        for provider, stats in self.metrics_data["provider_performance"].items():
-            count = stats["count"]
-            total_time = stats["total_time"]
-            avg_time = total_time / count if count > 0 else 0
-            success_rate_prov = (stats["success_count"] / count * 100) if count > 0 else 0
-            provider_performance[provider] = {
-                "average_time": avg_time,
-                "success_rate": success_rate_prov,
-                "total_count": count
+            span_performance = {
+                name: _histogram(histogram).summary()
+                for name, histogram in latency.get("spans", {}).items()
+            }
+            
+            return {
+                "total_operations": total_ops,
+                "success_rate": success_rate,
+                "failed_operations": metrics_data["failed_operations"],
+                "average_response_time": self._compute_average_response_time(metrics_data),
+                "operation_performance": operation_averages,
+                "provider_performance": provider_performance,
+                "stage_performance": stage_performance,
+                "span_performance": span_performance,
+                "token_usage": self.get_token_usage_summary(),
+                "last_updated": metrics_data["last_updated"]
             }
-        
-        return {
-            "total_operations": total_ops,
-            "success_rate": success_rate,
-            "failed_operations": self.metrics_data["failed_operations"],
-            "average_response_time": self.metrics_data["average_response_time"],
-            "operation_performance": operation_averages,
-            "provider_performance": provider_performance,
-            "last_updated": self.metrics_data["last_updated"]
-        }
+    
+    def _latency_percentiles(self, section: str, name: str) -> Dict[str, float]:
+        """Get p50/p90/p99/max for one histogram."""
+        summary = _histogram(self.metrics_data.get("latency", {}).get(section, {}).get(name)).summary()
+        return {key: summary[key] for key in ("p50", "p90", "p99", "max")}
     
     def get_session_summary(self) -> Dict[str, Any]:
         """Get a summary of the current session."""
-        completed_ops = [op for op in self.current_session["operations"] if op["status"] != "in_progress"]
-        if not completed_ops:
-            return {"message": "No operations completed in this session"}
-        
-        total_time = sum(op["duration"] for op in completed_ops)
-        avg_time = total_time / len(completed_ops)
-        
-        success_count = sum(1 for op in completed_ops if op["status"] == "success")
-        success_rate = success_count / len(completed_ops) * 100
-        
-        return {
-            "session_duration": time.time() - self.current_session["start_time"],
-            "operations_completed": len(completed_ops),
-            "average_response_time": avg_time,
-            "success_rate": success_rate
-        }
+        with self._lock:
+            session = self.current_session
+            completed = session["completed"]
+            if not completed:
+                return {"message": "No operations completed in this session"}
+            
+            return {
+                "session_duration": time.time() - session["start_time"],
+                "operations_completed": completed,
+                "average_response_time": session["total_time"] / completed,
+                "success_rate": session["successful"] / completed * 100,
+                "recent_operations": list(session["operations"])
+            }
+
+
+@atexit.register
+def _flush_all():
+    """Save every instance's buffered metrics when the process exits."""
+    for metrics in list(_instances):
+        metrics.flush()
 
 
 # Global performance metrics instance
@@ -0,0 +1,110 @@
+"""End-to-end generation pipeline shared by the CLI, batch runner and API."""
+
+import hashlib
+import time
+from typing import Callable, Dict, Any, Optional
+
+from config import GITHUB_TOKEN, AI_GENERATION_MODE
+from github_parser.analyzer import GitHubRepoAnalyzer
+from github_parser.repo_id import repo_key
+from performance_metrics import performance_metrics
+from singleflight import analysis_flight, generation_flight
+
+
+def credentials_key(github_token: Optional[str] = None) -> str:
+    """Fingerprint the GitHub token a call runs with, so coalescing never crosses credentials."""
+    return hashlib.sha256((github_token or GITHUB_TOKEN or "").encode('utf-8')).hexdigest()[:16]
+
+
+def analyze_repository(repo_url: str, github_token: Optional[str] = None) -> Dict[str, Any]:
+    """Analyze a repository, using cached analysis where it is still fresh.
+
+    Concurrent analyses of the same canonical repository with the same GitHub
+    token share one execution.
+    """
+    def analyze():
+        analyzer = GitHubRepoAnalyzer(github_token or GITHUB_TOKEN)
+        return analyzer.analyze_repo(repo_url)
+
+    return analysis_flight.do((repo_key(repo_url), credentials_key(github_token)), analyze)
+
+
+def generate_for_repo(repo_url: str, provider: str, github_token: Optional[str] = None,
+                      mode: str = AI_GENERATION_MODE, repo_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analyze a repository and generate its MVP prompt.
+
+    Returns a result dict with the prompt, per-stage timings and how long the
+    analysis and generation phases took. Pass repo_data to skip the analysis.
+    Concurrent generations of the same canonical repository with the same
+    provider, mode and GitHub token share one execution.
+    """
+    def generate():
+        return _generate(repo_url, provider, github_token, mode, repo_data)
+
+    result = generation_flight.do((repo_key(repo_url), provider, mode, credentials_key(github_token)), generate)
+    # Coalesced callers each get their own copy to annotate
+    return dict(result, repo_url=repo_url)
+
+
+def stream_for_repo(repo_url: str, provider: str, github_token: Optional[str] = None,
+                    mode: str = AI_GENERATION_MODE,
+                    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Generate a repository's MVP prompt, reporting progress through on_event.
+
+    on_event receives an "analysis" event once the repository is analyzed,
+    then the generator's "section" and "token" events. The analysis is still
+    coalesced, but the generation isn't: every caller needs its own events.
+    """
+    return _generate(repo_url, provider, github_token, mode, None, on_event)
+
+
+def _generate(repo_url: str, provider: str, github_token: Optional[str], mode: str,
+              repo_data: Optional[Dict[str, Any]],
+              on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Run the analysis and generation phases for one repository.
+
+    The whole run is traced as a span tree, returned under "timings": the
+    analysis with each GitHub request, every generation stage with its cache
+    lookups and provider calls, and the final formatting.
+    """
+    from ai.generator import AIEnhancedGenerator
+
+    operation = performance_metrics.start_operation("mvp_generation", provider)
+    start = time.perf_counter()
+    try:
+        with performance_metrics.span("pipeline.generate", provider=provider, mode=mode) as trace:
+            with performance_metrics.span("pipeline.analysis"):
+                if repo_data is None:
+                    repo_data = analyze_repository(repo_url, github_token)
+            analyzed = time.perf_counter()
+            if on_event is not None:
+                on_event("analysis", {
+                    "repo_id": repo_key(repo_url),
+                    "name": repo_data.get("name", ""),
+                    "language": repo_data.get("language", ""),
+                    "frameworks": repo_data.get("frameworks", [])
+                })
+
+            ai_generator = AIEnhancedGenerator(provider, mode=mode)
+            with performance_metrics.span("pipeline.generation"):
+                prompt = ai_generator.generate_prompt(repo_data, repo_url, on_event=on_event)
+        finished = time.perf_counter()
+    except Exception as e:
+        performance_metrics.end_operation(operation, success=False, error=str(e))
+        raise
+
+    # Stage latencies are saved along with the operation
+    performance_metrics.record_stage_timings(ai_generator.stage_timings)
+    performance_metrics.end_operation(operation, success=True)
+    return {
+        "repo_url": repo_url,
+        "repo_id": repo_key(repo_url),
+        "provider": provider,
+        "mode": mode,
+        "prompt": prompt,
+        "stage_timings": ai_generator.stage_timings,
+        "timings": trace.to_dict(),
+        "analysis_time": analyzed - start,
+        "generation_time": finished - analyzed,
+        "duration": finished - start
+    }
@@ -0,0 +1,78 @@
+"""Request coalescing so concurrent callers share one execution of the same work."""
+
+import os
+import threading
+from typing import Dict, Any, Callable, Hashable
+
+
+class _Call:
+    """An in-flight execution and the outcome its waiters will receive."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Runs a function once per key at a time, sharing the outcome with concurrent callers.
+
+    The first caller for a key executes the function; callers that arrive
+    while it is running wait and receive the same result or exception. Once
+    the call finishes the key is forgotten, so later callers run it afresh.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._pid = os.getpid()
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for the execution already in flight for it."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Executions in flight in the parent will never finish here
+                self._reset()
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executions"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get execution and coalescing counts."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+# Global coalescing groups for repository analysis and prompt generation
+analysis_flight = SingleFlight("analysis")
+generation_flight = SingleFlight("generation")
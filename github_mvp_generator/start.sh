@@ -12,8 +12,9 @@ export PORT=${PORT:-10000}
 
 echo "Starting GitHub MVP Generator Backend API..."
 echo "API will be available at: http://0.0.0.0:$PORT"
+echo "Workers: ${WEB_CONCURRENCY:-$(nproc)}, threads per worker: ${WEB_THREADS:-8}"
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-# Start the API server
-python api.py
\ No newline at end of file
+# Start the API server under gunicorn (settings in gunicorn.conf.py)
+exec gunicorn -c gunicorn.conf.py wsgi:application
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""Test package setup: keep the suite's metrics out of the tracked performance_metrics.json.
+
+Spans and operations recorded through the global performance_metrics instance
+would otherwise be saved to the real file by the background flusher and the
+exit-time flush. They go to a temporary file instead.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from performance_metrics import performance_metrics  # noqa: E402
+
+_metrics_dir = tempfile.mkdtemp(prefix="mvp-test-metrics-")
+performance_metrics.metrics_file = os.path.join(_metrics_dir, "performance_metrics.json")
+
+
+@atexit.register
+def _remove_metrics_dir():
+    """Save what the suite recorded, leaving the exit-time flush nothing to write, then remove the directory.
+
+    performance_metrics may have been imported (and its own exit handler
+    registered) before this package, so that handler can run after this one.
+    """
+    performance_metrics.flush()
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
@@ -0,0 +1,60 @@
+"""Local stand-in for the GitHub API used by the analyzer tests."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GitHubStub:
+    """Serves canned JSON responses for GitHub API paths on localhost.
+    
+    `routes` maps a request path to a list of (status, body[, headers])
+    tuples; each request to that path consumes the next tuple, repeating the
+    last one. A body of None sends an empty response.
+    """
+    
+    def __init__(self, routes):
+        self.routes = {path: list(responses) for path, responses in routes.items()}
+        self.requests = []
+        self.connections = set()
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                stub.requests.append((self.command, self.path, dict(self.headers), body))
+                stub.connections.add(self.client_address)
+                responses = stub.routes.get(self.path) or [(404, {'message': 'Not Found'})]
+                status, payload, *extra = responses.pop(0) if len(responses) > 1 else responses[0]
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                for name, value in (extra[0] if extra else {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            do_GET = _respond
+            do_POST = _respond
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def paths(self):
+        return [path for _, path, _, _ in self.requests]
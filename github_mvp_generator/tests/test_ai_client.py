@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.cache import ResponseCache
+from ai.client import AIClient, AIProvider
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class AsyncChunks:
+    """Async iterator over canned stream chunks, like the SDK's AsyncStream."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+async def _collect(stream):
+    return [delta async for delta in stream]
+
+
+class SyncOnlyProvider(AIProvider):
+
+    def generate_text(self, prompt, **kwargs):
+        return f"sync:{prompt}"
+
+    def get_model_name(self):
+        return "sync-model"
+
+
+class TestAsyncProviderInterface(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('ai.client.response_cache', ResponseCache(enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_default_agenerate_text_runs_sync_provider(self):
+        provider = SyncOnlyProvider()
+        self.assertEqual(asyncio.run(provider.agenerate_text("hi")), "sync:hi")
+
+    def test_ai_client_agenerate_text_uses_provider(self):
+        with mock.patch.object(AIClient, '_initialize_client', return_value=SyncOnlyProvider()):
+            client = AIClient("openai")
+
+        async def generate_many():
+            return await asyncio.gather(*(client.agenerate_text(str(i)) for i in range(20)))
+
+        self.assertEqual(asyncio.run(generate_many()), [f"sync:{i}" for i in range(20)])
+
+    def test_groq_provider_uses_native_async_client(self):
+        from ai.providers.groq import GroqProvider
+
+        with mock.patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'}):
+            provider = GroqProvider()
+
+        create = mock.AsyncMock(return_value=_completion("  async answer \n"))
+        provider._async_client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        result = asyncio.run(provider.agenerate_text("prompt", temperature=0.1))
+
+        self.assertEqual(result, "async answer")
+        params = create.call_args.kwargs
+        self.assertEqual(params['messages'], [{'role': 'user', 'content': 'prompt'}])
+        self.assertEqual(params['temperature'], 0.1)
+        self.assertEqual(params['max_tokens'], 1000)
+
+
+class TestStreamingInterface(unittest.TestCase):
+
+    CHUNKS = [_chunk("Hello"), _chunk(None), _chunk(", world"), SimpleNamespace(choices=[])]
+
+    def setUp(self):
+        patcher = mock.patch('ai.client.response_cache', ResponseCache(enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _openai(self):
+        from ai.providers.openai import OpenAIProvider
+
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            return OpenAIProvider()
+
+    def test_default_stream_yields_whole_response(self):
+        provider = SyncOnlyProvider()
+        self.assertEqual(list(provider.stream_text("hi")), ["sync:hi"])
+        self.assertEqual(asyncio.run(_collect(provider.astream_text("hi"))), ["sync:hi"])
+
+    def test_openai_stream_text_yields_deltas(self):
+        provider = self._openai()
+        create = mock.Mock(return_value=iter(self.CHUNKS))
+        provider.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        self.assertEqual(list(provider.stream_text("prompt", max_tokens=50)), ["Hello", ", world"])
+        self.assertTrue(create.call_args.kwargs['stream'])
+        self.assertEqual(create.call_args.kwargs['max_tokens'], 50)
+
+    def test_openai_astream_text_yields_deltas(self):
+        provider = self._openai()
+        create = mock.AsyncMock(return_value=AsyncChunks(self.CHUNKS))
+        provider._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        self.assertEqual(asyncio.run(_collect(provider.astream_text("prompt"))), ["Hello", ", world"])
+        self.assertTrue(create.call_args.kwargs['stream'])
+
+    def test_client_astream_text_caches_the_full_response(self):
+        cache = ResponseCache(enabled=True, cache_dir=os.devnull)
+        provider = self._openai()
+        create = mock.AsyncMock(return_value=AsyncChunks(self.CHUNKS))
+        provider._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        with mock.patch('ai.client.response_cache', cache), \
+                mock.patch.object(AIClient, '_initialize_client', return_value=provider), \
+                mock.patch('builtins.print'):
+            client = AIClient("openai")
+            self.assertEqual(asyncio.run(_collect(client.astream_text("prompt"))), ["Hello", ", world"])
+            self.assertEqual(asyncio.run(_collect(client.astream_text("prompt"))), ["Hello, world"])
+        create.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
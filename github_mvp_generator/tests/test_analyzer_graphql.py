@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_parser.analyzer import GitHubRepoAnalyzer
+from github_parser.session import create_github_session
+from knowledge_base import KnowledgeBase
+from tests.github_stub import GitHubStub
+
+
+GRAPHQL_RESPONSE = {
+    'data': {
+        'repository': {
+            'name': 'react',
+            'description': 'UI library',
+            'stargazerCount': 10,
+            'forkCount': 2,
+            'languages': {'edges': [
+                {'size': 1000, 'node': {'name': 'JavaScript'}},
+                {'size': 10, 'node': {'name': 'TypeScript'}}
+            ]},
+            'object': {'entries': [
+                {'name': 'package.json', 'path': 'package.json', 'type': 'blob'},
+                {'name': 'src', 'path': 'src', 'type': 'tree'}
+            ]}
+        }
+    }
+}
+
+
+class TestAnalyzerGraphQL(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        kb = KnowledgeBase(os.path.join(self.tmp.name, 'knowledge_base.json'))
+        patcher = mock.patch('github_parser.analyzer.knowledge_base', kb)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _analyzer(self, stub, token='token'):
+        for name, value in [('GITHUB_API_URL', stub.url), ('GITHUB_GRAPHQL_URL', f'{stub.url}/graphql')]:
+            patcher = mock.patch(f'github_parser.analyzer.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        session = create_github_session(max_retries=0)
+        return GitHubRepoAnalyzer(token, session=session, use_graphql=True)
+
+    def test_analysis_uses_one_graphql_request(self):
+        with GitHubStub({'/graphql': [(200, GRAPHQL_RESPONSE)]}) as stub:
+            result = self._analyzer(stub).analyze_repo('https://github.com/facebook/react')
+
+        self.assertEqual(stub.paths(), ['/graphql'])
+        method, _, headers, body = stub.requests[0]
+        self.assertEqual(method, 'POST')
+        self.assertEqual(headers.get('Authorization'), 'token token')
+        self.assertEqual(json.loads(body)['variables'], {'owner': 'facebook', 'name': 'react'})
+
+        self.assertEqual(result['name'], 'react')
+        self.assertEqual(result['description'], 'UI library')
+        self.assertEqual(result['language'], 'JavaScript')
+        self.assertEqual((result['stars'], result['forks']), (10, 2))
+        self.assertEqual(result['contents'], [
+            {'name': 'package.json', 'path': 'package.json', 'type': 'file'},
+            {'name': 'src', 'path': 'src', 'type': 'dir'}
+        ])
+        self.assertIn('React', result['frameworks'])
+
+    def test_graphql_errors_fall_back_to_rest(self):
+        with GitHubStub({
+            '/graphql': [(200, {'errors': [{'message': 'Could not resolve to a Repository'}]})],
+            '/repos/facebook/react': [(200, {'name': 'react', 'stargazers_count': 3, 'forks_count': 1})],
+            '/repos/facebook/react/contents/': [(200, [{'name': 'setup.py', 'type': 'file'}])],
+            '/repos/facebook/react/languages': [(200, {'Python': 5})],
+        }) as stub:
+            result = self._analyzer(stub).analyze_repo('https://github.com/facebook/react')
+
+        self.assertEqual(stub.paths()[0], '/graphql')
+        self.assertEqual(len(stub.requests), 4)
+        self.assertEqual(result['language'], 'Python')
+        self.assertEqual(result['stars'], 3)
+
+    def test_graphql_requires_a_token(self):
+        self.assertFalse(GitHubRepoAnalyzer(None, use_graphql=True).use_graphql)
+
+
+if __name__ == '__main__':
+    unittest.main()
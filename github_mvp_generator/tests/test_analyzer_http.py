@@ -0,0 +1,141 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_parser.analyzer import GitHubRepoAnalyzer
+from github_parser.session import create_github_session, get_github_session, get_rate_limit
+from knowledge_base import KnowledgeBase
+from tests.github_stub import GitHubStub
+
+
+REPO_INFO = {'name': 'react', 'description': 'UI library', 'stargazers_count': 10, 'forks_count': 2}
+CONTENTS = [{'name': 'package.json', 'type': 'file'}, {'name': 'src', 'type': 'dir'}]
+LANGUAGES = {'JavaScript': 1000, 'TypeScript': 10}
+
+
+class TestAnalyzerHTTP(unittest.TestCase):
+
+    def _analyzer(self, stub, **kwargs):
+        patcher = mock.patch('github_parser.analyzer.GITHUB_API_URL', stub.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session = create_github_session(pool_size=2, max_retries=2, backoff_factor=0)
+        return GitHubRepoAnalyzer(session=session, **kwargs)
+
+    def test_analyzers_share_the_default_session(self):
+        self.assertIs(GitHubRepoAnalyzer().session, get_github_session())
+        self.assertIs(GitHubRepoAnalyzer('token').session, GitHubRepoAnalyzer().session)
+
+    def test_requests_reuse_one_keep_alive_connection(self):
+        with GitHubStub({
+            '/repos/facebook/react': [(200, REPO_INFO)],
+            '/repos/facebook/react/contents/': [(200, CONTENTS)],
+            '/repos/facebook/react/languages': [(200, LANGUAGES)],
+        }) as stub:
+            analyzer = self._analyzer(stub)
+            self.assertEqual(analyzer.get_repo_info('facebook', 'react')['name'], 'react')
+            self.assertEqual(analyzer.get_repo_contents('facebook', 'react'), CONTENTS)
+            self.assertEqual(analyzer.get_primary_language('facebook', 'react'), 'JavaScript')
+
+        self.assertEqual(len(stub.connections), 1)
+
+    def test_server_errors_are_retried(self):
+        with GitHubStub({'/repos/facebook/react': [(503, {}), (502, {}), (200, REPO_INFO)]}) as stub:
+            analyzer = self._analyzer(stub)
+            self.assertEqual(analyzer.get_repo_info('facebook', 'react'), REPO_INFO)
+
+        self.assertEqual(len(stub.requests), 3)
+
+    def test_unauthorized_token_retries_anonymously(self):
+        with GitHubStub({'/repos/facebook/react': [(401, {}), (200, REPO_INFO)]}) as stub:
+            analyzer = self._analyzer(stub, github_token='bad-token')
+            self.assertEqual(analyzer.get_repo_info('facebook', 'react'), REPO_INFO)
+
+        first_headers, second_headers = stub.requests[0][2], stub.requests[1][2]
+        self.assertEqual(first_headers.get('Authorization'), 'token bad-token')
+        self.assertNotIn('Authorization', second_headers)
+
+    def test_rate_limit_headers_are_recorded(self):
+        headers = {'X-RateLimit-Remaining': '4987', 'X-RateLimit-Limit': '5000', 'X-RateLimit-Reset': '1700000000'}
+        with GitHubStub({'/repos/facebook/react': [(200, REPO_INFO, headers)]}) as stub:
+            analyzer = self._analyzer(stub)
+            analyzer.get_repo_info('facebook', 'react')
+
+        rate_limit = get_rate_limit()
+        self.assertEqual((rate_limit['remaining'], rate_limit['limit'], rate_limit['reset']), (4987, 5000, 1700000000))
+
+    def test_client_errors_raise(self):
+        with GitHubStub({'/repos/facebook/missing': [(404, {'message': 'Not Found'})]}) as stub:
+            analyzer = self._analyzer(stub)
+            with self.assertRaises(Exception):
+                analyzer.get_repo_info('facebook', 'missing')
+
+
+class TestRestFanOut(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        kb = KnowledgeBase(os.path.join(self.tmp.name, 'knowledge_base.json'))
+        patcher = mock.patch('github_parser.analyzer.knowledge_base', kb)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _analyze(self, routes):
+        with GitHubStub(routes) as stub, mock.patch('github_parser.analyzer.GITHUB_API_URL', stub.url):
+            session = create_github_session(max_retries=0)
+            analyzer = GitHubRepoAnalyzer(session=session, use_graphql=False)
+            return analyzer.analyze_repo('https://github.com/facebook/react'), stub
+
+    def test_calls_are_issued_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+        analyzer = GitHubRepoAnalyzer(use_graphql=False)
+
+        def fetch(result):
+            def call(owner, repo):
+                barrier.wait()  # only passes once all three calls are in flight
+                return result
+            return call
+
+        with mock.patch.object(analyzer, 'get_repo_info', fetch(REPO_INFO)), \
+                mock.patch.object(analyzer, 'get_repo_contents', fetch(CONTENTS)), \
+                mock.patch.object(analyzer, 'get_repo_languages', fetch(LANGUAGES)):
+            data = analyzer.get_repo_data_rest('facebook', 'react')
+
+        self.assertEqual(data, {'repo_info': REPO_INFO, 'contents': CONTENTS, 'languages': LANGUAGES})
+
+    def test_failed_languages_call_degrades_to_no_language(self):
+        result, _ = self._analyze({
+            '/repos/facebook/react': [(200, REPO_INFO)],
+            '/repos/facebook/react/contents/': [(200, CONTENTS)],
+            '/repos/facebook/react/languages': [(500, {})],
+        })
+        self.assertIsNone(result['language'])
+        self.assertEqual(result['contents'], CONTENTS)
+
+    def test_failed_contents_call_degrades_to_empty_contents(self):
+        result, _ = self._analyze({
+            '/repos/facebook/react': [(200, REPO_INFO)],
+            '/repos/facebook/react/contents/': [(403, {'message': 'forbidden'})],
+            '/repos/facebook/react/languages': [(200, LANGUAGES)],
+        })
+        self.assertEqual(result['contents'], [])
+        self.assertEqual(result['language'], 'JavaScript')
+
+    def test_failed_repo_info_fails_the_analysis(self):
+        with self.assertRaises(Exception):
+            self._analyze({
+                '/repos/facebook/react': [(404, {'message': 'Not Found'})],
+                '/repos/facebook/react/contents/': [(200, CONTENTS)],
+                '/repos/facebook/react/languages': [(200, LANGUAGES)],
+            })
+
+
+if __name__ == '__main__':
+    unittest.main()
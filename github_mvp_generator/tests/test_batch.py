@@ -0,0 +1,174 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.cache import ResponseCache
+from ai.client import AIClient, AIProvider, set_llm_concurrency
+from batch import BatchRunner, load_completed, load_repo_urls
+
+
+class ConcurrencyProbe:
+    """Records the peak number of overlapping calls."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+
+
+class SlowProvider(AIProvider):
+
+    def __init__(self, probe):
+        self.probe = probe
+
+    def generate_text(self, prompt, **kwargs):
+        self.probe()
+        return f"text:{prompt}"
+
+    def get_model_name(self):
+        return "slow-model"
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output = os.path.join(self.tmp.name, 'results.jsonl')
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def _fake_generate(self, repo_url, provider, github_token=None, mode='staged', repo_data=None):
+        if 'broken' in repo_url:
+            raise RuntimeError('generation failed')
+        return {"repo_url": repo_url, "repo_id": repo_url.split('github.com/')[1].lower(),
+                "provider": provider, "prompt": f"prompt for {repo_url}"}
+
+    def _run(self, urls, resume=False, analyze=None, **kwargs):
+        with mock.patch('batch.analyze_repository', analyze or (lambda url, token=None: {})), \
+                mock.patch('batch.generate_for_repo', self._fake_generate), \
+                mock.patch('builtins.print'):
+            return BatchRunner('openai', **kwargs).run(urls, self.output, resume=resume)
+
+    def _results(self):
+        with open(self.output) as f:
+            return [json.loads(line) for line in f]
+
+    def test_load_repo_urls_accepts_plain_lines_and_jsonl(self):
+        path = self._write('repos.txt', "\n".join([
+            "# nightly batch",
+            "https://github.com/facebook/react",
+            "",
+            '{"repo_url": "https://github.com/pallets/flask"}',
+            '"https://github.com/psf/requests"',
+        ]))
+        self.assertEqual(load_repo_urls(path), [
+            "https://github.com/facebook/react",
+            "https://github.com/pallets/flask",
+            "https://github.com/psf/requests",
+        ])
+
+    def test_load_repo_urls_rejects_json_without_url(self):
+        path = self._write('repos.jsonl', '{"name": "react"}\n')
+        with self.assertRaises(ValueError):
+            load_repo_urls(path)
+
+    def test_results_are_streamed_and_failures_recorded(self):
+        summary = self._run([
+            "https://github.com/facebook/react",
+            "https://github.com/example/broken",
+            "https://github.com/Facebook/React/",
+        ])
+
+        results = {r["repo_url"]: r for r in self._results()}
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results["https://github.com/facebook/react"]["status"], "ok")
+        self.assertEqual(results["https://github.com/example/broken"]["status"], "error")
+        self.assertEqual(results["https://github.com/example/broken"]["error"], "generation failed")
+        self.assertEqual((summary["total"], summary["succeeded"], summary["failed"]), (2, 1, 1))
+        self.assertGreater(summary["throughput_per_minute"], 0)
+
+    def test_resume_skips_repositories_that_already_succeeded(self):
+        urls = ["https://github.com/facebook/react", "https://github.com/example/broken"]
+        self._run(urls)
+        self.assertEqual(load_completed(self.output), {"facebook/react"})
+
+        summary = self._run(urls, resume=True)
+
+        self.assertEqual((summary["skipped"], summary["succeeded"], summary["failed"]), (1, 0, 1))
+        # The original results are kept and the retried failure is appended
+        self.assertEqual([r["status"] for r in self._results()], ["ok", "error", "error"])
+
+    def test_resume_drops_a_torn_last_line_before_appending(self):
+        urls = ["https://github.com/facebook/react", "https://github.com/pallets/flask"]
+        self._run(urls[:1])
+        with open(self.output, 'a') as f:
+            f.write('{"repo_url": "https://github.com/pallets/flask", "sta')
+
+        summary = self._run(urls, resume=True)
+
+        self.assertEqual((summary["skipped"], summary["succeeded"]), (1, 1))
+        self.assertEqual([r["repo_url"] for r in self._results()], urls)
+        self.assertEqual(load_completed(self.output), {"facebook/react", "pallets/flask"})
+
+    def test_github_concurrency_is_bounded(self):
+        probe = ConcurrencyProbe()
+        urls = [f"https://github.com/owner/repo{i}" for i in range(8)]
+
+        self._run(urls, analyze=lambda url, token=None: probe(), github_concurrency=2, llm_concurrency=4)
+
+        self.assertEqual(probe.peak, 2)
+
+
+class TestLLMConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('ai.client.response_cache', ResponseCache(enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(set_llm_concurrency, None)
+
+    def _run_calls(self, probe, count):
+        with mock.patch.object(AIClient, '_initialize_client', return_value=SlowProvider(probe)):
+            client = AIClient('openai')
+        threads = [threading.Thread(target=client.generate_text, args=(f"p{i}",)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_provider_calls_are_limited_across_threads(self):
+        set_llm_concurrency(2)
+        probe = ConcurrencyProbe()
+        self._run_calls(probe, 6)
+        self.assertEqual(probe.peak, 2)
+
+    def test_unlimited_by_default(self):
+        probe = ConcurrencyProbe()
+        self._run_calls(probe, 4)
+        self.assertEqual(probe.peak, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
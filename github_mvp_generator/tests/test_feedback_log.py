@@ -0,0 +1,140 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedback import FeedbackSystem
+
+
+class TestFeedbackLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.legacy_file = os.path.join(self.tmp.name, 'feedback.json')
+        self.log_file = os.path.join(self.tmp.name, 'feedback.jsonl')
+        patcher = mock.patch('builtins.print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _system(self, **kwargs):
+        return FeedbackSystem(self.legacy_file, **kwargs)
+
+    def _log_lines(self):
+        with open(self.log_file) as f:
+            return f.readlines()
+
+    def test_submission_appends_one_line(self):
+        feedback = self._system()
+        feedback.submit_feedback("https://github.com/facebook/react", 5, "Great")
+        feedback.submit_feedback("https://github.com/pallets/flask", 3)
+
+        lines = self._log_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["repo_url"], "https://github.com/pallets/flask")
+        self.assertFalse(os.path.exists(self.legacy_file))
+
+    def test_legacy_feedback_is_migrated_once(self):
+        with open(self.legacy_file, 'w') as f:
+            json.dump({"feedback_entries": [
+                {"timestamp": "2025-09-07T19:32:37", "repo_url": "https://github.com/test/repo", "rating": 4,
+                 "comments": "", "improvements": ""},
+                {"timestamp": "2025-09-07T23:25:05", "repo_url": "https://github.com/microsoft/qlib", "rating": 2,
+                 "comments": "", "improvements": ""},
+            ]}, f)
+
+        feedback = self._system()
+        self.assertEqual(feedback.get_feedback_summary()["total_feedback"], 2)
+        self.assertEqual(feedback.get_average_rating(), 3.0)
+
+        feedback.submit_feedback("https://github.com/test/repo", 5)
+        # Reopening reads the log; the legacy file isn't imported again
+        reopened = self._system()
+        self.assertEqual(reopened.get_feedback_summary()["total_feedback"], 3)
+        self.assertEqual(len(reopened.get_feedback_for_repo("https://github.com/Test/Repo/")), 2)
+
+    def test_aggregates_are_rebuilt_from_the_log(self):
+        feedback = self._system()
+        for rating in (1, 5, 5, 4):
+            feedback.submit_feedback("https://github.com/facebook/react", rating)
+
+        summary = self._system().get_feedback_summary()
+        self.assertEqual(summary["total_feedback"], 4)
+        self.assertEqual(summary["average_rating"], 3.75)
+        self.assertEqual(summary["rating_distribution"], {1: 1, 2: 0, 3: 0, 4: 1, 5: 2})
+        self.assertEqual([entry["rating"] for entry in summary["recent_feedback"]], [1, 5, 5, 4])
+
+    def test_other_writers_are_picked_up_incrementally(self):
+        reader = self._system()
+        writer = self._system()
+        writer.submit_feedback("https://github.com/facebook/react", 4)
+        self.assertEqual(reader.get_feedback_summary()["total_feedback"], 1)
+        writer.submit_feedback("https://github.com/facebook/react", 2)
+        self.assertEqual(reader.get_average_rating(), 3.0)
+
+    def test_torn_and_invalid_lines_are_skipped_and_compacted(self):
+        feedback = self._system(compact_interval=0)
+        feedback.submit_feedback("https://github.com/facebook/react", 4)
+        with open(self.log_file, 'a') as f:
+            f.write('{"rating": 9}\n{"timestamp": "2025-')
+
+        feedback.submit_feedback("https://github.com/facebook/react", 2)
+
+        # The torn line didn't swallow the new entry, and compaction dropped the garbage
+        self.assertEqual([json.loads(line)["rating"] for line in self._log_lines()], [4, 2])
+        self.assertEqual(feedback.get_feedback_summary()["total_feedback"], 2)
+
+    def test_lines_that_are_not_objects_are_skipped(self):
+        feedback = self._system()
+        feedback.submit_feedback("https://github.com/facebook/react", 4)
+        with open(self.log_file, 'a') as f:
+            f.write('17\n["rating", 5]\nnull\n')
+
+        feedback.submit_feedback("https://github.com/facebook/react", 2)
+
+        self.assertEqual(feedback.get_feedback_summary()["total_feedback"], 2)
+        self.assertEqual(self._system().get_average_rating(), 3.0)
+
+    def test_compaction_keeps_the_most_recent_entries(self):
+        feedback = self._system(max_entries=3, compact_interval=0)
+        for rating in (1, 2, 3, 4, 5):
+            feedback.submit_feedback("https://github.com/facebook/react", rating)
+
+        self.assertEqual([json.loads(line)["rating"] for line in self._log_lines()], [3, 4, 5])
+        other = self._system()
+        self.assertEqual(other.get_feedback_summary()["total_feedback"], 3)
+
+    def test_repo_lookup_reads_only_that_repos_entries(self):
+        feedback = self._system()
+        for i in range(30):
+            feedback.submit_feedback(f"https://github.com/owner/repo{i % 3}", i % 5 + 1, f"comment {i}")
+
+        entries = self._system().get_feedback_for_repo("https://github.com/OWNER/repo1.git")
+
+        self.assertEqual([entry["comments"] for entry in entries], [f"comment {i}" for i in range(1, 30, 3)])
+        with mock.patch.object(FeedbackSystem, '_iter_log') as scan:
+            feedback.get_feedback_for_repo("https://github.com/owner/repo2")
+        scan.assert_not_called()
+        self.assertEqual(feedback.get_feedback_for_repo("https://github.com/owner/unknown"), [])
+
+    def test_repo_lookup_survives_compaction_by_another_process(self):
+        feedback = self._system()
+        for rating in (1, 2, 3):
+            feedback.submit_feedback("https://github.com/facebook/react", rating)
+        self._system(max_entries=2).compact()
+
+        entries = feedback.get_feedback_for_repo("https://github.com/facebook/react")
+        self.assertEqual([entry["rating"] for entry in entries], [2, 3])
+
+    def test_rejects_out_of_range_ratings(self):
+        with self.assertRaises(ValueError):
+            self._system().submit_feedback("https://github.com/facebook/react", 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_parser.analyzer import GitHubRepoAnalyzer
+from github_parser.freshness import FreshnessPolicy, RefreshQueue, FRESH, STALE, EXPIRED
+from knowledge_base import KnowledgeBase
+
+
+class TestFreshnessPolicy(unittest.TestCase):
+
+    def test_classify(self):
+        policy = FreshnessPolicy(max_age=60, stale_window=120)
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        self.assertEqual(policy.classify((now - timedelta(seconds=30)).isoformat(), now), FRESH)
+        self.assertEqual(policy.classify((now - timedelta(seconds=90)).isoformat(), now), STALE)
+        self.assertEqual(policy.classify((now - timedelta(seconds=200)).isoformat(), now), EXPIRED)
+        self.assertEqual(policy.classify(None, now), EXPIRED)
+        self.assertEqual(policy.expired_before(now), now - timedelta(seconds=180))
+
+    def test_sweeps_are_rate_limited(self):
+        policy = FreshnessPolicy(sweep_interval=3600)
+        self.assertTrue(policy.should_sweep())
+        self.assertFalse(policy.should_sweep())
+
+
+class TestRefreshQueue(unittest.TestCase):
+
+    def test_duplicate_keys_are_coalesced(self):
+        refresh_queue = RefreshQueue(max_size=10)
+        release = threading.Event()
+        calls = []
+
+        def refresh():
+            release.wait(5)
+            calls.append(1)
+
+        self.assertTrue(refresh_queue.enqueue('repo', refresh))
+        self.assertFalse(refresh_queue.enqueue('repo', refresh))
+        release.set()
+        refresh_queue.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(refresh_queue.get_stats()['refreshed'], 1)
+
+
+class TestAnalyzeRepoFreshness(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.kb = KnowledgeBase(os.path.join(self.tmp.name, 'knowledge_base.json'))
+        self.policy = FreshnessPolicy(max_age=60, stale_window=120, sweep_interval=0)
+        self.queue = RefreshQueue()
+        for name, value in [('knowledge_base', self.kb), ('freshness_policy', self.policy),
+                            ('refresh_queue', self.queue)]:
+            patcher = mock.patch(f'github_parser.analyzer.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.analyzer = GitHubRepoAnalyzer(use_graphql=False)
+        self.fetch = mock.patch.object(self.analyzer, 'get_repo_data', return_value={
+            'repo_info': {'name': 'fresh-name'}, 'contents': [], 'languages': {}
+        }).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _store(self, repo_url, name, age_seconds):
+        self.kb.store_repo_pattern(repo_url, {'name': name})
+        record = self.kb.get_repo_pattern(repo_url)
+        record['timestamp'] = (datetime.now() - timedelta(seconds=age_seconds)).isoformat()
+        self.kb.store.put('repo_patterns', self.kb._get_repo_hash(repo_url), record)
+
+    def test_fresh_hit_is_served_without_fetching(self):
+        self._store('https://github.com/a/b', 'cached', 10)
+        self.assertEqual(self.analyzer.analyze_repo('https://github.com/a/b')['name'], 'cached')
+        self.fetch.assert_not_called()
+
+    def test_stale_hit_is_served_and_refreshed_in_background(self):
+        self._store('https://github.com/a/b', 'cached', 90)
+
+        self.assertEqual(self.analyzer.analyze_repo('https://github.com/a/b')['name'], 'cached')
+        self.queue.join()
+
+        self.fetch.assert_called_once_with('a', 'b')
+        self.assertEqual(self.kb.get_repo_pattern('https://github.com/a/b')['pattern_data']['name'], 'fresh-name')
+
+    def test_expired_hit_is_reanalyzed_and_expired_entries_evicted(self):
+        self._store('https://github.com/a/b', 'cached', 500)
+        self._store('https://github.com/c/d', 'old', 500)
+        self._store('https://github.com/e/f', 'recent', 10)
+
+        self.assertEqual(self.analyzer.analyze_repo('https://github.com/a/b')['name'], 'fresh-name')
+
+        self.assertEqual(self.kb.get_repo_pattern('https://github.com/c/d'), {})
+        self.assertNotEqual(self.kb.get_repo_pattern('https://github.com/e/f'), {})
+        self.assertEqual(self.kb.get_knowledge_stats()['repo_patterns_count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.generator import AIEnhancedGenerator
+
+
+class FakeClient:
+    """Returns a canned fused response and records every prompt it receives."""
+
+    def __init__(self, fused_response):
+        self.fused_response = fused_response
+        self.prompts = []
+
+    def generate_text(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if "single JSON object" in prompt:
+            return self.fused_response
+        if "PROJECT TYPE" in prompt:
+            return "Staged Project Type"
+        return ""
+
+
+class TestFusedGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_data = {
+            'name': 'react',
+            'language': 'JavaScript',
+            'frameworks': ['React'],
+            'description': 'A JavaScript library for building user interfaces.',
+            'stars': 1,
+            'forks': 1,
+            'contents': [{'name': 'package.json'}]
+        }
+        self.fused = {
+            "project_type": "UI Library",
+            "tech_stack": ["JavaScript", "React"],
+            "architecture": "Component-based library. Extra sentence.",
+            "features": ["Components - reusable", "Hooks - state", "JSX - syntax"],
+            "complexity": "Advanced",
+            "guidance": "1. Start with the reconciler.",
+            "steps": ["Step one", "Step two", "Step three", "Step four", "Step five"]
+        }
+        patcher = mock.patch('ai.generator.user_preferences')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _generator(self, response):
+        client = FakeClient(response)
+        with mock.patch('ai.generator.AIClient', return_value=client):
+            generator = AIEnhancedGenerator('groq', mode='fused')
+        return generator, client
+
+    def test_valid_fused_response_uses_a_single_completion(self):
+        generator, client = self._generator("```json\n" + json.dumps(self.fused) + "\n```")
+
+        prompt = generator.generate_prompt(self.repo_data, 'https://github.com/facebook/react')
+
+        self.assertEqual(len(client.prompts), 1)
+        self.assertIn('PROJECT TYPE: UI Library', prompt)
+        self.assertIn('ARCHITECTURE: Component-based library.\n', prompt)
+        self.assertIn('5. Step five', prompt)
+        self.assertIn('1. Start with the reconciler.', prompt)
+
+    def test_invalid_field_falls_back_to_staged_completion(self):
+        self.fused["project_type"] = ""
+        self.fused["steps"] = ["too", "short"]
+        generator, client = self._generator(json.dumps(self.fused))
+
+        prompt = generator.generate_prompt(self.repo_data, 'https://github.com/facebook/react')
+
+        # One fused call plus the project type and implementation steps stages
+        self.assertEqual(len(client.prompts), 3)
+        self.assertIn('PROJECT TYPE: Staged Project Type', prompt)
+        self.assertIn('fused_generation', generator.stage_timings)
+        self.assertIn('implementation_steps', generator.stage_timings)
+
+    def test_unparseable_response_falls_back_to_all_stages(self):
+        generator, client = self._generator("not json at all")
+
+        generator.generate_prompt(self.repo_data, 'https://github.com/facebook/react')
+
+        self.assertEqual(len(client.prompts), 8)
+
+    def test_unknown_mode_is_rejected(self):
+        with mock.patch('ai.generator.AIClient'):
+            with self.assertRaises(ValueError):
+                AIEnhancedGenerator('groq', mode='turbo')
+
+
+if __name__ == '__main__':
+    unittest.main()
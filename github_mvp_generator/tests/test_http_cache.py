@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_parser.analyzer import GitHubRepoAnalyzer
+from github_parser.http_cache import HTTPResponseCache
+from github_parser.session import create_github_session
+from tests.github_stub import GitHubStub
+
+
+REPO_INFO = {'name': 'react', 'stargazers_count': 10, 'forks_count': 2}
+
+
+class TestConditionalRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _analyzer(self, stub, cache):
+        patcher = mock.patch('github_parser.analyzer.GITHUB_API_URL', stub.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return GitHubRepoAnalyzer(session=create_github_session(max_retries=0), use_graphql=False,
+                                  http_cache=cache)
+
+    def test_304_serves_stored_body(self):
+        cache = HTTPResponseCache(cache_dir=self.tmp.name)
+        with GitHubStub({'/repos/facebook/react': [
+            (200, REPO_INFO, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}),
+            (304, None),
+        ]}) as stub:
+            analyzer = self._analyzer(stub, cache)
+            first = analyzer.get_repo_info('facebook', 'react')
+            second = analyzer.get_repo_info('facebook', 'react')
+
+        self.assertEqual(first, REPO_INFO)
+        self.assertEqual(second, REPO_INFO)
+        self.assertNotIn('If-None-Match', stub.requests[0][2])
+        self.assertEqual(stub.requests[1][2].get('If-None-Match'), '"v1"')
+        self.assertEqual(stub.requests[1][2].get('If-Modified-Since'), 'Mon, 01 Jan 2024 00:00:00 GMT')
+        stats = cache.get_stats()
+        self.assertEqual((stats['misses'], stats['hits'], stats['not_modified']), (1, 1, 1))
+
+    def test_changed_resource_replaces_stored_body(self):
+        cache = HTTPResponseCache(cache_dir=self.tmp.name)
+        updated = dict(REPO_INFO, stargazers_count=11)
+        with GitHubStub({'/repos/facebook/react': [
+            (200, REPO_INFO, {'ETag': '"v1"'}),
+            (200, updated, {'ETag': '"v2"'}),
+        ]}) as stub:
+            analyzer = self._analyzer(stub, cache)
+            analyzer.get_repo_info('facebook', 'react')
+            self.assertEqual(analyzer.get_repo_info('facebook', 'react'), updated)
+            url = f'{stub.url}/repos/facebook/react'
+
+        self.assertEqual(cache.get(url)['etag'], '"v2"')
+        self.assertEqual(cache.get_stats()['not_modified'], 0)
+
+    def test_store_persists_across_instances(self):
+        with GitHubStub({'/repos/facebook/react': [(200, REPO_INFO, {'ETag': '"v1"'}), (304, None)]}) as stub:
+            self._analyzer(stub, HTTPResponseCache(cache_dir=self.tmp.name)).get_repo_info('facebook', 'react')
+            fresh_cache = HTTPResponseCache(cache_dir=self.tmp.name)
+            self.assertEqual(self._analyzer(stub, fresh_cache).get_repo_info('facebook', 'react'), REPO_INFO)
+
+        self.assertEqual(fresh_cache.get_stats()['not_modified'], 1)
+
+    def test_responses_without_validators_are_not_stored(self):
+        cache = HTTPResponseCache(cache_dir=self.tmp.name)
+        with GitHubStub({'/repos/facebook/react': [(200, REPO_INFO)]}) as stub:
+            self._analyzer(stub, cache).get_repo_info('facebook', 'react')
+
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs import JobQueue, COMPLETED, FAILED
+
+
+class FakePipeline:
+    """Stands in for generate_for_repo, optionally holding calls until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, repo_url, provider, github_token=None, mode='staged'):
+        with self._lock:
+            self.calls.append(repo_url)
+        self.release.wait(5)
+        if 'broken' in repo_url:
+            raise RuntimeError('generation failed')
+        return {"repo_url": repo_url, "prompt": f"prompt for {repo_url}", "duration": 0.01}
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.pipeline = FakePipeline()
+        patcher = mock.patch('jobs.generate_for_repo', self.pipeline)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.jobs = JobQueue(workers=2, state_dir='')
+
+    def test_job_reports_per_repo_results(self):
+        job = self.jobs.submit(["https://github.com/facebook/react", "https://github.com/example/broken"], 'openai')
+        self.jobs.join()
+
+        status = self.jobs.get_job(job.id)
+        self.assertEqual(status["status"], COMPLETED)
+        self.assertEqual(status["counts"][COMPLETED], 1)
+        self.assertEqual(status["counts"][FAILED], 1)
+        react, broken = status["repos"]
+        self.assertEqual(react["prompt"], "prompt for https://github.com/facebook/react")
+        self.assertEqual(broken["error"], "generation failed")
+
+    def test_duplicates_within_a_job_are_coalesced(self):
+        job = self.jobs.submit(["https://github.com/facebook/react", "https://github.com/Facebook/React.git"], 'openai')
+        self.jobs.join()
+
+        self.assertEqual(len(self.pipeline.calls), 1)
+        repos = self.jobs.get_job(job.id)["repos"]
+        self.assertEqual([repo["status"] for repo in repos], [COMPLETED, COMPLETED])
+        self.assertEqual(repos[1]["repo_url"], "https://github.com/Facebook/React.git")
+
+    def test_in_flight_repos_are_coalesced_across_jobs(self):
+        self.pipeline.release.clear()
+        first = self.jobs.submit(["https://github.com/facebook/react"], 'openai')
+        second = self.jobs.submit(["https://github.com/facebook/react/", "https://github.com/pallets/flask"], 'openai')
+        self.pipeline.release.set()
+        self.jobs.join()
+
+        self.assertEqual(sorted(self.pipeline.calls), ["https://github.com/facebook/react", "https://github.com/pallets/flask"])
+        self.assertEqual(self.jobs.get_job(first.id)["status"], COMPLETED)
+        self.assertEqual(self.jobs.get_job(second.id)["counts"][COMPLETED], 2)
+        self.assertEqual(self.jobs.get_stats()["coalesced"], 1)
+
+    def test_different_providers_are_not_coalesced(self):
+        self.jobs.submit(["https://github.com/facebook/react"], 'openai')
+        self.jobs.submit(["https://github.com/facebook/react"], 'groq')
+        self.jobs.join()
+        self.assertEqual(len(self.pipeline.calls), 2)
+
+    def test_different_github_tokens_are_not_coalesced(self):
+        self.pipeline.release.clear()
+        self.jobs.submit(["https://github.com/facebook/react"], 'openai', github_token='token-a')
+        self.jobs.submit(["https://github.com/facebook/react"], 'openai', github_token='token-b')
+        self.pipeline.release.set()
+        self.jobs.join()
+        self.assertEqual(len(self.pipeline.calls), 2)
+
+    def test_finished_repos_are_generated_again(self):
+        self.jobs.submit(["https://github.com/facebook/react"], 'openai')
+        self.jobs.join()
+        self.jobs.submit(["https://github.com/facebook/react"], 'openai')
+        self.jobs.join()
+        self.assertEqual(len(self.pipeline.calls), 2)
+
+    def test_unknown_job_and_empty_submission(self):
+        self.assertIsNone(self.jobs.get_job("missing"))
+        with self.assertRaises(ValueError):
+            self.jobs.submit([], 'openai')
+
+    def test_oldest_finished_jobs_are_evicted(self):
+        jobs = JobQueue(workers=1, max_jobs=2, state_dir='')
+        ids = []
+        for i in range(3):
+            ids.append(jobs.submit([f"https://github.com/owner/repo{i}"], 'openai').id)
+            jobs.join()
+        self.assertIsNone(jobs.get_job(ids[0]))
+        self.assertIsNotNone(jobs.get_job(ids[2]))
+
+    def test_jobs_can_be_polled_from_another_process(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            jobs = JobQueue(workers=1, state_dir=state_dir)
+            other_worker = JobQueue(workers=1, state_dir=state_dir)
+            job = jobs.submit(["https://github.com/facebook/react"], 'openai')
+            jobs.join()
+
+            status = other_worker.get_job(job.id)
+            self.assertEqual(status["status"], COMPLETED)
+            self.assertEqual(status["repos"][0]["prompt"], "prompt for https://github.com/facebook/react")
+            self.assertIsNone(other_worker.get_job("../../etc/passwd"))
+
+
+class TestBatchEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        import api
+        self.api = api
+        self.jobs = JobQueue(workers=1, state_dir='')
+        patchers = [
+            mock.patch('jobs.generate_for_repo', FakePipeline()),
+            mock.patch('api.job_queue', self.jobs),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, body):
+        with self.api.app.test_request_context('/api/generate/batch', method='POST', json=body):
+            response = self.api.app.make_response(self.api.generate_mvp_batch())
+        return response.status_code, response.get_json()
+
+    def _get_job(self, job_id):
+        with self.api.app.test_request_context(f'/api/jobs/{job_id}'):
+            response = self.api.app.make_response(self.api.get_job(job_id))
+        return response.status_code, response.get_json()
+
+    def test_submit_and_poll(self):
+        status_code, body = self._post({"repo_urls": ["https://github.com/facebook/react"]})
+        self.assertEqual(status_code, 202)
+        self.jobs.join()
+
+        status_code, job = self._get_job(body["job_id"])
+        self.assertEqual(status_code, 200)
+        self.assertEqual(job["status"], COMPLETED)
+        self.assertEqual(job["repos"][0]["prompt"], "prompt for https://github.com/facebook/react")
+
+    def test_rejects_invalid_requests(self):
+        self.assertEqual(self._post({})[0], 400)
+        self.assertEqual(self._post({"repo_urls": []})[0], 400)
+        self.assertEqual(self._post({"repo_urls": ["https://github.com/facebook/react"], "mode": "bogus"})[0], 400)
+        self.assertEqual(self._get_job("missing")[0], 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_base import KnowledgeBase
+
+
+def _increment_many(knowledge_file, times):
+    kb = KnowledgeBase(knowledge_file, backend='sqlite')
+    for _ in range(times):
+        kb.store_tech_stack_combination('React, Vite', 'Web App')
+
+
+class KnowledgeBaseBackendTests:
+    """Behaviour every storage backend must share."""
+
+    backend = None
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.knowledge_file = os.path.join(self.tmp.name, 'knowledge_base.json')
+
+    def _kb(self):
+        return KnowledgeBase(self.knowledge_file, backend=self.backend)
+
+    def test_repo_patterns_round_trip(self):
+        kb = self._kb()
+        self.assertEqual(kb.get_repo_pattern('https://github.com/a/b'), {})
+        kb.store_repo_pattern('https://github.com/a/b', {'name': 'b'})
+        kb.store_repo_pattern('https://github.com/a/b', {'name': 'b2'})
+
+        pattern = self._kb().get_repo_pattern('https://github.com/a/b')
+        self.assertEqual(pattern['pattern_data'], {'name': 'b2'})
+        self.assertEqual(pattern['repo_url'], 'https://github.com/a/b')
+        self.assertEqual(kb.get_knowledge_stats()['repo_patterns_count'], 1)
+
+    def test_tech_stack_combinations(self):
+        kb = self._kb()
+        kb.store_tech_stack_combination('React', 'Web App')
+        kb.store_tech_stack_combination('React', 'Web App', success_count=2)
+        kb.store_tech_stack_combination('Vue', 'Web App')
+        kb.store_tech_stack_combination('Django', 'API')
+
+        best = kb.get_best_tech_stacks_for_project_type('Web App')
+        self.assertEqual([(c['tech_stack'], c['success_count']) for c in best], [('React', 3), ('Vue', 1)])
+
+    def test_signatures_and_prompts(self):
+        kb = self._kb()
+        kb.store_framework_signature('Python', ['Flask'], {'files': ['app.py']})
+        kb.store_successful_prompt('https://github.com/a/b', {'project_type': 'API'}, rating=4)
+
+        self.assertEqual(kb.get_framework_signature('Python', ['Flask']), {'files': ['app.py']})
+        self.assertEqual(kb.get_successful_prompt('https://github.com/a/b')['rating'], 4)
+        stats = kb.get_knowledge_stats()
+        self.assertEqual((stats['framework_signatures_count'], stats['successful_prompts_count']), (1, 1))
+        self.assertIsNotNone(stats['last_updated'])
+
+
+class TestJSONBackend(KnowledgeBaseBackendTests, unittest.TestCase):
+    backend = 'json'
+
+
+class TestSQLiteBackend(KnowledgeBaseBackendTests, unittest.TestCase):
+    backend = 'sqlite'
+
+    def test_migrates_existing_json_file_once(self):
+        legacy = KnowledgeBase(self.knowledge_file, backend='json')
+        legacy.store_repo_pattern('https://github.com/a/b', {'name': 'b'})
+        legacy.store_tech_stack_combination('React', 'Web App')
+
+        kb = self._kb()
+        self.assertEqual(kb.get_repo_pattern('https://github.com/a/b')['pattern_data'], {'name': 'b'})
+        self.assertEqual(kb.get_knowledge_stats()['tech_stack_combinations_count'], 1)
+
+        # Later edits to the JSON file are not re-imported
+        with open(self.knowledge_file, 'w') as f:
+            json.dump({'repo_patterns': {'x': {'repo_url': 'x', 'pattern_data': {}}}}, f)
+        self.assertEqual(self._kb().get_knowledge_stats()['repo_patterns_count'], 1)
+
+    def test_increments_are_safe_across_processes(self):
+        self._kb()  # create the schema up front
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_increment_many, args=(self.knowledge_file, 25)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        best = self._kb().get_best_tech_stacks_for_project_type('Web App')
+        self.assertEqual(best[0]['success_count'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from performance_metrics import LatencyHistogram, PerformanceMetrics
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Test the mergeable log-bucket latency histogram."""
+
+    def test_percentiles_within_bucket_error(self):
+        values = [random.Random(i).lognormvariate(0, 1) for i in range(5000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        ordered = sorted(values)
+        for q in (0.5, 0.9, 0.99):
+            exact = ordered[int(q * len(ordered)) - 1]
+            estimate = histogram.percentile(q)
+            self.assertGreaterEqual(estimate, exact * 0.999)
+            self.assertLessEqual(estimate, exact * LatencyHistogram.GROWTH * 1.001)
+        self.assertEqual(histogram.percentile(1.0), max(values))
+
+    def test_small_values_and_empty(self):
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.summary()["p99"], 0.0)
+        histogram.record(0.0)
+        histogram.record(0.0005)
+        self.assertEqual(histogram.buckets, {0: 2})
+
+    def test_merge_matches_single_histogram(self):
+        combined, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 200):
+            value = i / 10
+            combined.record(value)
+            (first if i % 2 else second).record(value)
+
+        merged = LatencyHistogram.from_dict(first.to_dict()).merge(LatencyHistogram.from_dict(second.to_dict()))
+        self.assertEqual(merged.buckets, combined.buckets)
+        self.assertEqual(merged.count, combined.count)
+        self.assertAlmostEqual(merged.total, combined.total)
+        self.assertEqual(merged.summary()["p90"], combined.summary()["p90"])
+
+    def test_hour_long_duration_uses_bounded_buckets(self):
+        self.assertLess(LatencyHistogram.bucket_index(3600), 100)
+
+
+class TestPerformanceMetricsLatency(unittest.TestCase):
+    """Test latency percentiles in the performance summary."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "metrics.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_summary_reports_percentiles_across_instances(self):
+        first = PerformanceMetrics(self.path)
+        operation = first.start_operation("mvp_generation", "groq")
+        first.record_stage_timings({"project_type": {"start": 0.0, "end": 1.5, "duration": 1.5}})
+        first.end_operation(operation)
+        first.flush()
+
+        second = PerformanceMetrics(self.path)
+        summary = second.get_performance_summary()
+        self.assertEqual(summary["operation_performance"]["mvp_generation"]["total_count"], 1)
+        self.assertIn("p99", summary["operation_performance"]["mvp_generation"])
+        self.assertIn("p50", summary["provider_performance"]["groq"])
+        stage = summary["stage_performance"]["project_type"]
+        self.assertEqual(stage["count"], 1)
+        self.assertEqual(stage["max"], 1.5)
+        self.assertEqual(stage["p50"], 1.5)
+
+    def test_live_histograms_are_serialized_for_saves_and_snapshots(self):
+        metrics = PerformanceMetrics(self.path)
+        for duration in (0.2, 0.4):
+            metrics.record_stage_timings({"tech_stack": {"duration": duration}})
+        snapshot = metrics.get_snapshot()
+        self.assertEqual(json.loads(json.dumps(snapshot))["latency"]["stages"]["tech_stack"]["count"], 2)
+
+        metrics.flush()
+        metrics.record_stage_timings({"tech_stack": {"duration": 0.8}})
+        self.assertEqual(metrics.get_performance_summary()["stage_performance"]["tech_stack"]["count"], 3)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["latency"]["stages"]["tech_stack"]["count"], 2)
+
+    def test_average_response_time_is_mean_of_all_operations(self):
+        metrics = PerformanceMetrics(self.path)
+        for op_type, duration in (("a", 1.0), ("a", 3.0), ("b", 5.0)):
+            metrics._record(op_type, "groq", duration, True)
+        self.assertAlmostEqual(metrics.get_performance_summary()["average_response_time"], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
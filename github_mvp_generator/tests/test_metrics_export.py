@@ -0,0 +1,163 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics_export import aggregate_processes, render_openmetrics
+from performance_metrics import LatencyHistogram, PerformanceMetrics
+
+
+def _process(counters, gauges, rate_limit=None, heartbeat=None):
+    entry = {"counters": counters, "gauges": gauges, "github_rate_limit": rate_limit}
+    if heartbeat is not None:
+        entry["heartbeat"] = heartbeat
+    return entry
+
+
+class TestOpenMetrics(unittest.TestCase):
+    """Test the OpenMetrics rendering of a metrics snapshot."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = LatencyHistogram()
+        for value in (0.0005, 0.003, 0.003, 1.5, 500.0):
+            histogram.record(value)
+        text = render_openmetrics({"latency": {"stages": {"project_type": histogram.to_dict()}}})
+
+        buckets = [line for line in text.splitlines()
+                   if line.startswith('mvp_stage_duration_seconds_bucket{stage="project_type"')]
+        counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+        self.assertEqual(counts, sorted(counts))
+        self.assertIn('mvp_stage_duration_seconds_bucket{stage="project_type",le="0.001"} 1', text)
+        self.assertIn('mvp_stage_duration_seconds_bucket{stage="project_type",le="0.004"} 3', text)
+        self.assertIn('mvp_stage_duration_seconds_bucket{stage="project_type",le="+Inf"} 5', text)
+        self.assertIn('mvp_stage_duration_seconds_count{stage="project_type"} 5', text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_counters_ratios_and_labels(self):
+        text = render_openmetrics({
+            "requests": {"generate_mvp": {"200": 7, "500": 1}},
+            "provider_calls": {"groq": {"success": 3, "error": 1}},
+            "processes": {"1-a": _process({"llm_cache_hits": 3, "llm_cache_misses": 1}, {})}
+        })
+        self.assertIn('mvp_http_requests_total{endpoint="generate_mvp",status="500"} 1', text)
+        self.assertIn('mvp_provider_error_ratio{provider="groq"} 0.25', text)
+        self.assertIn('mvp_cache_hit_ratio{cache="llm"} 0.75', text)
+        self.assertIn("# TYPE mvp_http_requests counter", text)
+
+    def test_processes_are_aggregated(self):
+        older = {"remaining": 10, "limit": 60, "reset": 1, "observed_at": 100.0}
+        newer = {"remaining": 4000, "limit": 5000, "reset": 2, "observed_at": 200.0}
+        aggregated = aggregate_processes({
+            "7-live": _process({"jobs_completed": 2}, {"job_queue_depth": 3}, older, heartbeat=990.0),
+            "7-gone": _process({"jobs_completed": 5}, {"job_queue_depth": 9}, newer, heartbeat=100.0)
+        }, retired={"jobs_completed": 4}, ttl=60, now=1000.0)
+        # Counters survive their process; gauges only count workers with a recent heartbeat
+        self.assertEqual(aggregated["counters"]["jobs_completed"], 11)
+        self.assertEqual(aggregated["gauges"]["job_queue_depth"], 3)
+        self.assertEqual(aggregated["gauges"]["workers"], 1)
+        self.assertEqual(aggregated["github_rate_limit"], newer)
+
+
+class TestMetricsSnapshot(unittest.TestCase):
+    """Test the cross-worker snapshot that /metrics renders."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "metrics.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_combines_saved_workers_and_unsaved_changes(self):
+        other_worker = PerformanceMetrics(self.path, flush_interval=3600)
+        other_worker.set_process_stats_collector(lambda: _process({"llm_cache_hits": 4}, {}))
+        other_worker.record_provider_call("groq", success=False)
+        other_worker.flush()
+
+        metrics = PerformanceMetrics(self.path, flush_interval=3600)
+        metrics.record_provider_call("groq", success=True)
+        snapshot = metrics.get_snapshot()
+        self.assertEqual(snapshot["provider_calls"]["groq"], {"success": 1, "error": 1})
+        self.assertEqual(aggregate_processes(snapshot["processes"])["counters"]["llm_cache_hits"], 4)
+
+        # Unchanged process stats aren't rewritten
+        with mock.patch('performance_metrics.update_json') as update_json:
+            other_worker.flush()
+        update_json.assert_not_called()
+        metrics.flush()
+
+    def _worker(self, counters):
+        worker = PerformanceMetrics(self.path, flush_interval=3600, process_ttl=60)
+        worker.set_process_stats_collector(lambda: _process(dict(counters), {"job_queue_depth": 1}))
+        return worker
+
+    def _counters(self, snapshot):
+        return aggregate_processes(snapshot["processes"], snapshot["retired_process_counters"])
+
+    def test_a_reused_pid_starts_a_new_entry(self):
+        self._worker({"jobs_completed": 5}).flush()
+        # A restarted worker with the same pid and fresh in-process counters
+        replacement = self._worker({"jobs_completed": 1})
+        replacement.flush()
+
+        snapshot = replacement.get_snapshot()
+        self.assertEqual(len(snapshot["processes"]), 2)
+        self.assertEqual(self._counters(snapshot)["counters"]["jobs_completed"], 6)
+
+    def test_expired_workers_are_retired_without_losing_counts(self):
+        self._worker({"jobs_completed": 5}).flush()
+        survivor = self._worker({"jobs_completed": 2})
+        with mock.patch('performance_metrics.time.time', return_value=time.time() + 3600):
+            survivor.flush()
+
+        snapshot = survivor.get_snapshot()
+        self.assertEqual(len(snapshot["processes"]), 1)
+        self.assertEqual(snapshot["retired_process_counters"], {"jobs_completed": 5})
+        aggregated = self._counters(snapshot)
+        self.assertEqual(aggregated["counters"]["jobs_completed"], 7)
+        self.assertEqual((aggregated["gauges"]["job_queue_depth"], aggregated["gauges"]["workers"]), (1, 1))
+
+    def test_a_stalled_worker_that_was_retired_is_not_counted_twice(self):
+        counters = {"jobs_completed": 3}
+        stalled = self._worker(counters)
+        stalled.flush()
+        with mock.patch('performance_metrics.time.time', return_value=time.time() + 3600):
+            self._worker({}).flush()
+
+        counters["jobs_completed"] = 4
+        stalled.flush()
+        self.assertEqual(self._counters(stalled.get_snapshot())["counters"]["jobs_completed"], 4)
+        with mock.patch('performance_metrics.time.time', return_value=time.time() + 60):
+            stalled.flush()
+        snapshot = PerformanceMetrics(self.path).get_snapshot()
+        self.assertEqual(self._counters(snapshot)["counters"]["jobs_completed"], 4)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+
+    def test_metrics_endpoint_serves_openmetrics(self):
+        import api
+        with tempfile.TemporaryDirectory() as tmp:
+            metrics = PerformanceMetrics(os.path.join(tmp, "metrics.json"), flush_interval=3600)
+            metrics.set_process_stats_collector(api.collect_process_stats)
+            with mock.patch('api.performance_metrics', metrics):
+                with api.app.test_request_context('/api/stats'):
+                    api.count_request(api.app.make_response(("", 200)))
+                with api.app.test_request_context('/metrics'):
+                    response = api.app.make_response(api.get_metrics())
+                metrics.flush()
+
+        self.assertTrue(response.content_type.startswith("application/openmetrics-text"))
+        text = response.get_data(as_text=True)
+        self.assertIn('mvp_http_requests_total{endpoint="get_stats",status="200"} 1', text)
+        self.assertIn("mvp_job_queue_depth 0", text)
+        self.assertIn("mvp_workers 1", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from performance_metrics import PerformanceMetrics
+
+
+class TestMetricsFlush(unittest.TestCase):
+    """Test buffered metrics recording and background saving."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "metrics.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _finish(self, metrics, count, success=True):
+        for _ in range(count):
+            metrics.end_operation(metrics.start_operation("mvp_generation", "groq"), success=success)
+
+    def test_end_operation_does_no_disk_io(self):
+        metrics = PerformanceMetrics(self.path, flush_interval=3600)
+        with mock.patch('performance_metrics.update_json') as update_json:
+            self._finish(metrics, 3)
+        update_json.assert_not_called()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(metrics.get_performance_summary()["total_operations"], 3)
+
+        metrics.flush()
+        self.assertEqual(PerformanceMetrics(self.path).get_performance_summary()["total_operations"], 3)
+
+    def test_background_flusher_saves_on_interval(self):
+        metrics = PerformanceMetrics(self.path, flush_interval=0.05)
+        self._finish(metrics, 2)
+        time.sleep(0.3)
+        self.assertEqual(PerformanceMetrics(self.path).get_performance_summary()["total_operations"], 2)
+
+    def test_session_keeps_totals_with_bounded_history(self):
+        metrics = PerformanceMetrics(self.path, flush_interval=3600, recent_operations=10)
+        self._finish(metrics, 30)
+        self._finish(metrics, 10, success=False)
+
+        summary = metrics.get_session_summary()
+        self.assertEqual(summary["operations_completed"], 40)
+        self.assertEqual(summary["success_rate"], 75.0)
+        self.assertEqual(len(summary["recent_operations"]), 10)
+        self.assertTrue(all(op["status"] == "failed" for op in summary["recent_operations"]))
+        metrics.flush()
+
+    def test_failed_save_keeps_the_delta(self):
+        metrics = PerformanceMetrics(self.path, flush_interval=3600)
+        self._finish(metrics, 2)
+        with mock.patch('performance_metrics.update_json', side_effect=IOError("disk full")), \
+                mock.patch('builtins.print'):
+            metrics.flush()
+        self._finish(metrics, 1)
+        metrics.flush()
+        self.assertEqual(PerformanceMetrics(self.path).get_performance_summary()["total_operations"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
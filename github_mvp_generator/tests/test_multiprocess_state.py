@@ -0,0 +1,121 @@
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedback import FeedbackSystem
+from file_store import update_json
+from performance_metrics import PerformanceMetrics
+from user_preferences import UserPreferences
+
+WORKERS = 4
+ITERATIONS = 25
+
+
+def _increment_counter(path):
+    for _ in range(ITERATIONS):
+        update_json(path, lambda data: data.update(count=data["count"] + 1), lambda: {"count": 0})
+
+
+def _use_preferences(path, worker):
+    preferences = UserPreferences(path)
+    for _ in range(ITERATIONS):
+        preferences.update_provider_preference("groq")
+    preferences.add_preferred_tech_stack(f"stack-{worker}")
+
+
+def _record_operations(path):
+    metrics = PerformanceMetrics(path)
+    for i in range(ITERATIONS):
+        operation = metrics.start_operation("mvp_generation", "groq")
+        metrics.end_operation(operation, success=i % 5 != 0)
+    metrics.flush()
+
+
+def _submit_feedback(path, worker):
+    with mock.patch('builtins.print'):
+        feedback = FeedbackSystem(path)
+        for _ in range(ITERATIONS):
+            feedback.submit_feedback(f"https://github.com/owner/repo{worker}", 4)
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "requires fork")
+class TestMultiProcessState(unittest.TestCase):
+    """Several worker processes updating the same JSON state must not lose writes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.context = multiprocessing.get_context('fork')
+
+    def _run_workers(self, target, path, with_index=False):
+        processes = [
+            self.context.Process(target=target, args=(path, i) if with_index else (path,))
+            for i in range(WORKERS)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+        with open(path) as f:
+            return json.load(f)
+
+    def test_update_json_serializes_writers(self):
+        data = self._run_workers(_increment_counter, os.path.join(self.tmp.name, 'counter.json'))
+        self.assertEqual(data["count"], WORKERS * ITERATIONS)
+
+    def test_user_preferences_merge_across_processes(self):
+        path = os.path.join(self.tmp.name, 'prefs.json')
+        data = self._run_workers(_use_preferences, path, with_index=True)
+
+        self.assertEqual(data["usage_count"], WORKERS * ITERATIONS)
+        self.assertEqual(sorted(data["preferred_tech_stacks"]), [f"stack-{i}" for i in range(WORKERS)])
+        # A reader in another process sees the merged file
+        self.assertEqual(UserPreferences(path).get_all_preferences()["usage_count"], WORKERS * ITERATIONS)
+
+    def test_performance_metrics_merge_across_processes(self):
+        data = self._run_workers(_record_operations, os.path.join(self.tmp.name, 'metrics.json'))
+
+        self.assertEqual(data["total_operations"], WORKERS * ITERATIONS)
+        self.assertEqual(data["failed_operations"], WORKERS * ITERATIONS // 5)
+        self.assertEqual(data["provider_performance"]["groq"]["count"], WORKERS * ITERATIONS)
+        self.assertEqual(data["operation_types"]["mvp_generation"]["success_count"], WORKERS * ITERATIONS * 4 // 5)
+
+    def test_feedback_appends_across_processes(self):
+        path = os.path.join(self.tmp.name, 'feedback.json')
+        reader = FeedbackSystem(path)
+        processes = [self.context.Process(target=_submit_feedback, args=(path, i)) for i in range(WORKERS)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+
+        with open(reader.log_file) as f:
+            self.assertEqual(len(f.readlines()), WORKERS * ITERATIONS)
+        # A long-lived reader picks up every other process's appends
+        self.assertEqual(reader.get_feedback_summary()["total_feedback"], WORKERS * ITERATIONS)
+        self.assertEqual(len(reader.get_feedback_for_repo("https://github.com/owner/repo0")), ITERATIONS)
+
+
+class TestWorkerInit(unittest.TestCase):
+
+    def test_init_worker_gives_the_process_a_new_session(self):
+        from github_parser.session import get_github_session
+        import wsgi
+
+        before = get_github_session()
+        with mock.patch('wsgi.performance_metrics'):
+            wsgi.init_worker()
+        self.assertIsNot(get_github_session(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
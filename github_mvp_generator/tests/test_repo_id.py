@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_parser.repo_id import canonical_repo_id, parse_repo_id, repo_key
+from knowledge_base import KnowledgeBase
+
+
+class TestCanonicalRepoId(unittest.TestCase):
+
+    def test_equivalent_urls_share_one_identity(self):
+        urls = [
+            'https://github.com/facebook/react',
+            'https://github.com/facebook/react/',
+            'http://github.com/Facebook/React',
+            'https://github.com/facebook/react.git',
+            'https://github.com/facebook/react/tree/main',
+            'https://github.com/facebook/react/blob/main/README.md',
+            'https://www.github.com/facebook/react?tab=readme',
+            'github.com/facebook/react',
+            'git@github.com:facebook/react.git',
+            'https://api.github.com/repos/facebook/react',
+            '  https://github.com/facebook/react#readme  ',
+        ]
+        for url in urls:
+            self.assertEqual(canonical_repo_id(url), 'facebook/react', url)
+        self.assertEqual(parse_repo_id(urls[2]), ('facebook', 'react'))
+
+    def test_invalid_urls(self):
+        for url in ['https://gitlab.com/facebook/react', 'https://github.com/facebook', '', 'not a url']:
+            with self.assertRaises(ValueError):
+                canonical_repo_id(url)
+
+    def test_repo_key_never_raises(self):
+        self.assertEqual(repo_key('https://github.com/Facebook/React/'), 'facebook/react')
+        self.assertEqual(repo_key('last_repo'), 'last_repo')
+
+
+class TestKnowledgeBaseRekey(unittest.TestCase):
+
+    def test_lookups_hit_across_url_spellings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = KnowledgeBase(os.path.join(tmp, 'knowledge_base.json'))
+            kb.store_repo_pattern('https://github.com/facebook/react', {'name': 'react'})
+            self.assertEqual(kb.get_repo_pattern('http://github.com/Facebook/React.git')['pattern_data'],
+                             {'name': 'react'})
+
+    def test_legacy_raw_url_entries_are_rekeyed(self):
+        import hashlib
+        with tempfile.TemporaryDirectory() as tmp:
+            kb = KnowledgeBase(os.path.join(tmp, 'knowledge_base.json'))
+            for url, timestamp in [('https://github.com/facebook/react/', '2024-01-01T00:00:00'),
+                                   ('https://github.com/Facebook/React', '2024-02-01T00:00:00')]:
+                legacy_key = hashlib.md5(url.encode()).hexdigest()
+                kb.store.put('repo_patterns', legacy_key,
+                             {'repo_url': url, 'pattern_data': {'seen': timestamp}, 'timestamp': timestamp})
+            kb.store.set_meta('repo_key_version', '1')
+
+            migrated = KnowledgeBase(os.path.join(tmp, 'knowledge_base.json'))
+
+            self.assertEqual(migrated.get_knowledge_stats()['repo_patterns_count'], 1)
+            self.assertEqual(migrated.get_repo_pattern('https://github.com/facebook/react')['pattern_data'],
+                             {'seen': '2024-02-01T00:00:00'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.cache import ResponseCache
+from ai.client import AIClient, AIProvider
+
+
+class CountingProvider(AIProvider):
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_text(self, prompt, **kwargs):
+        self.calls += 1
+        return f"response {self.calls}"
+
+    def get_model_name(self):
+        return "test-model"
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _cache(self, **kwargs):
+        return ResponseCache(cache_dir=self.tmp.name, **{'max_entries': 10, 'ttl': 60, **kwargs})
+
+    def test_key_depends_on_every_input(self):
+        cache = self._cache()
+        base = cache.make_key('groq', 'm', 'prompt', {'temperature': 0.7, 'max_tokens': 1000})
+        self.assertEqual(base, cache.make_key('groq', 'm', 'prompt', {'max_tokens': 1000, 'temperature': 0.7}))
+        self.assertNotEqual(base, cache.make_key('openai', 'm', 'prompt', {'temperature': 0.7, 'max_tokens': 1000}))
+        self.assertNotEqual(base, cache.make_key('groq', 'm2', 'prompt', {'temperature': 0.7, 'max_tokens': 1000}))
+        self.assertNotEqual(base, cache.make_key('groq', 'm', 'prompt ', {'temperature': 0.7, 'max_tokens': 1000}))
+        self.assertNotEqual(base, cache.make_key('groq', 'm', 'prompt', {'temperature': 0.2, 'max_tokens': 1000}))
+
+    def test_memory_and_disk_tiers(self):
+        cache = self._cache()
+        cache.set('k', 'value')
+        self.assertEqual(cache.get('k'), 'value')
+        self.assertEqual(cache.get_stats()['memory_hits'], 1)
+
+        # A fresh instance only has the disk tier to go on
+        other = self._cache()
+        self.assertEqual(other.get('k'), 'value')
+        self.assertEqual(other.get('missing'), None)
+        stats = other.get_stats()
+        self.assertEqual((stats['disk_hits'], stats['misses']), (1, 1))
+
+    def test_lru_eviction_keeps_recent_entries(self):
+        cache = self._cache(max_entries=2)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        cache.get('a')
+        cache.set('c', '3')
+        self.assertEqual(list(cache._memory), ['a', 'c'])
+
+    def test_ttl_expiry(self):
+        cache = self._cache(ttl=1)
+        cache.set('k', 'value')
+        with mock.patch('ai.cache.time.time', return_value=time.time() + 5):
+            self.assertIsNone(cache.get('k'))
+        cache.set('k2', 'value')
+        with mock.patch('ai.cache.time.time', return_value=time.time() + 5):
+            self.assertEqual(cache.evict_expired(), 2)
+
+    def test_writes_start_a_periodic_sweep_of_expired_entries(self):
+        cache = self._cache(ttl=1, sweep_interval=60)
+        cache.set('old', 'value')
+        self.assertIsNone(cache._sweeper)
+
+        # An hour later the old key has expired and a sweep is due
+        later = time.time() + 3600
+        with mock.patch('ai.cache.time.time', return_value=later), \
+                mock.patch('ai.cache.time.monotonic', return_value=time.monotonic() + 3600):
+            cache.set('new', 'value')
+            cache._sweeper.join()
+
+        self.assertFalse(os.path.exists(cache._disk_path('old')))
+        self.assertTrue(os.path.exists(cache._disk_path('new')))
+        self.assertEqual(list(cache._memory), ['new'])
+
+    def test_ai_client_serves_repeated_prompts_from_cache(self):
+        provider = CountingProvider()
+        with mock.patch.object(AIClient, '_initialize_client', return_value=provider), \
+                mock.patch('ai.client.response_cache', self._cache()):
+            client = AIClient('groq')
+            first = client.generate_text('same prompt')
+            second = client.generate_text('same prompt')
+            third = client.generate_text('same prompt', temperature=0.1)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual(provider.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.scheduler import StageScheduler
+
+
+class TestStageScheduler(unittest.TestCase):
+
+    def test_independent_stages_run_concurrently(self):
+        scheduler = StageScheduler(max_workers=3)
+        for name in ['a', 'b', 'c']:
+            scheduler.add_stage(name, lambda name=name: time.sleep(0.2) or name)
+
+        start = time.perf_counter()
+        results = scheduler.run()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, {'a': 'a', 'b': 'b', 'c': 'c'})
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(set(scheduler.timings), {'a', 'b', 'c'})
+
+    def test_dependent_stage_receives_inputs(self):
+        scheduler = StageScheduler()
+        scheduler.add_stage('x', lambda: 2)
+        scheduler.add_stage('y', lambda: 3)
+        scheduler.add_stage('product', lambda x, y: x * y, depends_on=['x', 'y'])
+
+        results = scheduler.run()
+
+        self.assertEqual(results['product'], 6)
+        self.assertGreaterEqual(scheduler.timings['product']['start'], scheduler.timings['x']['end'])
+
+    def test_dependent_stage_starts_before_unrelated_slow_stage_finishes(self):
+        started = threading.Event()
+        scheduler = StageScheduler(max_workers=3)
+        scheduler.add_stage('fast', lambda: 1)
+        scheduler.add_stage('slow', lambda: started.wait(1) and 'slow')
+        scheduler.add_stage('after_fast', lambda fast: started.set() or fast + 1, depends_on=['fast'])
+
+        results = scheduler.run()
+
+        self.assertEqual(results['after_fast'], 2)
+        self.assertEqual(results['slow'], 'slow')
+
+    def test_unknown_dependency_and_cycles_are_rejected(self):
+        scheduler = StageScheduler()
+        scheduler.add_stage('a', lambda missing: None, depends_on=['missing'])
+        with self.assertRaises(ValueError):
+            scheduler.run()
+
+        scheduler = StageScheduler()
+        scheduler.add_stage('a', lambda b: None, depends_on=['b'])
+        scheduler.add_stage('b', lambda a: None, depends_on=['a'])
+        with self.assertRaises(ValueError):
+            scheduler.run()
+
+    def test_stage_errors_propagate(self):
+        scheduler = StageScheduler()
+        scheduler.add_stage('boom', lambda: 1 / 0)
+        with self.assertRaises(ZeroDivisionError):
+            scheduler.run()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pipeline
+from singleflight import SingleFlight
+
+
+def run_concurrently(count, target):
+    """Call target from count threads at once and return their results (or exceptions)."""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return "result"
+
+        results = run_concurrently(5, lambda: flight.do("facebook/react", work))
+
+        self.assertEqual(results, ["result"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.get_stats(), {"executions": 1, "coalesced": 4, "in_flight": 0})
+
+    def test_errors_are_shared_with_waiters(self):
+        flight = SingleFlight()
+
+        def work():
+            time.sleep(0.1)
+            raise RuntimeError("rate limited")
+
+        results = run_concurrently(3, lambda: flight.do("facebook/react", work))
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(flight.get_stats()["executions"], 1)
+
+    def test_different_keys_and_sequential_calls_run_separately(self):
+        flight = SingleFlight()
+        calls = []
+        flight.do("a", lambda: calls.append("a"))
+        flight.do("b", lambda: calls.append("b"))
+        flight.do("a", lambda: calls.append("a"))
+        self.assertEqual(calls, ["a", "b", "a"])
+
+
+class TestPipelineCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        for name in ('analysis_flight', 'generation_flight'):
+            patcher = mock.patch(f'pipeline.{name}', SingleFlight(name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('pipeline.performance_metrics')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _slow_analyzer(self, calls):
+        analyzer = mock.Mock()
+
+        def analyze_repo(repo_url):
+            calls.append(repo_url)
+            time.sleep(0.1)
+            return {"name": "react"}
+
+        analyzer.analyze_repo.side_effect = analyze_repo
+        return analyzer
+
+    def test_analysis_is_coalesced_by_canonical_repo(self):
+        calls = []
+        urls = iter(["https://github.com/facebook/react", "https://github.com/Facebook/React.git",
+                     "https://github.com/facebook/react/"])
+        lock = threading.Lock()
+
+        def analyze():
+            with lock:
+                url = next(urls)
+            return pipeline.analyze_repository(url)
+
+        with mock.patch('pipeline.GitHubRepoAnalyzer', return_value=self._slow_analyzer(calls)):
+            results = run_concurrently(3, analyze)
+
+        self.assertEqual(results, [{"name": "react"}] * 3)
+        self.assertEqual(len(calls), 1)
+
+    def test_callers_with_different_tokens_are_not_coalesced(self):
+        calls = []
+        tokens = iter(["token-a", "token-b", "token-a", None])
+        lock = threading.Lock()
+
+        def analyze():
+            with lock:
+                token = next(tokens)
+            return pipeline.analyze_repository("https://github.com/facebook/react", token)
+
+        with mock.patch('pipeline.GITHUB_TOKEN', "token-b"), \
+                mock.patch('pipeline.GitHubRepoAnalyzer', return_value=self._slow_analyzer(calls)):
+            run_concurrently(4, analyze)
+
+        # No token means the configured default, which is token-b here
+        self.assertEqual(len(calls), 2)
+
+    def test_generation_is_coalesced_per_provider(self):
+        calls = []
+        generator = mock.Mock(stage_timings={})
+
+        def generate_prompt(repo_data, repo_url, on_event=None):
+            calls.append(repo_url)
+            time.sleep(0.1)
+            return "prompt"
+
+        generator.generate_prompt.side_effect = generate_prompt
+        providers = iter(["openai", "openai", "groq", "groq"])
+        lock = threading.Lock()
+
+        def generate():
+            with lock:
+                provider = next(providers)
+            return pipeline.generate_for_repo("https://github.com/facebook/react", provider, repo_data={})
+
+        with mock.patch('ai.generator.AIEnhancedGenerator', return_value=generator):
+            results = run_concurrently(4, generate)
+
+        self.assertEqual([result["prompt"] for result in results], ["prompt"] * 4)
+        self.assertEqual(len(calls), 2)
+        # Each caller gets its own result dict
+        self.assertIsNot(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.scheduler import StageScheduler
+from performance_metrics import PerformanceMetrics
+
+
+class TestSpans(unittest.TestCase):
+    """Test nested timing spans and their aggregation."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.metrics = PerformanceMetrics(os.path.join(self.tmp.name, "metrics.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_spans_nest_and_decorator_opens_a_span(self):
+        @self.metrics.timed("format")
+        def format_output():
+            return "done"
+
+        with self.metrics.span("request", repo="facebook/react") as root:
+            with self.metrics.span("analysis") as analysis:
+                analysis.set("cache", "miss")
+            self.assertEqual(format_output(), "done")
+
+        tree = root.to_dict()
+        self.assertEqual(tree["name"], "request")
+        self.assertEqual(tree["attributes"], {"repo": "facebook/react"})
+        self.assertEqual([child["name"] for child in tree["children"]], ["analysis", "format"])
+        self.assertEqual(tree["children"][0]["attributes"], {"cache": "miss"})
+        self.assertGreaterEqual(tree["duration"], tree["children"][1]["start"])
+
+    def test_failed_span_records_error(self):
+        with self.assertRaises(ValueError):
+            with self.metrics.span("request") as root:
+                raise ValueError("boom")
+        self.assertEqual(root.to_dict()["attributes"], {"error": "ValueError"})
+        self.assertIsNotNone(root.duration)
+
+    def test_scheduler_stages_nest_under_the_callers_span(self):
+        scheduler = StageScheduler(max_workers=2)
+        stage_threads = []
+
+        def stage(name):
+            def run(**inputs):
+                stage_threads.append(threading.get_ident())
+                with self.metrics.span(name):
+                    return name
+            return run
+
+        scheduler.add_stage("project_type", stage("project_type"))
+        scheduler.add_stage("tech_stack", stage("tech_stack"))
+        scheduler.add_stage("steps", stage("steps"), depends_on=["project_type", "tech_stack"])
+
+        with self.metrics.span("generation") as root:
+            scheduler.run()
+
+        self.assertNotIn(threading.get_ident(), stage_threads)
+        names = sorted(child["name"] for child in root.to_dict()["children"])
+        self.assertEqual(names, ["project_type", "steps", "tech_stack"])
+
+    def test_spans_are_aggregated_in_stats(self):
+        for _ in range(3):
+            with self.metrics.span("github.request"):
+                pass
+        self.metrics.flush()
+
+        summary = PerformanceMetrics(self.metrics.metrics_file).get_performance_summary()
+        self.assertEqual(summary["span_performance"]["github.request"]["count"], 3)
+        self.assertIn("p99", summary["span_performance"]["github.request"])
+
+
+class TestPipelineTimings(unittest.TestCase):
+    """Test the span tree returned by the pipeline."""
+
+    def test_generation_returns_timing_breakdown(self):
+        import pipeline
+        from ai.client import AIClient
+        from singleflight import SingleFlight
+
+        def generate_text(self, prompt, **kwargs):
+            return "1. Step one\n2. Step two\n3. Step three\n4. Step four\n5. Step five"
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch('pipeline.performance_metrics', PerformanceMetrics(os.path.join(tmp, "metrics.json"))) as metrics, \
+                mock.patch('pipeline.generation_flight', SingleFlight("generation")), \
+                mock.patch('ai.generator.user_preferences'), \
+                mock.patch.object(AIClient, '_initialize_client', return_value=mock.Mock()), \
+                mock.patch.object(AIClient, 'generate_text', generate_text), \
+                mock.patch.object(AIClient, 'stream_text', lambda self, prompt, **kwargs: iter(["Guidance"])):
+            result = pipeline.generate_for_repo("https://github.com/facebook/react", "groq",
+                                                repo_data={"name": "react", "language": "JavaScript"})
+            metrics.flush()
+
+        tree = result["timings"]
+        self.assertEqual(tree["name"], "pipeline.generate")
+        self.assertEqual([child["name"] for child in tree["children"]], ["pipeline.analysis", "pipeline.generation"])
+        generation = [span["name"] for span in tree["children"][1]["children"]]
+        self.assertIn("generator.determine_project_type", generation)
+        self.assertIn("generator.generate_detailed_mvp_guidance", generation)
+        self.assertIn("generator.format", generation)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.cache import ResponseCache
+from ai.client import AIClient
+from ai.generator import AIEnhancedGenerator
+from ai.scheduler import StageScheduler
+
+
+class StreamingClient:
+    """Answers every stage, streaming the MVP guidance in three deltas."""
+
+    GUIDANCE = ["1. Start with ", "the reconciler.", " Then add hooks."]
+
+    def generate_text(self, prompt, **kwargs):
+        return ""
+
+    def stream_text(self, prompt, **kwargs):
+        yield from self.GUIDANCE
+
+
+class TestSchedulerCallback(unittest.TestCase):
+
+    def test_on_stage_complete_reports_each_result(self):
+        completed = []
+        scheduler = StageScheduler(on_stage_complete=lambda name, result: completed.append((name, result)))
+        scheduler.add_stage('a', lambda: 1)
+        scheduler.add_stage('b', lambda a: a + 1, depends_on=['a'])
+
+        scheduler.run()
+
+        self.assertEqual(completed, [('a', 1), ('b', 2)])
+
+
+class TestStreamingGeneration(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('ai.generator.user_preferences')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with mock.patch('ai.generator.AIClient', return_value=StreamingClient()):
+            self.generator = AIEnhancedGenerator('openai')
+        self.repo_data = {'name': 'react', 'language': 'JavaScript', 'frameworks': ['React'], 'contents': []}
+
+    def test_sections_and_guidance_tokens_are_emitted(self):
+        events = []
+        prompt = self.generator.generate_prompt(self.repo_data, 'https://github.com/facebook/react',
+                                                on_event=lambda event, data: events.append((event, data)))
+
+        sections = [data["section"] for event, data in events if event == "section"]
+        self.assertEqual(sorted(sections), sorted([
+            "project_type", "tech_stack", "architecture", "key_features",
+            "complexity", "implementation_steps", "mvp_guidance"]))
+        tokens = [data["text"] for event, data in events if event == "token"]
+        self.assertEqual(tokens, StreamingClient.GUIDANCE)
+        # Every token arrives before the guidance section itself resolves
+        guidance_index = next(i for i, (event, data) in enumerate(events)
+                              if event == "section" and data["section"] == "mvp_guidance")
+        self.assertTrue(all(i < guidance_index for i, (event, _) in enumerate(events) if event == "token"))
+        self.assertIn("1. Start with the reconciler. Then add hooks.", prompt)
+
+    def test_without_callback_guidance_is_not_streamed(self):
+        with mock.patch.object(StreamingClient, 'stream_text') as stream_text:
+            self.generator.generate_prompt(self.repo_data, 'https://github.com/facebook/react')
+        stream_text.assert_not_called()
+
+
+class TestClientStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(enabled=True, cache_dir=os.devnull)
+        patcher = mock.patch('ai.client.response_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_streamed_text_is_cached_and_replayed(self):
+        provider = mock.Mock()
+        provider.default_params = {}
+        provider.get_model_name.return_value = 'model'
+        provider.stream_text.return_value = iter(["Hello", ", world "])
+        with mock.patch.object(AIClient, '_initialize_client', return_value=provider), \
+                mock.patch('builtins.print'):
+            client = AIClient('openai')
+            self.assertEqual(list(client.stream_text("hi")), ["Hello", ", world "])
+            self.assertEqual(list(client.stream_text("hi")), ["Hello, world"])
+            self.assertEqual(client.generate_text("hi"), "Hello, world")
+        provider.stream_text.assert_called_once()
+
+
+class TestStreamEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        import api
+        self.api = api
+
+    def _stream(self, **kwargs):
+        def fake_stream(repo_url, provider, github_token=None, mode='staged', on_event=None):
+            on_event("analysis", {"repo_id": "facebook/react"})
+            on_event("section", {"section": "project_type", "value": "UI Library"})
+            on_event("token", {"section": "mvp_guidance", "text": "Start"})
+            if kwargs.get('fail'):
+                raise RuntimeError("provider down")
+            return {"prompt": "PROMPT", "stage_timings": {}, "duration": 1.0}
+
+        with mock.patch('api.stream_for_repo', fake_stream), \
+                self.api.app.test_request_context('/api/generate/stream', method='POST',
+                                                  json={"repo_url": "https://github.com/facebook/react"}):
+            response = self.api.generate_mvp_stream()
+            body = "".join(response.response)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = []
+        for block in body.strip().split("\n\n"):
+            event_line, data_line = block.split("\n")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+        return events
+
+    def test_events_are_streamed_in_order(self):
+        events = self._stream()
+        self.assertEqual([event for event, _ in events], ["start", "analysis", "section", "token", "complete"])
+        self.assertEqual(events[-1][1]["prompt"], "PROMPT")
+
+    def test_errors_end_the_stream(self):
+        events = self._stream(fail=True)
+        self.assertEqual(events[-1], ("error", {"error": "provider down"}))
+
+    def test_repo_url_is_required(self):
+        with self.api.app.test_request_context('/api/generate/stream'):
+            response = self.api.app.make_response(self.api.generate_mvp_stream())
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
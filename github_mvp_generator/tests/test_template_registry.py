@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jinja2 import Template
+from ai.templates.registry import TemplateRegistry, load_prompt_templates
+
+
+class TestTemplateRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.templates = load_prompt_templates()
+        self.context = {
+            'repo_name': 'react',
+            'language': 'JavaScript',
+            'frameworks': 'React',
+            'description': 'UI library',
+            'contents': [{'name': 'package.json'}, {'name': 'src'}],
+            'features': ['Components'],
+        }
+
+    def test_loads_every_prompt_template(self):
+        self.assertIn('PROJECT_TYPE_PROMPT', self.templates)
+        self.assertIn('IMPLEMENTATION_STEPS_PROMPT', self.templates)
+        self.assertTrue(all(name.endswith('_PROMPT') for name in self.templates))
+
+    def test_render_matches_uncompiled_template(self):
+        registry = TemplateRegistry(self.templates, bytecode_cache_dir=None)
+        for source in self.templates.values():
+            self.assertEqual(registry.render(source, self.context), Template(source).render(self.context))
+
+    def test_variants_are_compiled_once(self):
+        registry = TemplateRegistry(self.templates, bytecode_cache_dir=None)
+        variant = self.templates['PROJECT_TYPE_PROMPT'] + "\nBe concise."
+        first = registry.register_variant(variant)
+        self.assertIs(registry.register_variant(variant), first)
+        self.assertIs(registry.register_variant(self.templates['PROJECT_TYPE_PROMPT']),
+                      registry.get_template('PROJECT_TYPE_PROMPT'))
+
+    def test_bytecode_cache_directory(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            TemplateRegistry(self.templates, bytecode_cache_dir=cache_dir)
+            self.assertTrue(os.listdir(cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.cache import ResponseCache
+from ai.client import AIClient, AIProvider, report_usage
+from metrics_export import render_openmetrics
+from performance_metrics import OTHER_REPOS, PerformanceMetrics, parse_pricing
+
+PRICING = {"gpt-4o-mini": {"prompt": 0.15, "completion": 0.6}}
+
+
+def _usage(prompt_tokens, completion_tokens):
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
+
+
+def _completion(content, usage):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+
+def _chunk(content, **extra):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], **extra)
+
+
+class ReportingProvider(AIProvider):
+    """Sync-only provider that reports usage like the SDK-backed ones."""
+
+    def generate_text(self, prompt, **kwargs):
+        report_usage(_usage(len(prompt), 5))
+        return f"answer:{prompt}"
+
+    def get_model_name(self):
+        return "gpt-4o-mini"
+
+
+class AsyncStreamingProvider(ReportingProvider):
+    """Streams two deltas, reporting usage with the last chunk and then awaiting the stream's end."""
+
+    async def astream_text(self, prompt, **kwargs):
+        for delta in ("a", "b"):
+            await asyncio.sleep(0)
+            yield delta
+        report_usage(_usage(len(prompt), 5))
+        await asyncio.sleep(0.01)
+
+
+class TestTokenUsage(unittest.TestCase):
+    """Test token capture in the providers and its attribution in the metrics."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.metrics = PerformanceMetrics(os.path.join(self.tmp.name, "metrics.json"),
+                                          flush_interval=3600, pricing=PRICING)
+        for target, value in (('ai.client.performance_metrics', self.metrics),
+                              ('ai.client.response_cache', ResponseCache(enabled=True, cache_dir=os.devnull))):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _client(self, provider, name="openai"):
+        with mock.patch.object(AIClient, '_initialize_client', return_value=provider):
+            client = AIClient(name)
+        client.usage_repo = "facebook/react"
+        return client
+
+    def _openai(self, create):
+        from ai.providers.openai import OpenAIProvider
+
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            provider = OpenAIProvider()
+        provider.model = "gpt-4o-mini"
+        provider.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        return provider
+
+    def test_usage_is_attributed_to_template_model_and_repo(self):
+        create = mock.Mock(return_value=_completion("web app", _usage(1000, 200)))
+        client = self._client(self._openai(create))
+
+        self.assertEqual(client.generate_text("prompt", template="PROJECT_TYPE_PROMPT"), "web app")
+        # A cache hit costs no tokens
+        client.generate_text("prompt", template="PROJECT_TYPE_PROMPT")
+        create.assert_called_once()
+
+        summary = self.metrics.get_token_usage_summary()
+        template = summary["templates"]["PROJECT_TYPE_PROMPT"]
+        self.assertEqual((template["calls"], template["prompt_tokens"], template["completion_tokens"]), (1, 1000, 200))
+        self.assertAlmostEqual(template["cost"], (1000 * 0.15 + 200 * 0.6) / 1_000_000)
+        self.assertEqual(summary["models"]["openai/gpt-4o-mini"]["total_tokens"], 1200)
+        self.assertEqual(summary["top_repos"]["facebook/react"]["total_tokens"], 1200)
+        self.assertEqual(summary["total"]["total_tokens"], 1200)
+
+    def test_streamed_usage_comes_from_the_final_chunk(self):
+        chunks = [_chunk("Hello"), _chunk(" world"), SimpleNamespace(choices=[], usage=_usage(30, 2))]
+        create = mock.Mock(return_value=iter(chunks))
+        client = self._client(self._openai(create))
+
+        self.assertEqual(list(client.stream_text("prompt", template="MVP_GUIDANCE_PROMPT")), ["Hello", " world"])
+        self.assertEqual(create.call_args.kwargs['stream_options'], {"include_usage": True})
+        self.assertEqual(self.metrics.get_token_usage_summary()["templates"]["MVP_GUIDANCE_PROMPT"]["total_tokens"], 32)
+
+    def test_groq_stream_usage_comes_from_x_groq(self):
+        from ai.providers.groq import GroqProvider
+
+        with mock.patch.dict(os.environ, {'GROQ_API_KEY': 'test-key'}):
+            provider = GroqProvider()
+        chunks = [_chunk("Hi", x_groq=None), _chunk(None, x_groq=SimpleNamespace(usage=_usage(7, 1)))]
+        provider.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=mock.Mock(return_value=iter(chunks)))))
+        client = self._client(provider, "groq")
+
+        self.assertEqual(list(client.stream_text("prompt", template="MVP_GUIDANCE_PROMPT")), ["Hi"])
+        summary = self.metrics.get_token_usage_summary()
+        self.assertEqual(summary["models"][f"groq/{provider.model}"]["total_tokens"], 8)
+        # No price configured for the model
+        self.assertEqual(summary["models"][f"groq/{provider.model}"]["cost"], 0)
+
+    def test_async_calls_on_worker_threads_report_usage(self):
+        client = self._client(ReportingProvider())
+
+        async def generate_many():
+            return await asyncio.gather(*(client.agenerate_text(f"p{i}", template="TECH_STACK_PROMPT")
+                                          for i in range(10)))
+
+        asyncio.run(generate_many())
+        usage = self.metrics.get_token_usage_summary()["templates"]["TECH_STACK_PROMPT"]
+        self.assertEqual((usage["calls"], usage["prompt_tokens"], usage["completion_tokens"]), (10, 20, 50))
+
+    def test_concurrent_async_streams_keep_their_own_usage(self):
+        client = self._client(AsyncStreamingProvider())
+
+        async def stream(i):
+            return [delta async for delta in client.astream_text(f"p{i}", template="MVP_GUIDANCE_PROMPT")]
+
+        async def stream_many():
+            return await asyncio.gather(*(stream(i) for i in range(10)))
+
+        self.assertEqual(asyncio.run(stream_many()), [["a", "b"]] * 10)
+        usage = self.metrics.get_token_usage_summary()["templates"]["MVP_GUIDANCE_PROMPT"]
+        self.assertEqual((usage["calls"], usage["prompt_tokens"], usage["completion_tokens"]), (10, 20, 50))
+
+    def test_token_usage_is_exported(self):
+        client = self._client(ReportingProvider())
+        client.generate_text("prompt", template="FEATURES_PROMPT")
+        text = render_openmetrics(self.metrics.get_snapshot())
+        self.assertIn('mvp_llm_template_tokens_total{template="FEATURES_PROMPT",kind="prompt"} 6', text)
+        self.assertIn('mvp_llm_model_cost_usd_total{model="openai/gpt-4o-mini"}', text)
+
+    def test_repositories_beyond_the_cap_are_summed_together(self):
+        metrics = PerformanceMetrics(os.path.join(self.tmp.name, "capped.json"), flush_interval=3600,
+                                     pricing=PRICING, token_repos=2)
+        for repo, prompt_tokens in (("a/small", 10), ("b/big", 1000), ("c/tiny", 1), ("d/mid", 100)):
+            metrics.record_token_usage("openai", "gpt-4o-mini", "FEATURES_PROMPT", repo,
+                                       {"prompt_tokens": prompt_tokens, "completion_tokens": 0,
+                                        "total_tokens": prompt_tokens})
+        metrics.flush()
+
+        with open(metrics.metrics_file) as f:
+            repos = json.load(f)["token_usage"]["repos"]
+        self.assertEqual(sorted(repos), [OTHER_REPOS, "b/big", "d/mid"])
+        self.assertEqual((repos[OTHER_REPOS]["calls"], repos[OTHER_REPOS]["total_tokens"]), (2, 11))
+        summary = metrics.get_token_usage_summary()
+        self.assertEqual(list(summary["top_repos"]), ["b/big", "d/mid"])
+        self.assertEqual(summary["total"]["total_tokens"], 1111)
+
+    def test_invalid_pricing_is_ignored(self):
+        with mock.patch('builtins.print') as printed:
+            self.assertEqual(parse_pricing("not json"), {})
+        printed.assert_called_once()
+        self.assertEqual(parse_pricing('{"m": {"prompt": 1}}'), {"m": {"prompt": 1.0, "completion": 0.0}})
+
+
+if __name__ == '__main__':
+    unittest.main()
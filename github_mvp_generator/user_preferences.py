@@ -1,27 +1,44 @@
 """User preferences system for the GitHub MVP Generator."""
 
-import json
 import os
-from typing import Dict, Any
+import threading
+from typing import Callable, Dict, Any
 from datetime import datetime
 
+from file_store import read_json, update_json
+
 
 class UserPreferences:
-    """Manages user preferences and settings."""
+    """Manages user preferences and settings.
+    
+    Every change is a locked read-modify-write of the preferences file, so
+    several API worker processes can update it without losing each other's
+    changes. Reads pick up other workers' changes when the file's mtime moves.
+    """
     
     def __init__(self, preferences_file: str = "user_preferences.json"):
         self.preferences_file = preferences_file
+        self._mtime = None
         self.preferences = self._load_preferences()
+        # Generation stages run concurrently, so guard mutations and saves
+        self._lock = threading.RLock()
+    
+    def _file_mtime(self):
+        try:
+            return os.stat(self.preferences_file).st_mtime_ns
+        except OSError:
+            return None
     
     def _load_preferences(self) -> Dict[str, Any]:
         """Load existing preferences from file."""
-        if os.path.exists(self.preferences_file):
-            try:
-                with open(self.preferences_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return self._get_default_preferences()
-        return self._get_default_preferences()
+        self._mtime = self._file_mtime()
+        return read_json(self.preferences_file, self._get_default_preferences)
+    
+    def _refresh(self):
+        """Reload preferences if another process has changed the file."""
+        if self._file_mtime() != self._mtime:
+            with self._lock:
+                self.preferences = self._load_preferences()
     
     def _get_default_preferences(self) -> Dict[str, Any]:
         """Get default preferences."""
@@ -33,53 +50,70 @@ class UserPreferences:
             "usage_count": 0
         }
     
-    def _save_preferences(self):
-        """Save preferences to file."""
-        try:
-            with open(self.preferences_file, 'w') as f:
-                json.dump(self.preferences, f, indent=2)
-        except IOError as e:
-            print(f"Warning: Could not save preferences: {e}")
+    def _update_preferences(self, mutate: Callable[[Dict[str, Any]], None]):
+        """Apply a change to the latest on-disk preferences and save them."""
+        with self._lock:
+            try:
+                self.preferences = update_json(self.preferences_file, mutate, self._get_default_preferences)
+                self._mtime = self._file_mtime()
+            except IOError as e:
+                # Keep the change in memory even if it couldn't be persisted
+                mutate(self.preferences)
+                print(f"Warning: Could not save preferences: {e}")
     
     def update_provider_preference(self, provider: str):
         """Update the preferred AI provider."""
-        self.preferences["default_provider"] = provider
-        self.preferences["last_used"] = datetime.now().isoformat()
-        self.preferences["usage_count"] = self.preferences.get("usage_count", 0) + 1
-        self._save_preferences()
+        def mutate(preferences):
+            preferences["default_provider"] = provider
+            preferences["last_used"] = datetime.now().isoformat()
+            preferences["usage_count"] = preferences.get("usage_count", 0) + 1
+        
+        self._update_preferences(mutate)
     
     def add_preferred_tech_stack(self, tech_stack: str):
         """Add a preferred tech stack."""
-        if "preferred_tech_stacks" not in self.preferences:
-            self.preferences["preferred_tech_stacks"] = []
+        self._refresh()
+        if tech_stack in self.preferences.get("preferred_tech_stacks", []):
+            return
         
-        if tech_stack not in self.preferences["preferred_tech_stacks"]:
-            self.preferences["preferred_tech_stacks"].append(tech_stack)
-            self._save_preferences()
+        def mutate(preferences):
+            stacks = preferences.setdefault("preferred_tech_stacks", [])
+            if tech_stack not in stacks:
+                stacks.append(tech_stack)
+        
+        self._update_preferences(mutate)
     
     def add_preferred_project_type(self, project_type: str):
         """Add a preferred project type."""
-        if "preferred_project_types" not in self.preferences:
-            self.preferences["preferred_project_types"] = []
+        self._refresh()
+        if project_type in self.preferences.get("preferred_project_types", []):
+            return
+        
+        def mutate(preferences):
+            project_types = preferences.setdefault("preferred_project_types", [])
+            if project_type not in project_types:
+                project_types.append(project_type)
         
-        if project_type not in self.preferences["preferred_project_types"]:
-            self.preferences["preferred_project_types"].append(project_type)
-            self._save_preferences()
+        self._update_preferences(mutate)
     
     def get_preferred_provider(self) -> str:
         """Get the preferred AI provider."""
+        self._refresh()
         return self.preferences.get("default_provider", "groq")
     
     def get_preferred_tech_stacks(self) -> list:
         """Get preferred tech stacks."""
+        self._refresh()
         return self.preferences.get("preferred_tech_stacks", [])
     
     def get_preferred_project_types(self) -> list:
         """Get preferred project types."""
+        self._refresh()
         return self.preferences.get("preferred_project_types", [])
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics."""
+        self._refresh()
         return {
             "usage_count": self.preferences.get("usage_count", 0),
             "last_used": self.preferences.get("last_used"),
@@ -88,6 +122,7 @@ class UserPreferences:
     
     def get_all_preferences(self) -> Dict[str, Any]:
         """Get all preferences."""
+        self._refresh()
         return self.preferences
 
 
@@ -0,0 +1,30 @@
+"""WSGI entry point for serving the GitHub MVP Generator API in production.
+
+Run with gunicorn, which reads its settings from gunicorn.conf.py:
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api import app
+from github_parser.session import reset_github_session
+from performance_metrics import performance_metrics
+
+application = app
+
+
+def init_worker():
+    """Prepare per-process state in a freshly forked worker.
+    
+    With preload_app the app and its singletons are imported once in the
+    master and inherited by every worker. Pooled GitHub connections must not
+    be shared across processes, so each worker opens its own. The knowledge
+    store, job queue, refresh queue and coalescing groups detect the fork
+    themselves, and the JSON-backed stores merge under a file lock.
+    """
+    reset_github_session()
+    performance_metrics.reset_session()